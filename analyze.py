@@ -1,3 +1,7 @@
 from src.eda import eda_plots_analisys
+from src.utils import tracing
 
-eda_plots_analisys.analyze()
\ No newline at end of file
+tracing.configure_logging()
+tracing.start()
+
+eda_plots_analisys.analyze()
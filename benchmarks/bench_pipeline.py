@@ -0,0 +1,229 @@
+"""
+End-to-end pipeline benchmark on synthetic data.
+
+    python -m benchmarks.bench_pipeline --rows 10000 100000
+    python -m benchmarks.bench_pipeline --rows 1000000 --stages feature_creation feature_engineering inference
+
+Every stage reports its wall time, rows/sec and the peak RSS of the process
+while it ran. One JSON record per stage is appended to the results file
+(see benchmarks/compare.py to diff two runs).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.synthetic_data import load_reference, synthetic_rows
+from src.artifacts.preprocessing import compact_configs
+from src.model_experiments import experiments
+from src.preprocessing import transform_plan
+from src.preprocessing.pre_processing import DS_KEYS, init_datasets
+from src.research import dataset_engineering, feature_engineering, feature_importance, training_dataset_building
+from src.utils import parallelism
+from src.utils.tracing import current_rss
+from src.utils.storage import load_pickle, path_validate
+
+STAGES = ('feature_creation', 'feature_engineering', 'ranking', 'experiments', 'inference')
+RESULTS_PATH = 'benchmarks/results/results.jsonl'
+# Rankings used when the ranking stage is not benchmarked.
+FALLBACK_RANKINGS = 'training_parameter_results/v1/all_rankings.pkl'
+# Held-out and inference rows, as a fraction of the training rows.
+TEST_FRACTION = 0.2
+
+
+# ------------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------------
+class _PeakRSS(threading.Thread):
+    """Polls the RSS in the background and keeps its maximum."""
+
+    def __init__(self, interval=0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss())
+        return self.peak
+
+
+@contextmanager
+def measure(records, stage, rows, **context):
+    """Time a stage and append its record to `records`."""
+    start_rss = current_rss()
+    sampler = _PeakRSS()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        peak = sampler.stop()
+        record = {
+            'stage': stage,
+            'rows': rows,
+            'wall_s': round(wall, 4),
+            'rows_per_s': round(rows / wall, 1) if wall > 0 else None,
+            'peak_rss_mb': round(peak / 2 ** 20, 1),
+            'rss_start_mb': round(start_rss / 2 ** 20, 1),
+            **context,
+        }
+        records.append(record)
+        print(
+            f"{stage:<36} rows={rows:<10} wall={record['wall_s']:>9.3f}s "
+            f"rows/s={record['rows_per_s'] or 0:>12,.0f} peak_rss={record['peak_rss_mb']:>8.1f}MB",
+            flush=True,
+        )
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ------------------------------------------------------------------
+# Pipeline stages
+# ------------------------------------------------------------------
+def _variant_order(ds_keys):
+    """Variants with their source variant first (the order the DAG scheduler allows)."""
+    ordered = []
+    pending = dict(ds_keys)
+    while pending:
+        for ds, cfg in list(pending.items()):
+            if dataset_engineering.variant_source(cfg) not in pending:
+                ordered.append(ds)
+                del pending[ds]
+    return ordered
+
+
+def run_benchmark(n_rows, stages=STAGES, dataset='ds4', search_strategy='grid', search_budget=None,
+                  seed=0, reference=None):
+    """
+    Run the selected stages on `n_rows` synthetic training rows.
+
+    Returns:
+        list of stage records.
+    """
+    records = []
+    n_test = max(1, int(n_rows * TEST_FRACTION))
+    train = synthetic_rows(n_rows, reference, seed=seed)
+    test = synthetic_rows(n_test, reference, seed=seed + 1)
+    y = train.pop('target')
+    y_test = test.pop('target')
+    X = train.drop(columns=['player_id'])
+
+    with measure(records, 'feature_creation', n_rows) if 'feature_creation' in stages else nullcontext():
+        X = feature_engineering.feature_creation_pipeline(X)
+
+    if set(stages) <= {'feature_creation'}:
+        return records
+
+    # Variants are engineered one at a time (not through the DAG scheduler)
+    # so each one gets its own timing.
+    datasets = init_datasets(X, DS_KEYS)
+    fitted = defaultdict(dict)
+    for ds in _variant_order(DS_KEYS):
+        cfg = DS_KEYS[ds]
+        source = dataset_engineering.variant_source(cfg)
+        frame = datasets[source] if source is not None else datasets[ds]
+        with measure(records, f'feature_engineering[{ds}]', n_rows) \
+                if 'feature_engineering' in stages else nullcontext():
+            datasets[ds], variant_config = dataset_engineering.engineer_variant(ds, cfg, frame, fitted, role='train')
+        fitted[ds].update(variant_config)
+    processing_configs = compact_configs.compact_processing_configs(fitted, DS_KEYS)
+
+    if 'ranking' in stages:
+        with measure(records, 'ranking', n_rows):
+            all_rankings = feature_importance.rank_all_features(datasets, y, DS_KEYS)
+    elif 'experiments' in stages or 'inference' in stages:
+        all_rankings = load_pickle(FALLBACK_RANKINGS)
+
+    if 'experiments' in stages or 'inference' in stages:
+        plans = transform_plan.compile_transform_plans(DS_KEYS, processing_configs, all_rankings)
+
+    estimator = None
+    if 'experiments' in stages:
+        train_ds = training_dataset_building.dataset_building(
+            {dataset: datasets[dataset]}, {dataset: all_rankings[dataset]}, y, role='train'
+        )[dataset]
+        X_test = _inference(test, plans[dataset])
+        with measure(records, f'experiments[{dataset}]', n_rows, search_strategy=search_strategy):
+            results = experiments.experiment_results(
+                train_ds.drop(columns=['target']), train_ds['target'], X_test, y_test,
+                version='bench', search_strategy=search_strategy, search_budget=search_budget,
+            )
+        estimator = results['best_estimator']
+
+    if 'inference' in stages:
+        raw = test.drop(columns=['player_id'])
+        for ds in DS_KEYS:
+            with measure(records, f'inference[{ds}]', n_test):
+                _inference(raw, plans[ds])
+        if estimator is not None:
+            with measure(records, f'inference[{dataset}]+predict', n_test):
+                estimator.predict_proba(_inference(raw, plans[dataset]))
+
+    return records
+
+
+def _inference(raw, plan):
+    """The serving path of one variant: derived features then the compiled transform plan."""
+    X = feature_engineering.feature_creation_pipeline(raw[plan['raw_inputs']], plan['derived'])
+    return transform_plan.apply_transform_plan(X, plan)
+
+
+# ------------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000],
+                        help='training rows per run (e.g. 10000 100000 1000000 10000000)')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--dataset', default='ds4', help='variant trained by the experiments stage')
+    parser.add_argument('--search-strategy', default='grid')
+    parser.add_argument('--search-budget', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=RESULTS_PATH, help='JSON lines file the records are appended to')
+    args = parser.parse_args(argv)
+
+    run = {
+        'run_id': datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'cores': parallelism.available_cores(),
+    }
+    reference = load_reference()
+    records = []
+    for n_rows in args.rows:
+        print(f"--- {n_rows} rows ---", flush=True)
+        records += run_benchmark(n_rows, args.stages, args.dataset, args.search_strategy,
+                                 args.search_budget, args.seed, reference)
+
+    path_validate(args.output)
+    with open(args.output, 'a') as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + '\n')
+    print(f"{len(records)} records appended to {args.output} (run {run['run_id']})")
+
+
+if __name__ == '__main__':
+    main()
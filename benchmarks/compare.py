@@ -0,0 +1,75 @@
+"""
+Compare two benchmark result files written by bench_pipeline.
+
+    python -m benchmarks.compare baseline.jsonl candidate.jsonl --threshold 1.2
+
+The last run of each file is used. A stage regresses when its wall time (or
+peak RSS) grew by more than `threshold` times; the exit status is 1 when
+any stage regressed. Stages under MIN_WALL_S seconds only count for RSS.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ('wall_s', 'peak_rss_mb')
+# Stages faster than this in the baseline are reported but never flagged:
+# their ratio is timer noise.
+MIN_WALL_S = 0.05
+
+
+def load_results(path, run_id=None):
+    """{(stage, rows): record} of one run of a results file (the last one by default)."""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise ValueError(f"No benchmark records in {path}")
+    run_id = run_id or records[-1]['run_id']
+    return {(r['stage'], r['rows']): r for r in records if r['run_id'] == run_id}
+
+
+def compare(baseline, candidate, threshold=1.2, metrics=METRICS, min_wall=MIN_WALL_S):
+    """
+    Ratios candidate / baseline of every stage present in both runs.
+
+    Returns:
+        (list of comparison rows, list of regressed rows)
+    """
+    rows, regressions = [], []
+    for key in sorted(baseline.keys() & candidate.keys(), key=lambda k: (k[1], k[0])):
+        row = {'stage': key[0], 'rows': key[1]}
+        for metric in metrics:
+            old, new = baseline[key][metric], candidate[key][metric]
+            row[metric] = (old, new, new / old if old else float('inf'))
+        rows.append(row)
+        checked = [m for m in metrics if m != 'wall_s' or baseline[key]['wall_s'] >= min_wall]
+        if any(row[metric][2] > threshold for metric in checked):
+            regressions.append(row)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='largest accepted candidate / baseline ratio')
+    parser.add_argument('--metrics', nargs='+', choices=METRICS, default=list(METRICS))
+    parser.add_argument('--min-wall', type=float, default=MIN_WALL_S,
+                        help='baseline wall time (s) below which wall ratios are not flagged')
+    args = parser.parse_args(argv)
+
+    rows, regressions = compare(load_results(args.baseline), load_results(args.candidate),
+                                args.threshold, args.metrics, args.min_wall)
+    for row in rows:
+        flag = 'REGRESSION' if row in regressions else ''
+        cells = '  '.join(f"{m}={row[m][0]:.3f}->{row[m][1]:.3f} (x{row[m][2]:.2f})" for m in args.metrics)
+        print(f"{row['stage']:<36} rows={row['rows']:<10} {cells}  {flag}")
+
+    if regressions:
+        print(f"{len(regressions)} of {len(rows)} stages regressed beyond x{args.threshold}")
+        sys.exit(1)
+    print(f"No regression beyond x{args.threshold} in {len(rows)} stages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+REFERENCE_DATA = 'data/raw_data/training_data.csv'
+
+# Continuous columns get multiplicative noise so synthetic rows are not
+# exact copies of the reference (bin edges and frequency maps keep growing
+# with n like on real data). Counts stay integers and percentages in [0, 100].
+CONTINUOUS_COLS = ['minutes_played', 'fg_pct', 'three_pct', 'ft_pct']
+PERCENT_COLS = ['fg_pct', 'three_pct', 'ft_pct']
+NOISE = 0.05
+
+
+def load_reference(path=REFERENCE_DATA):
+    return pd.read_csv(path, index_col='row_id')
+
+
+def synthetic_rows(n_rows, reference=None, seed=0, target=True):
+    """
+    `n_rows` rows with the training_data.csv schema (row_id index).
+
+    Rows are bootstrapped from the reference data, which keeps the joint
+    distribution of the box-score columns and the target, then continuous
+    columns are jittered and player ids are spread over a player pool
+    that grows with n.
+
+    Args:
+        target: keep the target column (False gives the blind test schema).
+    """
+    if reference is None:
+        reference = load_reference()
+    rng = np.random.default_rng(seed)
+
+    rows = reference.iloc[rng.integers(len(reference), size=n_rows)].reset_index(drop=True)
+    for col in CONTINUOUS_COLS:
+        jittered = rows[col].to_numpy(dtype=float) * rng.normal(1.0, NOISE, size=n_rows)
+        if col in PERCENT_COLS:
+            jittered = np.clip(jittered, 0, 100)
+        rows[col] = np.round(np.maximum(jittered, 0), 1)
+
+    n_players = max(reference['player_id'].nunique(), n_rows // 80)
+    rows['player_id'] = reference['player_id'].min() + rng.integers(n_players, size=n_rows)
+    rows.index = pd.RangeIndex(1, n_rows + 1, name='row_id')
+
+    if not target:
+        rows = rows.drop(columns=['target'])
+    return rows
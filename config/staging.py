@@ -3,4 +3,39 @@ ROLE = 'stage'
 MODEL_PARAMETER_RESULTS = 'inference_results/'
 TRAINING_DATA = 'src/research/dataset/train/'
 TESTING_DATA = 'src/research/dataset/test/'
-MODEL_DATA_SET = 'inference_results/inference/'
\ No newline at end of file
+MODEL_DATA_SET = 'inference_results/inference/'
+# Intermediate dataset format: 'csv', 'parquet' (needs pyarrow) or
+# 'npy' (one memory-mapped .npy file per column).
+STORAGE_FORMAT = 'csv'
+# Cores shared by the training stages (datasets, searches, trees).
+# None uses every core available to the process.
+N_CORES = None
+# Quantile bin edges: 'exact' (full sort) or 'sketch' (mergeable KLL
+# sketches, rank error within QUANTILE_SKETCH_ERROR of the rows).
+QUANTILE_ESTIMATOR = 'exact'
+QUANTILE_SKETCH_ERROR = 0.01
+# PCA variants (ds7-ds10): 'full' (exact SVD), 'randomized' (randomized
+# SVD) or 'incremental' (IncrementalPCA over chunks of PCA_BATCH_SIZE rows).
+PCA_SOLVER = 'full'
+PCA_BATCH_SIZE = 50_000
+# Snapshots of the engineered frames for EDA (src/eda), written in the
+# background by preprocessing when enabled: one per role, a uniform sample
+# of EDA_SNAPSHOT_ROWS rows (None keeps every row), 'npy' or 'parquet'.
+EDA_EXPORT = False
+EDA_SNAPSHOT_PATH = 'src/eda/snapshots/'
+EDA_SNAPSHOT_ROWS = 100_000
+EDA_SNAPSHOT_FORMAT = 'npy'
+# Logging of the entry points (run.py, serve.py): level and the log file
+# shared by every stage (None logs to the console only).
+LOG_LEVEL = 'INFO'
+LOG_FILE = 'pipeline.log'
+# Stage tracing (src/utils/tracing.py), also enabled without code changes
+# through the PIPELINE_TRACE / PIPELINE_PROFILE environment variables.
+# TRACE_PATH: None (off), a '.jsonl' file (one span per line) or a '.json'
+# Chrome trace (chrome://tracing, Perfetto). PROFILE_MODE: None, 'cprofile'
+# (.pstats) or 'sample' (collapsed stacks every PROFILE_INTERVAL seconds,
+# the format of flamegraph.pl, speedscope and py-spy --format raw).
+TRACE_PATH = None
+PROFILE_MODE = None
+PROFILE_PATH = 'profiles/'
+PROFILE_INTERVAL = 0.005
@@ -1,7 +1,10 @@
 import logging
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+import pandas as pd
 
 import src.preprocessing.pre_processing as pre_processing
+import src.preprocessing.streaming as streaming
 import src.modeling.modeling as modeling
 
 from config.staging import (
@@ -19,23 +22,18 @@ from config.research import (
     EDA_REPORT_PATH,
     EDA_FIGURES_PATH,
     EDA_DATASET_PATH,
-    MODELING_RESULTS
+    MODELING_RESULTS,
+    REGISTRY_MODEL
 )
 from src.research import data_split
-from src.utils.storage import path_validate
+from src.utils import tracing
+from src.utils.storage import path_validate, wait_for_exports
 
 
 # ------------------------------------------------------------------
 # Logging configuration (entry-point verbosity)
 # ------------------------------------------------------------------
 LOGGER = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.INFO,
-    format=(
-        "%(asctime)s | %(levelname)-8s | "
-        "%(name)s | %(message)s"
-    ),
-)
 
 
 # ------------------------------------------------------------------
@@ -64,6 +62,17 @@ def starter(run_split: bool = False) -> None:
 # Main execution
 # ------------------------------------------------------------------
 if __name__ == "__main__":
+    # Console + LOG_FILE; tracing / profiling from config.staging or the
+    # PIPELINE_TRACE / PIPELINE_PROFILE environment variables.
+    tracing.configure_logging()
+    tracing.start()
+
+    # Dataset variants share the engineered frame as shallow views
+    # (utils.datasets.SharedBaseDatasets); copy-on-write keeps them
+    # independent without copying. Default behaviour from pandas 3.
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
     LOGGER.info("=" * 80)
     LOGGER.info("PIPELINE STARTED")
     LOGGER.info("=" * 80)
@@ -71,11 +80,21 @@ if __name__ == "__main__":
     inference_mode: bool = False # False to train
     version: str = "v1"
     target_col: str = "target"
+    in_memory: bool = True # hand stage outputs over without re-reading CSVs
+    export_intermediates: bool = True # write stage outputs in the background
+    search_strategy: str = "grid" # grid | random | halving | bayesian
+    previous_version: str = None # reuse this version's rankings for appended rows
+    streaming_mode: bool = False # chunked preprocessing for data larger than memory
 
     LOGGER.info("Run configuration:")
     LOGGER.info("  inference_mode : %s", inference_mode)
     LOGGER.info("  version        : %s", version)
     LOGGER.info("  target column  : %s", target_col)
+    LOGGER.info("  in_memory      : %s", in_memory)
+    LOGGER.info("  export         : %s", export_intermediates)
+    LOGGER.info("  search         : %s", search_strategy)
+    LOGGER.info("  prev. version  : %s", previous_version)
+    LOGGER.info("  streaming      : %s", streaming_mode)
 
     # --------------------------------------------------------------
     # Validate required output paths
@@ -124,12 +143,21 @@ if __name__ == "__main__":
             version,
         )
 
-        pre_processing.preprocessing_inference_pipeline(
-            INFERENCE_DATA,
-            results_path,
-            version,
-            selected_ds,
-        )
+        if streaming_mode:
+            streaming.streaming_inference_pipeline(
+                INFERENCE_DATA,
+                results_path,
+                version,
+                selected_ds,
+            )
+            X_infer = None
+        else:
+            X_infer = pre_processing.preprocessing_inference_pipeline(
+                INFERENCE_DATA,
+                results_path,
+                version,
+                selected_ds,
+            )
 
         modeling.model_inference_pipeline(
             MODEL_DATA_SET,
@@ -137,6 +165,7 @@ if __name__ == "__main__":
             version,
             selected_ds,
             threshold,
+            X_infer=X_infer if in_memory else None,
         )
 
         LOGGER.info("Inference pipeline completed successfully.")
@@ -152,6 +181,7 @@ if __name__ == "__main__":
         starter(run_split=True) # true to split
 
         LOGGER.info("Starting preprocessing pipelines.")
+        processed: Dict[str, Dict] = {}
         for role, data_path in datasets:
             LOGGER.info(
                 "Preprocessing | role=%s | path=%s",
@@ -159,16 +189,33 @@ if __name__ == "__main__":
                 data_path,
             )
 
-            pre_processing.preprocessing_pipeline(
+            if streaming_mode:
+                streaming.streaming_preprocessing_pipeline(
+                    data_path,
+                    EDA_DATASET_PATH,
+                    version,
+                    target_col=target_col,
+                    role=role,
+                    previous_version=previous_version,
+                )
+                continue
+
+            processed[role] = pre_processing.preprocessing_pipeline(
                 data_path,
                 EDA_DATASET_PATH,
                 version,
                 target_col=target_col,
                 role=role,
+                export=export_intermediates or not in_memory,
+                async_export=in_memory,
+                previous_version=previous_version,
             )
 
         LOGGER.info("Preprocessing completed for all datasets.")
 
+        # Streamed datasets only exist on disk.
+        in_memory = in_memory and not streaming_mode
+
         LOGGER.info("Starting model training pipeline.")
         modeling.model_training_pipeline(
             training_data_path,
@@ -177,10 +224,16 @@ if __name__ == "__main__":
             best_model_path,
             version,
             target_col=target_col,
+            train_datasets=processed["train"] if in_memory else None,
+            test_datasets=processed["test"] if in_memory else None,
+            search_strategy=search_strategy,
+            registry_path=REGISTRY_MODEL,
         )
 
         LOGGER.info("Model training pipeline completed.")
 
+    wait_for_exports()
+
     LOGGER.info("=" * 80)
     LOGGER.info("PIPELINE FINISHED SUCCESSFULLY")
     LOGGER.info("=" * 80)
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from config.staging import MODEL_PARAMETER_RESULTS
+from config.research import INFERENCE_DATA, REGISTRY_MODEL
+from src.serving import scoring_service
+from src.utils import tracing
+
+tracing.configure_logging()
+tracing.start()
+
+# Inference variants are shallow views of one frame (see run.py).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+scoring_service.serve(
+    MODEL_PARAMETER_RESULTS,
+    version="v1",
+    selected_ds="ds4",
+    threshold=0.5,
+    host="127.0.0.1",
+    port=8080,
+    warm_up_data=INFERENCE_DATA,
+    registry_path=REGISTRY_MODEL,
+)
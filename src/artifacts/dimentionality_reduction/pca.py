@@ -1,37 +1,150 @@
-from sklearn.decomposition import PCA
+import logging
+
+import numpy as np
 import pandas as pd
+from sklearn.decomposition import PCA, IncrementalPCA
+
+logger = logging.getLogger(__name__)
+
+# Rows per chunk of the streamed passes (covariance estimate, IncrementalPCA).
+BATCH_SIZE = 50_000
+
+
+def _chunks(values, batch_size):
+    for start in range(0, len(values), batch_size):
+        yield values[start:start + batch_size]
+
+
+def impute_values(X):
+    """Per-column training medians, used to fill missing values before projecting."""
+    # One column at a time: the frame is never copied as a whole.
+    return np.array([np.nanmedian(X[col].to_numpy(dtype=float, na_value=np.nan)) for col in X.columns])
+
+
+def fill_missing(values, impute):
+    """Copy of `values` (2-d float array) with NaN replaced by the column's impute value."""
+    values = np.array(values, dtype=float)
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = np.take(impute, np.nonzero(missing)[1])
+    return values
 
-def pca_by_variance(X, variance_explain=0.80):
+
+def _filled_chunks(X, impute, batch_size):
+    """Dense float chunks of a frame with missing values imputed, one batch at a time."""
+    for start in range(0, len(X), batch_size):
+        yield fill_missing(X.iloc[start:start + batch_size].to_numpy(dtype=float, na_value=np.nan), impute)
+
+
+def streamed_explained_variance(values, batch_size=BATCH_SIZE):
+    """
+    Explained variance ratio of every principal component, from a covariance
+    matrix accumulated chunk by chunk (one pass, n_features^2 memory).
+
+    `values` is a 2-d array or an iterable of 2-d chunks. The sums are taken
+    around the first chunk's mean, so columns with a large mean relative to
+    their spread keep their precision (the same shift as eda_stats.FrameStats).
+    """
+    chunks = _chunks(values, batch_size) if isinstance(values, np.ndarray) else iter(values)
+    shift = None
+    n_rows = 0
+    for chunk in chunks:
+        if shift is None:
+            shift = chunk.mean(axis=0)
+            total = np.zeros(chunk.shape[1])
+            cross = np.zeros((chunk.shape[1], chunk.shape[1]))
+        chunk = chunk - shift
+        n_rows += len(chunk)
+        total += chunk.sum(axis=0)
+        cross += chunk.T @ chunk
+    mean = total / n_rows
+    covariance = (cross - n_rows * np.outer(mean, mean)) / max(n_rows - 1, 1)
+    eigenvalues = np.clip(np.linalg.eigvalsh(covariance)[::-1], 0, None)
+    return eigenvalues / eigenvalues.sum()
+
+
+def components_for_variance(ratios, variance_explain):
+    """Smallest number of components reaching `variance_explain` (sklearn's rule)."""
+    return int(np.searchsorted(np.cumsum(ratios), variance_explain, side="right") + 1)
+
+
+def pca_record(pca, sources, impute):
+    """Compact record of a fitted PCA (see compact_configs)."""
+    return {
+        "sources": [str(name) for name in sources],
+        "mean": np.asarray(pca.mean_, dtype=float),
+        "components": np.asarray(pca.components_, dtype=float),
+        "impute": np.asarray(impute, dtype=float),
+    }
+
+
+def pca_by_variance(X, variance_explain=0.80, solver="full", batch_size=BATCH_SIZE, random_state=42):
     """
     Reduce dimensionality while keeping `variance_explain` explained variance.
+
+    Args:
+        solver: 'full' (exact SVD of the whole frame), 'randomized'
+            (randomized SVD) or 'incremental' (IncrementalPCA fitted over
+            chunks of `batch_size` rows, approximate). The last two pick
+            the number of components from streamed_explained_variance.
+
+    Missing values are filled with the training medians, which are kept in
+    the config so that inference fills them the same way. The incremental
+    solver imputes, fits and projects one `batch_size` slice at a time, so
+    the dense matrix of the whole frame is never built.
     """
-    pca = PCA(n_components=variance_explain)
-    X_reduced = pca.fit_transform(X)
+    if solver not in ("full", "randomized", "incremental"):
+        raise ValueError(f"Unknown PCA solver: {solver}")
+    impute = impute_values(X)
 
-    # Create DataFrame with original index
-    component_names = [f"PC{i+1}" for i in range(pca.n_components_)]
-    X_reduced_df = pd.DataFrame(
-        X_reduced,
-        index=X.index,
-        columns=component_names
-    )
+    if solver == "full":
+        pca = PCA(n_components=variance_explain).fit(fill_missing(X.to_numpy(dtype=float), impute))
+    else:
+        n_components = components_for_variance(
+            streamed_explained_variance(_filled_chunks(X, impute, batch_size)), variance_explain
+        )
+        n_components = min(n_components, X.shape[1])
+        if solver == "randomized":
+            pca = PCA(n_components=n_components, svd_solver="randomized", random_state=random_state)
+            pca.fit(fill_missing(X.to_numpy(dtype=float), impute))
+        else:
+            pca = IncrementalPCA(n_components=n_components)
+            # Every batch must hold at least n_components rows.
+            for chunk in _filled_chunks(X, impute, max(batch_size, n_components)):
+                if len(chunk) >= n_components:
+                    pca.partial_fit(chunk)
 
+    logger.info(
+        "PCA (%s) kept %d components explaining %.3f of the variance",
+        solver, pca.n_components_, pca.explained_variance_ratio_.sum()
+    )
+    pca_config = pca_record(pca, X.columns, impute)
     return {
-        'X_reduced': X_reduced_df,
-        'pca_config': pca
+        'X_reduced': pca_transform(X, {"pca": pca_config}, batch_size=batch_size)['X_reduced'],
+        'pca_config': pca_config
     }
 
 
-def pca_transform(X, pca_config):
+def pca_transform(X, pca_config, batch_size=BATCH_SIZE):
     """
     Transform new data using a fitted PCA and return a DataFrame
     similar to pca_by_variance.
+
+    `pca_config["pca"]` is a PCA record ({"sources", "mean", "components",
+    "impute"} arrays) or a fitted PCA from a legacy config. Missing values
+    are imputed, so every input row is kept; records without "impute"
+    fill with the training mean. Rows are projected `batch_size` at a time.
     """
     pca = pca_config["pca"]
-    X_reduced = pca.transform(X)
+    if not isinstance(pca, dict):
+        pca = pca_record(pca, pca.feature_names_in_, pca.mean_)
+    impute = pca.get("impute", pca["mean"])
+    X_reduced = np.empty((len(X), len(pca["components"])))
+    for start, chunk in zip(range(0, len(X), batch_size), _filled_chunks(X[pca["sources"]], impute, batch_size)):
+        X_reduced[start:start + len(chunk)] = (chunk - pca["mean"]) @ pca["components"].T
 
     # Create DataFrame with original index and component names
-    component_names = [f"PC{i+1}" for i in range(pca.n_components_)]
+    component_names = [f"PC{i+1}" for i in range(X_reduced.shape[1])]
     X_reduced_df = pd.DataFrame(
         X_reduced,
         index=X.index,
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+
+# -------------------------------------------------
+# Vectorized kernels
+# -------------------------------------------------
+def _ratio(numerator, denominator):
+    """
+    Element-wise ratio with division-by-zero and missing values mapped to 0.
+    """
+    out = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    np.nan_to_num(out, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return out
+
+
+def _product(left, right):
+    """
+    Element-wise product keeping the natural result dtype of the inputs.
+    """
+    out = np.empty(len(left), dtype=np.result_type(left, right))
+    np.multiply(left, right, out=out)
+    return out
+
+
+def _flag(condition):
+    """
+    Integer (0/1) flag from a boolean mask.
+    """
+    return condition.astype(np.int64)
+
+
+# -------------------------------------------------
+# Feature registry
+# -------------------------------------------------
+# Each entry declares the columns it reads and how to compute it from the
+# arrays of those columns. Entries may read raw columns or other derived
+# features; the registry order is also the output column order.
+FEATURE_REGISTRY = {
+    # Efficiency per point scored.
+    "eff_per_point": {
+        "inputs": ("efficiency", "points"),
+        "compute": lambda c: _ratio(c["efficiency"], c["points"]),
+    },
+    # Efficiency per minute played.
+    "eff_per_min": {
+        "inputs": ("efficiency", "minutes_played"),
+        "compute": lambda c: _ratio(c["efficiency"], c["minutes_played"]),
+    },
+    # Scoring rate per minute played.
+    "points_per_min": {
+        "inputs": ("points", "minutes_played"),
+        "compute": lambda c: _ratio(c["points"], c["minutes_played"]),
+    },
+    # Scoring impact: efficiency multiplied by points scored.
+    "scoring_impact": {
+        "inputs": ("efficiency", "points"),
+        "compute": lambda c: _product(c["efficiency"], c["points"]),
+    },
+    # High-efficiency scorer: efficiency >= 20 and points >= 15.
+    "high_eff_scorer": {
+        "inputs": ("efficiency", "points"),
+        "compute": lambda c: _flag((c["efficiency"] >= 20) & (c["points"] >= 15)),
+    },
+    # Total contribution: efficiency multiplied by minutes played.
+    "eff_times_minutes": {
+        "inputs": ("efficiency", "minutes_played"),
+        "compute": lambda c: _product(c["efficiency"], c["minutes_played"]),
+    },
+    # High-intensity player: efficiency per minute > 0.8 and minutes played > 30.
+    "high_eff_min": {
+        "inputs": ("eff_per_min", "minutes_played"),
+        "compute": lambda c: _flag((c["eff_per_min"] > 0.8) & (c["minutes_played"] > 30)),
+    },
+    # Scoring volume: points multiplied by minutes played.
+    "scoring_volume": {
+        "inputs": ("points", "minutes_played"),
+        "compute": lambda c: _product(c["points"], c["minutes_played"]),
+    },
+    # High-usage scorer: points >= 20 and minutes played >= 30.
+    "high_usage_scorer": {
+        "inputs": ("points", "minutes_played"),
+        "compute": lambda c: _flag((c["points"] >= 20) & (c["minutes_played"] >= 30)),
+    },
+}
+
+
+def resolve_features(features=None):
+    """
+    Return the requested derived features plus everything they depend on,
+    in dependency (and registry) order.
+
+    Args:
+        features: iterable of feature names, or None for the whole registry.
+
+    Returns:
+        list of feature names safe to compute front to back.
+    """
+    if features is None:
+        return list(FEATURE_REGISTRY)
+
+    unknown = set(features) - set(FEATURE_REGISTRY)
+    if unknown:
+        raise KeyError(f"Unknown engineered features: {sorted(unknown)}")
+
+    required = set()
+    pending = list(features)
+    while pending:
+        name = pending.pop()
+        if name in required:
+            continue
+        required.add(name)
+        pending.extend(c for c in FEATURE_REGISTRY[name]["inputs"] if c in FEATURE_REGISTRY)
+
+    return [name for name in FEATURE_REGISTRY if name in required]
+
+
+def required_inputs(features=None):
+    """
+    Raw (non-derived) columns needed to compute the given derived features.
+    """
+    inputs = []
+    for name in resolve_features(features):
+        for col in FEATURE_REGISTRY[name]["inputs"]:
+            if col not in FEATURE_REGISTRY and col not in inputs:
+                inputs.append(col)
+    return inputs
+
+
+def create_features(df: pd.DataFrame, features=None) -> pd.DataFrame:
+    """
+    Compute derived features in a single pass.
+
+    Every feature is computed exactly once from NumPy views of its inputs
+    and the results are attached to the input columns in one concatenation,
+    so the source frame is never copied per feature.
+
+    Args:
+        df: frame with the raw box-score columns.
+        features: derived features to compute (dependencies are added
+            automatically). Defaults to the whole registry.
+
+    Returns:
+        pd.DataFrame with the original columns followed by the derived ones.
+    """
+    order = resolve_features(features)
+    columns = {}
+    derived = {}
+
+    for name in order:
+        spec = FEATURE_REGISTRY[name]
+        for col in spec["inputs"]:
+            if col not in columns:
+                columns[col] = derived[col] if col in derived else df[col].to_numpy()
+        derived[name] = spec["compute"](columns)
+
+    if features is not None:
+        requested = set(features)
+        derived = {name: derived[name] for name in order if name in requested}
+
+    # Recomputed features replace stale copies instead of duplicating them.
+    stale = [name for name in derived if name in df.columns]
+    if stale:
+        df = df.drop(columns=stale)
+
+    derived_df = pd.DataFrame(derived, index=df.index, copy=False)
+    return pd.concat([df, derived_df], axis=1)
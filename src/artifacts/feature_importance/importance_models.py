@@ -1,10 +1,35 @@
 import time
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 import logging
 
+from src.utils import parallelism
+
 logger = logging.getLogger(__name__)
 
-def train_random_forest(X, y,max_d=3, n_estimators=500, random_state=42):
+def is_sparse_frame(X):
+    """True for a DataFrame whose columns are all sparse (e.g. one-hot variants)."""
+    return isinstance(X, pd.DataFrame) and len(X.columns) > 0 and all(
+        isinstance(dtype, pd.SparseDtype) for dtype in X.dtypes
+    )
+
+
+def model_input(X, sparse_format="csr"):
+    """
+    Matrix handed to the ranking forest: sparse frames become a scipy sparse
+    matrix (float64, `sparse_format`) instead of being densified. Only
+    feature ranking sees sparse input; the experiment models are trained
+    on the dense top-feature frames of dataset_building.
+    """
+    if is_sparse_frame(X):
+        return X.sparse.to_coo().asformat(sparse_format).astype("float64")
+    return X
+
+
+def train_random_forest(X, y,max_d=3, n_estimators=500, random_state=42, n_jobs=None):
+    # Trees are the only parallel level here, so they get the whole budget.
+    if n_jobs is None:
+        n_jobs = parallelism.worker_count(n_estimators)
     logger.info(
         "Training RandomForest (%d estimators) on data with shape X=%s, y=%s",
         n_estimators, X.shape, y.shape
@@ -15,9 +40,11 @@ def train_random_forest(X, y,max_d=3, n_estimators=500, random_state=42):
     rf = RandomForestClassifier(
         n_estimators=n_estimators,
         max_depth=max_d,
-        random_state=random_state
+        random_state=random_state,
+        n_jobs=n_jobs
     )
-    rf.fit(X, y)
+    # Sparse frames are fitted as CSR; the trees match a dense fit.
+    rf.fit(model_input(X), y)
 
     elapsed = time.perf_counter() - start
     logger.info("RandomForest training completed in %.2f seconds", elapsed)
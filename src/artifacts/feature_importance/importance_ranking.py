@@ -1,9 +1,13 @@
+import copy
 import time
+import numpy as np
 import pandas as pd
-from sklearn.inspection import permutation_importance
+from joblib import Parallel, delayed
 
 import logging
 
+from src.artifacts.feature_importance.importance_models import is_sparse_frame
+
 logger = logging.getLogger(__name__)
 
 # --------------------------
@@ -21,21 +25,110 @@ def get_tree_importance(model, X):
     return importance.sort_values(ascending=False)
 
 
-def get_permutation_importance(model, X, y, n_repeats=10, random_state=42):
+def _accuracy(model, frame, y):
+    # Same metric as estimator.score, which sklearn's permutation_importance uses by default.
+    return np.mean(model.predict(frame) == y)
+
+
+def _permute_columns(model, base, columns, y, baseline, col_idx, seed, n_repeats, min_repeats, tol):
+    """
+    Permutation importance of a block of columns on one private buffer.
+
+    The buffer is column-major, so each column is permuted in place as one
+    contiguous slice and restored afterwards; the frame passed to the model
+    is a view of it and is never rebuilt. Every column replays the same
+    shuffle sequence from `seed`, like sklearn's permutation_importance, so
+    the scores match it exactly when all repeats run. With `columns=None`
+    the model gets the array itself (models fitted without feature names).
+    """
+    buffer = np.array(base, order="F")
+    frame = buffer if columns is None else pd.DataFrame(buffer, columns=columns, copy=False)
+
+    result = {}
+    for j in col_idx:
+        rng = np.random.RandomState(seed)
+        shuffling_idx = np.arange(buffer.shape[0])
+        column = buffer[:, j]
+        original = column.copy()
+        drops = []
+        for repeat in range(1, n_repeats + 1):
+            rng.shuffle(shuffling_idx)
+            column[:] = column[shuffling_idx]
+            drops.append(baseline - _accuracy(model, frame, y))
+            if tol is not None and repeat >= min_repeats:
+                half_width = 1.96 * np.std(drops, ddof=1) / np.sqrt(repeat)
+                if half_width <= tol:
+                    break
+        column[:] = original
+        result[j] = (float(np.mean(drops)), len(drops))
+    return result
+
+
+def get_permutation_importance(model, X, y, n_repeats=10, random_state=42,
+                               n_jobs=1, max_samples=None, tol=None, min_repeats=3):
+    """
+    Mean accuracy drop when each column is shuffled.
+
+    Args:
+        n_repeats: maximum shuffles per column.
+        n_jobs: threads; columns are split into one block per thread.
+        max_samples: evaluate on a random subsample of at most this many rows.
+        tol: stop repeating a column once the 95% confidence half-width of
+            its mean drop is below `tol` (after `min_repeats` shuffles).
+            None always runs `n_repeats`.
+
+    Sparse frames (see importance_models.model_input) are densified once
+    for the evaluation rows: tree predictions on a dense array equal those
+    on CSR and are several times faster, which outweighs the copy.
+    """
     logger.info(
-        "Computing permutation importance (n_repeats=%d)", n_repeats
+        "Computing permutation importance (n_repeats=%d, n_jobs=%d, max_samples=%s, tol=%s)",
+        n_repeats, n_jobs, max_samples, tol
     )
 
     start = time.perf_counter()
 
-    result = permutation_importance(
-        model, X, y,
-        n_repeats=n_repeats,
-        random_state=random_state
+    rng = np.random.RandomState(random_state)
+    y = np.asarray(y)
+    if max_samples is not None and len(X) > max_samples:
+        rows = np.sort(rng.choice(len(X), max_samples, replace=False))
+        X, y = X.iloc[rows], y[rows]
+
+    # Models fitted on a sparse frame saw a CSR matrix, without feature names.
+    sparse_input = is_sparse_frame(X)
+    if sparse_input:
+        X = X.sparse.to_dense()
+    base = X.to_numpy(dtype=np.float64)
+    columns = X.columns
+    model_columns = None if sparse_input else columns
+    seed = rng.randint(np.iinfo(np.int32).max + 1)
+
+    # The column blocks are the parallel level, so predictions stay single-threaded.
+    if n_jobs > 1 and "n_jobs" in model.get_params():
+        model = copy.copy(model)
+        model.n_jobs = 1
+
+    blocks = [b for b in np.array_split(np.arange(len(columns)), max(1, n_jobs)) if len(b)]
+    baseline = _accuracy(
+        model, base if model_columns is None else pd.DataFrame(base, columns=columns, copy=False), y
     )
+    tasks = (
+        delayed(_permute_columns)(
+            model, base, model_columns, y, baseline, block, seed, n_repeats, min_repeats, tol
+        )
+        for block in blocks
+    )
+    results = Parallel(n_jobs=n_jobs, prefer="threads")(tasks)
+
+    merged = {j: value for block_result in results for j, value in block_result.items()}
+    importances = np.array([merged[j][0] for j in range(len(columns))])
+    repeats = sum(merged[j][1] for j in range(len(columns)))
 
     elapsed = time.perf_counter() - start
-    logger.info("Permutation importance computed in %.2f seconds", elapsed)
+    logger.info(
+        "Permutation importance computed in %.2f seconds (%d of %d shuffles)",
+        elapsed, repeats, n_repeats * len(columns)
+    )
 
-    importance = pd.Series(result.importances_mean, index=X.columns)
+    importance = pd.Series(importances, index=columns)
     return importance.sort_values(ascending=False)
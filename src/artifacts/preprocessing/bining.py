@@ -5,6 +5,8 @@ import pandas as pd
 import numpy as np
 import json
 
+from src.artifacts.preprocessing import quantile_sketch
+
 def standard_binning(column_df, n_bins=5, labels=None):
     """
     Standard equal-width binning with persistence of bin edges.
@@ -66,3 +68,87 @@ def apply_back_binning(column_df, bin_config):
     # Use pd.cut with stored edges
     return pd.cut(column_df, bins=bin_edges, labels=labels, include_lowest=True), None
 
+
+
+def bin_codes(values, bin_edges):
+    """
+    Zero-based bin codes for `values` (-1 when missing or out of range).
+
+    Same assignment as pd.cut(..., right=True, include_lowest=True).
+    """
+    bin_edges = np.asarray(bin_edges, dtype=float)
+    ids = np.searchsorted(bin_edges, values, side="left")
+    ids[values == bin_edges[0]] = 1
+    codes = ids - 1
+    codes[(ids == 0) | (ids == len(bin_edges))] = -1
+    return codes
+
+
+def codes_to_categorical(codes, labels, index):
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=list(labels), ordered=True),
+        index=index,
+    )
+
+
+def binning_frame(frame, n_bins, binning_type="quantile", suffix=None,
+                  quantile_estimator="exact", sketch_error=0.01, n_shards=1, n_jobs=1):
+    """
+    Bin every column of `frame` in one pass.
+
+    Exact quantile edges are computed with one nanquantile call per group of
+    columns sharing the same number of bins; with quantile_estimator='sketch'
+    they come from per-column KLL sketches built over `n_shards` row shards
+    in parallel and merged. Every column is then assigned with a single
+    searchsorted.
+
+    Args:
+        frame: pd.DataFrame with the columns to bin
+        n_bins: dict {col: number of bins}
+        binning_type: 'standard' (equal width) or 'quantile'
+        suffix: output column suffix, defaults to f"_binning_{binning_type}"
+        quantile_estimator: 'exact' or 'sketch'
+        sketch_error: rank error bound of the sketch (fraction of rows)
+        n_shards, n_jobs: row shards sketched, and threads sketching them
+
+    Returns:
+        binned_df: pd.DataFrame of categorical bin labels (1..n_bins)
+        configs: list of {f"{col}_bin": bin_config}
+    """
+    suffix = suffix or f"_binning_{binning_type}"
+    values = frame.to_numpy(dtype=float)
+    columns = list(frame.columns)
+
+    edges = {}
+    if binning_type == "standard":
+        for i, col in enumerate(columns):
+            edges[col] = np.linspace(np.nanmin(values[:, i]), np.nanmax(values[:, i]), n_bins[col] + 1)
+    elif quantile_estimator == "sketch":
+        sketches = quantile_sketch.sketch_columns(values, sketch_error, n_shards, n_jobs)
+        for col, sketch in zip(columns, sketches):
+            edges[col] = quantile_sketch.quantile_edges(sketch, n_bins[col])
+    else:
+        groups = {}
+        for i, col in enumerate(columns):
+            groups.setdefault(n_bins[col], []).append(i)
+        for bins, idx in groups.items():
+            group_edges = np.nanquantile(values[:, idx], np.linspace(0, 1, bins + 1), axis=0)
+            for j, i in enumerate(idx):
+                # Same as pd.qcut(duplicates='drop')
+                edges[columns[i]] = np.unique(group_edges[:, j])
+
+    codes = np.empty(values.shape, dtype=np.int64)
+    binned = {}
+    configs = []
+    for i, col in enumerate(columns):
+        col_edges = edges[col]
+        labels = range(1, len(col_edges))
+        codes[:, i] = bin_codes(values[:, i], col_edges)
+        binned[f"{col}{suffix}"] = codes_to_categorical(codes[:, i], labels, frame.index)
+        configs.append({f"{col}_bin": {
+            "bin_edges": col_edges.tolist(),
+            "labels": labels,
+            "binning_type": binning_type
+        }})
+
+    return pd.DataFrame(binned, index=frame.index), configs
@@ -0,0 +1,234 @@
+import json
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.artifacts.dimentionality_reduction import pca
+from src.artifacts.preprocessing import bining, encoders, scalers
+from src.utils.storage import path_validate
+
+# Bump when the record layout changes; load_compact_configs refuses other versions.
+SCHEMA_VERSION = 1
+
+MANIFEST = "manifest.json"
+ARRAYS = "arrays.bin"
+
+
+# ------------------------------------------------------------------
+# Schema
+# ------------------------------------------------------------------
+# compact configs:
+#   {"schema_version": 1,
+#    "datasets": {ds: {"columns": {output column: record},
+#                      "one_hot": {col: {"categories", "dropped", "prefix"}} or None,
+#                      "pca": {"sources", "mean", "components", "impute"} or None}}}
+#
+# column records (one per encoded output column):
+#   {"op": "frequency", "source", "values": array, "freqs": float array}
+#       a codebook (see encoders.frequency_codebook)
+#   {"op": "scale", "source", "kind": "standard" | "minmax", "a": float, "b": float}
+#       standard: (x - a) / b, minmax: x * a + b
+#   {"op": "bin", "source", "edges": float array, "labels": array}
+def _merge_config_list(config_list):
+    merged = {}
+    for entry in config_list:
+        merged.update(entry)
+    return merged
+
+
+def column_records(cfg, variant_configs):
+    """
+    Column records of a base variant (ds1-ds4) from its fitted configs,
+    keyed by output column.
+    """
+    records = {}
+
+    if "frequency_encoding" in cfg:
+        configs = _merge_config_list(variant_configs["frequency_encoding"]["frequency_encoding"])
+        for col in cfg["frequency_encoding"]:
+            codebook = configs[f"{col}_freq"]
+            if "mapping" in codebook:
+                codebook = encoders.codebook_from_mapping(codebook["mapping"])
+            records[f"{col}_freq"] = {
+                "op": "frequency",
+                "source": col,
+                "values": codebook["vocabulary"],
+                "freqs": np.asarray(codebook["frequencies"], dtype=float),
+            }
+
+    for scale_type, cols in cfg.get("scaling", {}).items():
+        params = scalers.scaling_parameters(variant_configs[scale_type])
+        for col in cols:
+            kind, a, b = params[col]
+            records[f"{col}_{scale_type}"] = {"op": "scale", "source": col, "kind": kind, "a": a, "b": b}
+
+    for mode, cols in cfg.get("binning", {}).items():
+        configs = _merge_config_list(variant_configs[f"bin_{mode}"][mode])
+        for col, _ in cols:
+            bin_config = configs.get(f"{col}_bin")
+            if bin_config is None:
+                continue
+            edges = np.asarray(bin_config["bin_edges"], dtype=float)
+            labels = bin_config.get("labels") or range(1, len(edges))
+            records[f"{col}_binning_{mode}"] = {
+                "op": "bin",
+                "source": col,
+                "edges": edges,
+                "labels": np.asarray(list(labels)),
+            }
+
+    return records
+
+
+def _pca_record(pca_config):
+    # Fitted configs hold the record already; legacy configs a fitted PCA,
+    # whose missing values are filled with the training mean.
+    if isinstance(pca_config, dict):
+        return pca_config
+    return pca.pca_record(pca_config, pca_config.feature_names_in_, pca_config.mean_)
+
+
+def compact_processing_configs(processing_configs, ds_keys):
+    """
+    Compact configs of every variant in ds_keys from the configs fitted by
+    dataset_engineering (frequency dicts, sklearn scalers and PCA models).
+    """
+    datasets = {}
+    for ds, cfg in ds_keys.items():
+        variant_configs = processing_configs[ds]
+        datasets[ds] = {
+            "columns": column_records(cfg, variant_configs),
+            "one_hot": variant_configs.get("one_hot"),
+            "pca": _pca_record(variant_configs["pca"]) if "pca" in variant_configs else None,
+        }
+    return {"schema_version": SCHEMA_VERSION, "datasets": datasets}
+
+
+def is_compact(processing_configs):
+    return isinstance(processing_configs, dict) and "schema_version" in processing_configs
+
+
+def as_compact(processing_configs, ds_keys):
+    """Compact configs, converting fitted (or legacy pickled) configs when needed."""
+    if is_compact(processing_configs):
+        return processing_configs
+    return compact_processing_configs(processing_configs, ds_keys)
+
+
+# ------------------------------------------------------------------
+# Execution
+# ------------------------------------------------------------------
+def apply_record(series, record):
+    """Encode one column with its record."""
+    op = record["op"]
+    if op == "frequency":
+        return pd.Series(encoders.encode_codebook(series, record["values"], record["freqs"]), index=series.index)
+    if op == "scale":
+        values = series.to_numpy(dtype=float)
+        if record["kind"] == "standard":
+            scaled = (values - record["a"]) / record["b"]
+        else:
+            scaled = values * record["a"] + record["b"]
+        return pd.Series(scaled, index=series.index)
+    if op == "bin":
+        codes = bining.bin_codes(series.to_numpy(dtype=float), record["edges"])
+        return bining.codes_to_categorical(codes, record["labels"], series.index)
+    return series
+
+
+def apply_records(frame, records, outputs):
+    """Frame of the `outputs` columns, each encoded from its source in `frame`."""
+    return pd.DataFrame(
+        {name: apply_record(frame[records[name]["source"]], records[name]) for name in outputs},
+        index=frame.index,
+    )
+
+
+# ------------------------------------------------------------------
+# Storage
+# ------------------------------------------------------------------
+# Arrays are packed into one binary file at aligned offsets; the manifest
+# holds their dtype, shape and offset. Object arrays of mixed scalars (e.g.
+# the vocabulary [1, 'x']) are kept as JSON lists instead, so every value
+# reloads with its own type.
+_ALIGNMENT = 64
+
+
+def _to_manifest(obj, blob):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            items = [item.item() if isinstance(item, np.generic) else item for item in obj.tolist()]
+            if not all(isinstance(item, str) for item in items):
+                return {"__objects__": items}
+            obj = obj.astype(str)
+        obj = np.ascontiguousarray(obj)
+        offset = -len(blob) % _ALIGNMENT + len(blob)
+        blob.extend(bytes(offset - len(blob)))
+        blob.extend(obj.tobytes())
+        return {"__array__": {"dtype": obj.dtype.str, "shape": list(obj.shape), "offset": offset}}
+    if isinstance(obj, dict):
+        return {str(key): _to_manifest(value, blob) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, range)):
+        return [_to_manifest(value, blob) for value in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _from_manifest(obj, blob):
+    if isinstance(obj, dict):
+        if "__array__" in obj:
+            spec = obj["__array__"]
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            start = spec["offset"]
+            return blob[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+        if "__objects__" in obj:
+            values = np.empty(len(obj["__objects__"]), dtype=object)
+            values[:] = obj["__objects__"]
+            return values
+        return {key: _from_manifest(value, blob) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_from_manifest(value, blob) for value in obj]
+    return obj
+
+
+def save_compact_configs(compact, path):
+    """
+    Write compact configs to the directory `path`: a JSON manifest with the
+    records and one binary file holding every array (mapping tables, edges,
+    PCA matrices). Nothing is pickled, so the artifact does not depend on
+    library versions.
+    """
+    path_validate(path)
+    blob = bytearray()
+    manifest = _to_manifest(compact, blob)
+    with open(os.path.join(path, ARRAYS), "wb") as f:
+        f.write(blob)
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+
+
+def load_compact_configs(path, mmap_mode="r"):
+    """
+    Read compact configs saved by save_compact_configs. Arrays are read-only
+    views of the memory-mapped array file (no copy, no unpickling) unless
+    `mmap_mode` is None.
+    """
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported processing configs schema {manifest.get('schema_version')} "
+            f"(expected {SCHEMA_VERSION}) in {path}"
+        )
+
+    arrays_file = os.path.join(path, ARRAYS)
+    if mmap_mode is None or os.path.getsize(arrays_file) == 0:
+        blob = np.fromfile(arrays_file, dtype=np.uint8)
+    else:
+        with open(arrays_file, "rb") as f:
+            blob = np.frombuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), dtype=np.uint8)
+    return _from_manifest(manifest, blob)
@@ -1,34 +1,188 @@
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+# --------------------------
+# Frequency encoding (codebooks)
+# --------------------------
+# A codebook is a column's vocabulary (sorted when the values are orderable)
+# with a parallel frequency vector. Values are encoded through integer codes
+# (-1 for missing or unseen values) instead of per-value dict lookups.
+def _vocabulary_array(vocabulary):
+    """
+    Vocabulary as a plain numpy array, with a concrete dtype when every value
+    has the same type. Mixed vocabularies stay object arrays: numpy would
+    coerce e.g. [1, 'x'] to strings, and the integer 1 would then be unseen.
+    """
+    vocabulary = vocabulary.to_numpy() if isinstance(vocabulary, (pd.Index, pd.Series)) else np.asarray(vocabulary)
+    if vocabulary.dtype == object and len(vocabulary):
+        items = vocabulary.tolist()
+        kind = type(items[0])
+        if all(type(item) is kind for item in items):
+            inferred = np.array(items)
+            if inferred.dtype != object:
+                return inferred
+    return vocabulary
+
+
+def codebook_codes(values, vocabulary):
+    """
+    Position of every value in `vocabulary`, -1 when missing or unseen.
+
+    One vectorized hash-table probe per call (pandas Index.get_indexer)
+    instead of a Python dict lookup per value.
+    """
+    return pd.Index(_vocabulary_array(vocabulary)).get_indexer(values)
+
+
+def encode_codebook(values, vocabulary, frequencies, missing=0.0):
+    """Frequencies of `values`; missing and unseen values get `missing`."""
+    codes = codebook_codes(values, vocabulary)
+    return np.where(codes >= 0, np.asarray(frequencies)[codes], missing)
+
+
+def frequency_codebook(column_df):
+    """
+    Codebook of a column: {"vocabulary", "frequencies"} with frequencies as a
+    share of all rows (missing values count in the denominator only).
+
+    Returns:
+        codes: code of every row (-1 for missing values)
+        codebook: dict with the vocabulary and frequency arrays
+    """
+    try:
+        codes, vocabulary = pd.factorize(column_df, sort=True)
+    except TypeError:
+        # Mixed types are not orderable; keep the order of appearance.
+        codes, vocabulary = pd.factorize(column_df)
+    counts = np.bincount(codes[codes >= 0], minlength=len(vocabulary))
+    codebook = {
+        "vocabulary": _vocabulary_array(vocabulary),
+        "frequencies": counts / len(column_df),
+    }
+    return codes, codebook
+
+
+def codebook_from_mapping(mapping):
+    """Codebook of a legacy {value: frequency} mapping."""
+    vocabulary = pd.Index(list(mapping))
+    frequencies = np.fromiter(mapping.values(), dtype=float, count=len(mapping))
+    try:
+        order = vocabulary.argsort()
+    except TypeError:
+        order = np.arange(len(vocabulary))
+    return {"vocabulary": vocabulary.to_numpy()[order], "frequencies": frequencies[order]}
+
 
 def frequency_encoding(column_df):
     """
     Performs frequency encoding for a given column in a DataFrame.
     Returns only the new encoded column, not the original one.
+    Missing values stay missing.
     """
-    freq = column_df.value_counts() / len(column_df)
-    encoded = column_df.map(freq)
-    encoding_config = {
-        "mapping": freq.to_dict(),
-        "encoding_type": "frequency"
-    }
-    
+    codes, codebook = frequency_codebook(column_df)
+    encoded = pd.Series(
+        np.where(codes >= 0, codebook["frequencies"][codes], np.nan),
+        index=column_df.index,
+        name=column_df.name,
+    )
+    encoding_config = {**codebook, "encoding_type": "frequency"}
+
     return encoded, encoding_config
 
 def apply_back_frequency_encoding(column_df, encoding_config):
     """
     Applies a precomputed frequency encoding to a column using the provided encoding_config.
-    Unseen values will be encoded as 0.
+    Unseen values will be encoded as 0. Legacy configs with a "mapping"
+    dict are also accepted.
     """
-    mapping = encoding_config["mapping"]
-    
-    encoded = column_df.map(mapping).fillna(0)
-    
+    codebook = encoding_config
+    if "mapping" in encoding_config:
+        codebook = codebook_from_mapping(encoding_config["mapping"])
+
+    encoded = pd.Series(
+        encode_codebook(column_df, codebook["vocabulary"], codebook["frequencies"]),
+        index=column_df.index,
+        name=column_df.name,
+    )
+
     return encoded, None
 
+def category_strings(series):
+    """
+    String form of every value, missing values stay missing.
+
+    Categorical columns are converted through their categories, so the
+    strings do not depend on whether the rows hold missing values (pandas
+    formats integer categories as '3.0' next to a NaN otherwise).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.rename_categories(series.cat.categories.astype(str))
+    return series.astype(str)
+
+
+def _one_hot_columns(info):
+    return [cat for cat in info["categories"] if cat != info["dropped"]]
+
+
+def one_hot_sparse(df, one_hot_config=None, drop_first=True):
+    """
+    One-hot encode every column of `df` into a single CSR matrix.
+
+    Each column is converted to string codes once against its vocabulary
+    (its sorted categories, as pd.get_dummies orders them); missing and
+    unseen values give an all-zero row. The vocabularies are fitted when
+    `one_hot_config` is None and reused otherwise.
+
+    Returns:
+    - matrix: scipy.sparse.csr_matrix of bools, one column per kept category
+    - columns: f"{prefix}_{category}" name of every matrix column
+    - one_hot_config: dict {col: {"categories", "dropped", "prefix"}}
+    """
+    fit = one_hot_config is None
+    if fit:
+        one_hot_config = {}
+        source_cols = list(df.columns)
+    else:
+        source_cols = list(one_hot_config)
+
+    positions = np.arange(len(df))
+    rows, cols, columns = [], [], []
+    for col in source_cols:
+        values = category_strings(df[col])
+        if fit:
+            categories = sorted(values.dropna().unique().tolist())
+            one_hot_config[col] = {
+                "categories": categories,
+                "dropped": categories[0] if drop_first and categories else None,
+                "prefix": col
+            }
+        info = one_hot_config[col]
+        kept = _one_hot_columns(info)
+
+        codes = pd.Index(kept, dtype=object).get_indexer(values)
+        hit = codes >= 0
+        rows.append(positions[hit])
+        cols.append(codes[hit] + len(columns))
+        columns += [f"{info['prefix']}_{cat}" for cat in kept]
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=int)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=int)
+    matrix = sp.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols)), shape=(len(df), len(columns))
+    )
+    return matrix, columns, one_hot_config
+
+
+def one_hot_frame(matrix, columns, index):
+    """Sparse-backed DataFrame (Sparse[bool] columns) of a one_hot_sparse matrix."""
+    return pd.DataFrame.sparse.from_spmatrix(matrix, index=index, columns=columns)
+
+
 def one_hot_encoding(df, drop_first=True):
     """
     One-hot encode all columns in a DataFrame and return:
-      1. The encoded DataFrame
+      1. The encoded DataFrame (sparse columns, see one_hot_sparse)
       2. Metadata needed to decode back later (categories, dropped category, prefix)
     
     Parameters:
@@ -39,49 +193,30 @@ def one_hot_encoding(df, drop_first=True):
     - encoded_df: pd.DataFrame with one-hot columns
     - one_hot_config: dict with metadata for each column
     """
-    one_hot_config = {}
-    
-    encoded_df = pd.DataFrame(index=df.index)
-    
-    for col in df.columns:
-        # Get categories
-        categories = df[col].astype(str).unique().tolist()
-        dropped = categories[0] if drop_first else None
-        
-        # Save metadata
-        one_hot_config[col] = {
-            "categories": categories,
-            "dropped": dropped,
-            "prefix": col
-        }
-        
-        # Perform one-hot encoding for this column
-        col_encoded = pd.get_dummies(df[col].astype(str), prefix=col, drop_first=drop_first)
-        encoded_df = pd.concat([encoded_df, col_encoded], axis=1)
-    
-    return encoded_df, one_hot_config
+    matrix, columns, one_hot_config = one_hot_sparse(df, drop_first=drop_first)
+    return one_hot_frame(matrix, columns, df.index), one_hot_config
 
 
 def apply_back_one_hot_encoding(df, one_hot_config):
-    encoded_df = pd.DataFrame(index=df.index)
-    
-    for col, info in one_hot_config.items():
-        categories = info["categories"]
-        dropped = info["dropped"]
-        prefix = info["prefix"]
-        
-        # create all possible one-hot columns
-        col_encoded = pd.get_dummies(df[col].astype(str), prefix=prefix)
-        for cat in categories:
-            if cat == dropped:
-                continue
-            col_name = f"{prefix}_{cat}"
-            if col_name not in col_encoded:
-                # create missing columns as 0
-                col_encoded[col_name] = 0
-                
-        # ensure columns are in the same order as in training
-        final_cols = [f"{prefix}_{c}" for c in categories if c != dropped]
-        encoded_df = pd.concat([encoded_df, col_encoded[final_cols]], axis=1)
-    
-    return encoded_df
+    """
+    One-hot encode new data with the vocabularies of a fitted config; the
+    columns come out in training order.
+    """
+    matrix, columns, _ = one_hot_sparse(df, one_hot_config)
+    return one_hot_frame(matrix, columns, df.index)
+
+
+def frequency_encoding_frame(frame, suffix="_freq"):
+    """
+    Frequency-encode every column of `frame` and return one encoded block.
+
+    Returns:
+        encoded_df: pd.DataFrame with one f"{col}{suffix}" column per input column
+        configs: list of {f"{col}{suffix}": encoding_config}
+    """
+    encoded = {}
+    configs = []
+    for col in frame.columns:
+        encoded[f"{col}{suffix}"], encoding_config = frequency_encoding(frame[col])
+        configs.append({f"{col}{suffix}": encoding_config})
+    return pd.DataFrame(encoded, index=frame.index), configs
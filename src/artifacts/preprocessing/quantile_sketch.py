@@ -0,0 +1,145 @@
+import numpy as np
+from joblib import Parallel, delayed
+
+# Empirical worst-case rank error of this sketch is about 2.5 / k.
+_ERROR_CONSTANT = 2.5
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (KLL compactor hierarchy).
+
+    Values are buffered in level 0; a level holding more items than its
+    capacity is sorted and every other item (random offset) is promoted to
+    the next level with twice the weight. Capacities shrink geometrically
+    towards the lower levels, so memory stays O(k) while the rank error of
+    a quantile query is roughly O(1/k) of the stream length. The exact
+    minimum and maximum are tracked separately.
+    """
+
+    def __init__(self, k=200, seed=None):
+        """
+        Args:
+            k: size parameter; see k_for_error to derive it from an error bound.
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) < self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            # An odd item out stays behind so the promoted weight is exact.
+            keep, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level = 0
+
+    def update(self, values):
+        """Add an array of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch (e.g. from another shard) into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def weighted_items(self):
+        """Retained values, sorted, and the number of stream values each one stands for."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def rank(self, x, side="left"):
+        """Approximate number of values below `x` ('right': at or below)."""
+        values, weights = self.weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        return cumulative[np.searchsorted(values, x, side=side)]
+
+    def quantiles(self, qs):
+        """Approximate quantiles; 0 and 1 return the exact minimum and maximum."""
+        qs = np.asarray(qs, dtype=float)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+
+        values, weights = self.weighted_items()
+        cumulative = np.cumsum(weights)
+
+        idx = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        result = values[np.clip(idx, 0, len(values) - 1)]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+
+def k_for_error(epsilon):
+    """Sketch size whose rank error stays within `epsilon` (a fraction of n)."""
+    return int(np.ceil(_ERROR_CONSTANT / epsilon))
+
+
+def _sketch_shard(values, k, seed):
+    return [KLLSketch(k, seed=seed + j).update(values[:, j]) for j in range(values.shape[1])]
+
+
+def sketch_columns(values, epsilon=0.01, n_shards=1, n_jobs=1, seed=0):
+    """
+    One sketch per column of a 2D array.
+
+    Rows are split into `n_shards` shards that are sketched in parallel and
+    merged, the same way sketches from separate machines or days combine.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    k = k_for_error(epsilon)
+    shards = [s for s in np.array_split(values, max(1, n_shards)) if len(s)] or [values]
+
+    sketched = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_sketch_shard)(shard, k, seed + i * values.shape[1]) for i, shard in enumerate(shards)
+    )
+    merged = sketched[0]
+    for shard_sketches in sketched[1:]:
+        for sketch, other in zip(merged, shard_sketches):
+            sketch.merge(other)
+    return merged
+
+
+def quantile_edges(sketch, n_bins):
+    """
+    Bin edges for `n_bins` equal-frequency bins; duplicates are dropped like
+    pd.qcut(duplicates='drop').
+    """
+    return np.unique(sketch.quantiles(np.linspace(0, 1, n_bins + 1)))
+
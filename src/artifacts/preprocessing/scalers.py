@@ -16,4 +16,41 @@ def standardization(column_df):
 def apply_scaling_back(column_df, fitted_scalers):
     scaler = fitted_scalers
     original_data = scaler.inverse_transform(column_df.values.reshape(-1, 1))
-    return pd.Series(original_data.flatten(), index=column_df.index)
\ No newline at end of file
+    return pd.Series(original_data.flatten(), index=column_df.index)
+
+SCALERS = {"standard": StandardScaler, "minmax": MinMaxScaler}
+
+# Multi-column scaling (one scaler for all columns)
+def fit_scaling(frame, scale_type):
+    """
+    Fit a single scaler over every column of `frame`.
+
+    Returns:
+        scaled_data: 2D array, one column per input column
+        scaling_config: dict with the column order and the fitted scaler
+    """
+    scaler = SCALERS[scale_type]()
+    scaled_data = scaler.fit_transform(frame.to_numpy(dtype=float))
+    scaling_config = {"columns": list(frame.columns), "scaler": scaler}
+    return scaled_data, scaling_config
+
+def scaling_parameters(scaling_config):
+    """
+    Per-column scaling parameters as plain arrays.
+
+    Returns:
+        dict {col: (kind, a, b)} where kind 'standard' means (x - a) / b and
+        kind 'minmax' means x * a + b.
+    """
+    if isinstance(scaling_config, dict):
+        fitted = [(col, scaling_config["scaler"], i) for i, col in enumerate(scaling_config["columns"])]
+    else:
+        fitted = [(key[:-len("_scaler")], scaler, 0) for entry in scaling_config for key, scaler in entry.items()]
+
+    params = {}
+    for col, scaler, i in fitted:
+        if isinstance(scaler, StandardScaler):
+            params[col] = ("standard", float(scaler.mean_[i]), float(scaler.scale_[i]))
+        else:
+            params[col] = ("minmax", float(scaler.scale_[i]), float(scaler.min_[i]))
+    return params
@@ -4,39 +4,60 @@ from src.utils.storage import (
     save_pickle,
     load_pickle
 )
+from src.utils import eda_sink
 from src.research import (
     eda,
+    eda_stats,
     plot_distributions,
     correlation,
     plot_importance
 )
 
+# Pickled snapshots of runs before the EDA sink (see eda_sink.EDASink).
+EDA_FEATURES = 'src/eda/eda_feature_engineered.pkl'
+EDA_DATASETS = 'src/eda/eda_ds_dictionary.pkl'
+EDA_STATS = 'src/eda/eda_stats.json'
 
-def analyze():
+
+def analyze(role='train'):
     # ------------------------------------------------------------------
     # Data ingestion
     # ------------------------------------------------------------------
     version = 'v1'
     all_rankings_file = f'training_parameter_results/{version}/all_rankings.pkl'
     all_rankings = load_pickle(all_rankings_file)
-    ds = load_pickle('src/eda/eda_ds_dictionary.pkl')
-    feta_dict = load_pickle('src/eda/eda_feature_engineered.pkl')
 
-    # ------------------------------------------------------------------
-    # feature engineered
-    # ------------------------------------------------------------------
-    df = feta_dict["features"].copy()
-    df["player_id"] = feta_dict["player_id"]
-    df["target"] = feta_dict["target"]
-    plot_distributions.generate_plots(df,'src/eda/figures/distributions/')
+    snapshot = eda_sink.load_eda_snapshot(role)
+    if snapshot is not None:
+        df, ds, manifest_path = snapshot
+        stats_path = f"{eda_sink.snapshot_dir(role)}stats.json"
+        sources = (manifest_path,)
+    else:
+        ds = load_pickle(EDA_DATASETS)
+        feta_dict = load_pickle(EDA_FEATURES)
+
+        # ------------------------------------------------------------------
+        # feature engineered
+        # ------------------------------------------------------------------
+        df = feta_dict["features"].copy()
+        df["player_id"] = feta_dict["player_id"]
+        df["target"] = feta_dict["target"]
+        stats_path = EDA_STATS
+        sources = (EDA_FEATURES, EDA_DATASETS)
+
+    # One pass over every frame; tables and figures read the stored results.
+    stats = eda_stats.load_or_compute_stats_store(
+        stats_path, lambda: {"features": df, **ds}, sources=sources
+    )["frames"]
+
+    plot_distributions.generate_plots(df,'src/eda/figures/distributions/', stats=stats["features"])
 
-    eda.pandas_summary(df, 'src/eda/tables/eda_engineered_ds.csv')
-    correlation.continuous_features_correlation_analysis(ds,'src/eda/figures/')
+    eda.pandas_summary(df, 'src/eda/tables/eda_engineered_ds.csv', stats=stats["features"])
+    correlation.continuous_features_correlation_analysis(ds,'src/eda/figures/', stats=stats)
 
     # ------------------------------------------------------------------
     # all rankins
     # ------------------------------------------------------------------
-    print('--__--__'*50)
     for dataset_name, dataset in all_rankings.items():
         plot_importance.plot_feature_importance(
             dataset, 
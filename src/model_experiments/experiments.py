@@ -1,36 +1,31 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import pandas as pd
+from sklearn.base import clone
 from sklearn.ensemble import (
     GradientBoostingClassifier,
     RandomForestClassifier,
 )
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import roc_auc_score
-from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
 from sklearn.pipeline import Pipeline
 from sklearn.tree import DecisionTreeClassifier
 
+from src.model_experiments import fit_cache
+from src.model_experiments.search_strategies import build_search
+from src.utils import parallelism, tracing
 
-# ---------------------------------------------------
-# Logging configuration
-# ---------------------------------------------------
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------
 # Model configuration (ROC-AUC only)
 # ---------------------------------------------------
+# "resource" marks the parameter that successive halving grows with
+# warm_start (from "min" up to the largest value in the grid).
 MODEL_TRAINING_CONFIGS: Dict[str, Dict[str, Any]] = {
     "decision_tree": {
         "model": DecisionTreeClassifier(),
@@ -43,7 +38,6 @@ MODEL_TRAINING_CONFIGS: Dict[str, Dict[str, Any]] = {
     "random_forest": {
         "model": RandomForestClassifier(
             random_state=42,
-            n_jobs=-1,
         ),
         "params": {
             "model__n_estimators": [100, 200],
@@ -51,6 +45,7 @@ MODEL_TRAINING_CONFIGS: Dict[str, Dict[str, Any]] = {
             "model__min_samples_split": [2, 5],
             "model__min_samples_leaf": [1, 2],
         },
+        "resource": {"param": "model__n_estimators", "min": 25},
     },
     "gradient_boosting": {
         "model": GradientBoostingClassifier(random_state=42),
@@ -59,9 +54,24 @@ MODEL_TRAINING_CONFIGS: Dict[str, Dict[str, Any]] = {
             "model__learning_rate": [0.05, 0.1],
             "model__max_depth": [3, 5],
         },
+        "resource": {"param": "model__n_estimators", "min": 25},
     },
 }
 
+CV_SPLITS = 10
+
+
+def training_workload():
+    """
+    Largest search (candidates x CV folds) and ensemble size in
+    MODEL_TRAINING_CONFIGS, used to size the parallelism budget.
+    """
+    n_fits = max(len(ParameterGrid(c["params"])) for c in MODEL_TRAINING_CONFIGS.values()) * CV_SPLITS
+    n_trees = max(
+        max(c["params"].get("model__n_estimators", [1])) for c in MODEL_TRAINING_CONFIGS.values()
+    )
+    return n_fits, n_trees
+
 
 def experiment_results(
     X_train,
@@ -69,15 +79,33 @@ def experiment_results(
     X_test,
     y_test,
     version: str,
+    search_strategy: str = "grid",
+    search_budget: Optional[int] = None,
+    budget: Optional[Dict[str, int]] = None,
+    cache_dir: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Train models using ROC-AUC optimization and compare results."""
-    logger.info("Starting experiment version: %s", version)
+    """
+    Train models using ROC-AUC optimization and compare results.
+
+    `search_strategy` selects the hyperparameter search ('grid', 'random',
+    'halving' or 'bayesian'); `search_budget` caps the candidates evaluated
+    by 'random' and 'bayesian'. `budget` (parallelism.training_budget)
+    sets the search and per-model workers; by default this call gets every
+    core. With `cache_dir`, search results are cached by content
+    (fit_cache.fit_key) and a hit skips the search.
+    """
+    logger.info(
+        "Starting experiment version: %s | search=%s", version, search_strategy
+    )
 
     # ---------------------------------------------------
     # CV setup
     # ---------------------------------------------------
+    if budget is None:
+        budget = parallelism.training_budget(1, *training_workload())
+
     cv = StratifiedKFold(
-        n_splits=10,
+        n_splits=CV_SPLITS,
         shuffle=True,
         random_state=42,
     )
@@ -98,36 +126,54 @@ def experiment_results(
         pipeline = Pipeline(
             steps=[
                 ("imputer", SimpleImputer(strategy="median")),
-                ("model", config["model"]),
+                ("model", clone(config["model"])),
             ]
         )
+        if "n_jobs" in pipeline.named_steps["model"].get_params():
+            pipeline.set_params(model__n_jobs=budget["model"])
 
-        grid_search = GridSearchCV(
-            estimator=pipeline,
-            param_grid=config["params"],
-            scoring="roc_auc",
-            cv=cv,
-            n_jobs=-1,
-            verbose=0,
+        cache_key = fit_cache.fit_key(
+            X_train, y_train, pipeline, config, cv, search_strategy, search_budget
         )
+        search_result = fit_cache.load(cache_dir, cache_key)
+        if search_result is not None:
+            logger.info("Fit cache hit for model: %s (%s)", model_name, cache_key[:12])
+        else:
+            grid_search = build_search(
+                search_strategy,
+                pipeline,
+                config,
+                cv,
+                n_jobs=budget["search"],
+                budget=search_budget,
+            )
+
+            with tracing.span("experiments.search", level=logging.INFO, model=model_name,
+                              strategy=search_strategy, version=version) as span:
+                grid_search.fit(span.input(X_train), y_train)
 
-        grid_search.fit(X_train, y_train)
+            search_result = {
+                "best_estimator": grid_search.best_estimator_,
+                "best_score": grid_search.best_score_,
+                "best_params": grid_search.best_params_,
+            }
+            fit_cache.save(cache_dir, cache_key, search_result)
 
-        best_model = grid_search.best_estimator_
+        best_model = search_result["best_estimator"]
 
         y_test_proba = best_model.predict_proba(X_test)[:, 1]
         test_roc_auc = roc_auc_score(y_test, y_test_proba)
 
         roc_results[model_name] = {
-            "cv_best_roc_auc": grid_search.best_score_,
+            "cv_best_roc_auc": search_result["best_score"],
             "test_roc_auc": test_roc_auc,
-            "best_params": grid_search.best_params_,
+            "best_params": search_result["best_params"],
         }
 
         logger.info(
             "Model: %s | CV ROC-AUC: %.4f | Test ROC-AUC: %.4f",
             model_name,
-            grid_search.best_score_,
+            search_result["best_score"],
             test_roc_auc,
         )
 
@@ -137,8 +183,8 @@ def experiment_results(
                     "model_name": model_name,
                     "estimator": best_model,
                     "test_roc_auc": test_roc_auc,
-                    "cv_best_roc_auc": grid_search.best_score_,
-                    "best_params": grid_search.best_params_,
+                    "cv_best_roc_auc": search_result["best_score"],
+                    "best_params": search_result["best_params"],
                     "y_test_proba": (y_test, y_test_proba),
                 }
             )
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.utils.storage import path_validate
+
+logger = logging.getLogger(__name__)
+
+# Parameters that change how fast a fit runs, not what it learns.
+_RUNTIME_PARAMS = ("n_jobs", "verbose")
+# Total size of a cache directory; the least recently used entries are
+# pruned past it after every write.
+MAX_CACHE_BYTES = 2 * 2 ** 30
+
+
+def _hash_frame(hasher, data):
+    hasher.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    if isinstance(data, pd.DataFrame):
+        hasher.update(json.dumps([[str(c), str(t)] for c, t in data.dtypes.items()]).encode())
+    else:
+        hasher.update(json.dumps([str(data.name), str(data.dtype)]).encode())
+
+
+def fit_key(X, y, pipeline, config, cv, search_strategy, search_budget=None):
+    """
+    Content address of one hyperparameter search.
+
+    Two searches share a key only when they would produce the same result:
+    same X/y content (values, index, column names and dtypes), pipeline
+    steps and parameters, search space and strategy, CV splitter
+    (including its seed) and library versions. Runtime-only parameters (n_jobs, verbose)
+    are ignored so changing the parallelism budget keeps the cache valid.
+    """
+    hasher = hashlib.sha256()
+    _hash_frame(hasher, X)
+    _hash_frame(hasher, y)
+
+    step_params = {
+        k: v for k, v in pipeline.get_params(deep=True).items()
+        if "__" in k and k.rsplit("__", 1)[1] not in _RUNTIME_PARAMS
+    }
+    spec = {
+        "steps": [(name, type(step).__name__) for name, step in pipeline.steps],
+        "step_params": step_params,
+        "search_params": config["params"],
+        "resource": config.get("resource"),
+        "cv": repr(cv),
+        "search_strategy": search_strategy,
+        "search_budget": search_budget,
+        "versions": [sklearn.__version__, np.__version__, pd.__version__],
+    }
+    hasher.update(json.dumps(spec, sort_keys=True, default=repr).encode())
+    return hasher.hexdigest()
+
+
+def load(cache_dir, key):
+    """Cached search result for `key`, or None. A hit marks the entry as recently used."""
+    if cache_dir is None:
+        return None
+    path = os.path.join(cache_dir, f"{key}.pkl")
+    try:
+        with open(path, "rb") as f:
+            search_result = pickle.load(f)
+    except FileNotFoundError:
+        # Missing, or pruned by another process in the meantime.
+        return None
+    os.utime(path)
+    return search_result
+
+
+def save(cache_dir, key, search_result, max_bytes=MAX_CACHE_BYTES):
+    """
+    Store a search result. The file is written under a temporary name and
+    renamed, so concurrent writers of the same key never leave a partial file.
+    The directory is then pruned to `max_bytes` (see prune).
+    """
+    if cache_dir is None:
+        return
+    path_validate(cache_dir)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(search_result, f)
+    os.replace(tmp_path, os.path.join(cache_dir, f"{key}.pkl"))
+    logger.debug("Cached search result %s", key)
+    prune(cache_dir, max_bytes, keep=key)
+
+
+def prune(cache_dir, max_bytes=MAX_CACHE_BYTES, keep=None):
+    """
+    Delete the least recently used entries (oldest modification time; hits
+    refresh it) until the directory holds at most `max_bytes`. The `keep`
+    entry is never deleted. max_bytes=0 clears the cache.
+
+    Returns:
+        number of entries deleted.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".pkl") or name == f"{keep}.pkl":
+            continue
+        try:
+            stat = os.stat(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    if keep is not None and os.path.exists(os.path.join(cache_dir, f"{keep}.pkl")):
+        total += os.path.getsize(os.path.join(cache_dir, f"{keep}.pkl"))
+
+    deleted = 0
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    if deleted:
+        logger.info("Pruned %d fit cache entries from %s", deleted, cache_dir)
+    return deleted
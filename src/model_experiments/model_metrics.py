@@ -1,3 +1,5 @@
+import logging
+
 from src.utils.storage import load_pickle, path_validate
 import numpy as np
 import matplotlib.pyplot as plt
@@ -7,14 +9,16 @@ from sklearn.metrics import (
     precision_recall_curve, average_precision_score,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def model_keys():
     experiment_results = load_pickle('src/modeling/v1/model_experiment_results.pkl')
     output_path ='training_parameter_results/v1/metric_figures/'
     dataset_name = 'ds4'
 
-    print(experiment_results[dataset_name].keys())
-    print(experiment_results[dataset_name]['all_model_results'])
+    logger.info("Experiment result keys of %s: %s", dataset_name, list(experiment_results[dataset_name].keys()))
+    logger.info("All model results of %s: %s", dataset_name, experiment_results[dataset_name]['all_model_results'])
 
 
 
@@ -50,10 +54,10 @@ def test_metrics():
         "ROC-AUC": roc_auc_score(y_test, y_test_proba),
     }
 
-    # Print metrics
-    print("Classification Metrics:")
+    # Log metrics
+    logger.info("Classification Metrics:")
     for k, v in metrics.items():
-        print(f"{k}: {v:.4f}")
+        logger.info("%s: %.4f", k, v)
 
     # Confusion matrix
     cm = confusion_matrix(y_test, y_pred)
@@ -0,0 +1,291 @@
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    ParameterGrid,
+    RandomizedSearchCV,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SEARCH_STRATEGIES = ("grid", "random", "halving", "bayesian")
+
+
+# ---------------------------------------------------
+# Shared helpers
+# ---------------------------------------------------
+def _fit_and_score(estimator, X, y, train_idx, test_idx):
+    """Fit on one CV fold and return (fitted estimator, ROC-AUC)."""
+    estimator.fit(X.iloc[train_idx], y.iloc[train_idx])
+    proba = estimator.predict_proba(X.iloc[test_idx])[:, 1]
+    return estimator, roc_auc_score(y.iloc[test_idx], proba)
+
+
+class _CandidateSearch:
+    """
+    Base class for the custom searches: exposes the same attributes as
+    sklearn's *SearchCV (best_params_, best_score_, best_estimator_,
+    cv_results_).
+    """
+
+    def __init__(self, estimator, param_grid, cv, n_jobs=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.cv_results_: Dict[str, List[Any]] = {
+            "params": [], "mean_test_score": [], "resource": [],
+        }
+
+    def _record(self, params, score, resource=None):
+        self.cv_results_["params"].append(params)
+        self.cv_results_["mean_test_score"].append(score)
+        self.cv_results_["resource"].append(resource)
+
+    def _refit(self, X, y, params):
+        self.best_estimator_ = clone(self.estimator).set_params(**params)
+        self.best_estimator_.fit(X, y)
+        return self
+
+
+# ---------------------------------------------------
+# Successive halving with warm-started ensembles
+# ---------------------------------------------------
+class WarmStartHalvingSearch(_CandidateSearch):
+    """
+    Successive halving over a grid where the budget is the ensemble size.
+
+    Every candidate starts with `min_resources` estimators on each CV fold.
+    After each rung only the best 1/factor candidates survive, and their
+    fitted fold models grow with warm_start up to the next budget instead
+    of being refit from scratch. The reported ensemble size is the rung at
+    which the winner scored best, so growth that stops helping is not kept.
+    """
+
+    def __init__(self, estimator, param_grid, cv, resource, min_resources,
+                 max_resources, factor=3, n_jobs=None):
+        super().__init__(estimator, param_grid, cv, n_jobs)
+        self.resource = resource
+        self.min_resources = min_resources
+        self.max_resources = max_resources
+        self.factor = factor
+
+    def fit(self, X, y):
+        folds = list(self.cv.split(X, y))
+        warm_start = self.resource.rsplit("__", 1)[0] + "__warm_start"
+
+        candidates = [
+            {"params": params, "models": [
+                clone(self.estimator).set_params(**params, **{warm_start: True})
+                for _ in folds
+            ]}
+            for params in ParameterGrid(self.param_grid)
+        ]
+
+        resources = self.min_resources
+        parallel = Parallel(n_jobs=self.n_jobs, prefer="threads")
+        while True:
+            jobs = [
+                delayed(_fit_and_score)(
+                    model.set_params(**{self.resource: resources}),
+                    X, y, train_idx, test_idx,
+                )
+                for candidate in candidates
+                for model, (train_idx, test_idx) in zip(candidate["models"], folds)
+            ]
+            results = parallel(jobs)
+
+            for i, candidate in enumerate(candidates):
+                fold_results = results[i * len(folds):(i + 1) * len(folds)]
+                candidate["models"] = [model for model, _ in fold_results]
+                candidate["score"] = float(np.mean([score for _, score in fold_results]))
+                candidate.setdefault("history", {})[resources] = candidate["score"]
+                self._record(candidate["params"], candidate["score"], resources)
+
+            logger.info(
+                "Halving rung | %s=%d | candidates=%d | best ROC-AUC=%.4f",
+                self.resource, resources, len(candidates),
+                max(c["score"] for c in candidates),
+            )
+
+            if resources >= self.max_resources:
+                break
+
+            candidates.sort(key=lambda c: c["score"], reverse=True)
+            candidates = candidates[:max(1, math.ceil(len(candidates) / self.factor))]
+            resources = min(resources * self.factor, self.max_resources)
+
+        best = max(candidates, key=lambda c: c["score"])
+        best_resources = max(best["history"], key=best["history"].get)
+        self.best_params_ = {**best["params"], self.resource: best_resources}
+        self.best_score_ = best["history"][best_resources]
+        return self._refit(X, y, self.best_params_)
+
+
+# ---------------------------------------------------
+# Bayesian-style search over the grid
+# ---------------------------------------------------
+class BayesianGridSearch(_CandidateSearch):
+    """
+    Sequential model-based search over the discrete grid.
+
+    A Gaussian process fitted on the scores seen so far (parameters encoded
+    by their position in the grid) proposes the candidate with the highest
+    upper confidence bound, until `n_iter` candidates have been evaluated.
+    """
+
+    def __init__(self, estimator, param_grid, cv, n_iter=10, n_initial=4,
+                 kappa=1.96, random_state=42, n_jobs=None):
+        super().__init__(estimator, param_grid, cv, n_jobs)
+        self.n_iter = n_iter
+        self.n_initial = n_initial
+        self.kappa = kappa
+        self.random_state = random_state
+
+    def _encode(self, params):
+        return [
+            self.param_grid[name].index(params[name]) / max(1, len(self.param_grid[name]) - 1)
+            for name in sorted(self.param_grid)
+        ]
+
+    def _evaluate(self, params, X, y, folds):
+        estimator = clone(self.estimator).set_params(**params)
+        results = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(_fit_and_score)(clone(estimator), X, y, train_idx, test_idx)
+            for train_idx, test_idx in folds
+        )
+        score = float(np.mean([score for _, score in results]))
+        self._record(params, score)
+        return score
+
+    def fit(self, X, y):
+        folds = list(self.cv.split(X, y))
+        grid = list(ParameterGrid(self.param_grid))
+        encoded = np.array([self._encode(params) for params in grid])
+        rng = np.random.RandomState(self.random_state)
+        n_iter = min(self.n_iter, len(grid))
+
+        order = rng.permutation(len(grid))
+        evaluated = {int(i): self._evaluate(grid[i], X, y, folds) for i in order[:min(self.n_initial, n_iter)]}
+
+        while len(evaluated) < n_iter:
+            seen = np.array(list(evaluated))
+            gp = GaussianProcessRegressor(
+                kernel=Matern(nu=2.5) + WhiteKernel(1e-4),
+                normalize_y=True,
+                random_state=self.random_state,
+            )
+            gp.fit(encoded[seen], np.array([evaluated[i] for i in seen]))
+
+            remaining = np.array([i for i in range(len(grid)) if i not in evaluated])
+            mean, std = gp.predict(encoded[remaining], return_std=True)
+            proposal = int(remaining[np.argmax(mean + self.kappa * std)])
+            evaluated[proposal] = self._evaluate(grid[proposal], X, y, folds)
+
+        best = max(evaluated, key=evaluated.get)
+        self.best_params_ = grid[best]
+        self.best_score_ = evaluated[best]
+        logger.info(
+            "Bayesian search | evaluated=%d/%d | best ROC-AUC=%.4f",
+            len(evaluated), len(grid), self.best_score_,
+        )
+        return self._refit(X, y, self.best_params_)
+
+
+# ---------------------------------------------------
+# Factory
+# ---------------------------------------------------
+def build_search(
+    strategy: str,
+    pipeline,
+    config: Dict[str, Any],
+    cv,
+    n_jobs: Optional[int] = -1,
+    budget: Optional[int] = None,
+    random_state: int = 42,
+):
+    """
+    Hyperparameter search for one MODEL_TRAINING_CONFIGS entry.
+
+    Args:
+        strategy: 'grid' (exhaustive), 'random' (`budget` sampled candidates),
+            'halving' (successive halving; warm-started ensemble growth when
+            the config declares a `resource`), or 'bayesian' (GP-guided,
+            `budget` candidates).
+        budget: number of candidates for 'random' / 'bayesian'
+            (defaults to 10).
+    """
+    params = config["params"]
+    budget = budget or 10
+
+    if strategy == "grid":
+        return GridSearchCV(
+            estimator=pipeline,
+            param_grid=params,
+            scoring="roc_auc",
+            cv=cv,
+            n_jobs=n_jobs,
+            verbose=0,
+        )
+
+    if strategy == "random":
+        return RandomizedSearchCV(
+            estimator=pipeline,
+            param_distributions=params,
+            n_iter=min(budget, len(ParameterGrid(params))),
+            scoring="roc_auc",
+            cv=cv,
+            n_jobs=n_jobs,
+            random_state=random_state,
+            verbose=0,
+        )
+
+    if strategy == "halving":
+        resource = config.get("resource")
+        if resource is not None:
+            grid = {k: v for k, v in params.items() if k != resource["param"]}
+            return WarmStartHalvingSearch(
+                pipeline,
+                grid,
+                cv,
+                resource=resource["param"],
+                min_resources=resource["min"],
+                max_resources=max(params.get(resource["param"], [resource["min"]])),
+                factor=resource.get("factor", 3),
+                n_jobs=n_jobs,
+            )
+        return HalvingGridSearchCV(
+            estimator=pipeline,
+            param_grid=params,
+            scoring="roc_auc",
+            cv=cv,
+            factor=3,
+            n_jobs=n_jobs,
+            random_state=random_state,
+            verbose=0,
+        )
+
+    if strategy == "bayesian":
+        return BayesianGridSearch(
+            pipeline,
+            params,
+            cv,
+            n_iter=budget,
+            random_state=random_state,
+            n_jobs=n_jobs,
+        )
+
+    raise ValueError(
+        f"Unknown search strategy '{strategy}'. Expected one of {SEARCH_STRATEGIES}."
+    )
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import joblib
+
+from src.utils.storage import path_validate
+
+
+# ------------------------------------------------------------------
+# Logging configuration
+# ------------------------------------------------------------------
+LOGGER = logging.getLogger(__name__)
+
+# Metrics copied from the experiment result into the registry entry.
+METRIC_KEYS = ("test_roc_auc", "cv_best_roc_auc")
+
+
+# ------------------------------------------------------------------
+# Registry index
+# ------------------------------------------------------------------
+def _file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def read_index(registry_path: str) -> Dict[str, Any]:
+    """
+    Registry index: {"models": {version: {dataset: entry}}}.
+    A missing file is an empty registry.
+    """
+    if not os.path.exists(registry_path):
+        return {"models": {}}
+    with open(registry_path) as f:
+        return json.load(f)
+
+
+def _write_index(registry_path: str, index: Dict[str, Any]) -> None:
+    # Written under a temporary name and renamed so readers never see a partial file.
+    path_validate(registry_path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(registry_path) or ".", suffix=".tmp"
+    )
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True, default=str)
+    os.replace(tmp_path, registry_path)
+
+
+def register_model(
+    experiment_result: Dict[str, Any],
+    model_dir: str,
+    version: str,
+    registry_path: str,
+) -> Dict[str, Any]:
+    """
+    Store the best estimator of an experiment result and index it.
+
+    The estimator is dumped uncompressed with joblib to
+    `{model_dir}{version}/model_{dataset}.joblib`. The entry records the
+    artifact path, size and sha256, the metrics and the best params.
+
+    Returns:
+        The registry entry.
+    """
+    dataset_name = experiment_result["dataset_name"]
+    artifact_path = f"{model_dir}{version}/model_{dataset_name}.joblib"
+    path_validate(artifact_path)
+    joblib.dump(experiment_result["best_estimator"], artifact_path)
+
+    entry = {
+        "version": version,
+        "dataset": dataset_name,
+        "model_name": experiment_result.get("best_model_name"),
+        "artifact": artifact_path,
+        "sha256": _file_sha256(artifact_path),
+        "size_bytes": os.path.getsize(artifact_path),
+        "metrics": {
+            key: float(experiment_result[key])
+            for key in METRIC_KEYS if experiment_result.get(key) is not None
+        },
+        "best_params": experiment_result.get("best_params"),
+        "registered_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    index = read_index(registry_path)
+    index["models"].setdefault(version, {})[dataset_name] = entry
+    _write_index(registry_path, index)
+
+    LOGGER.info(
+        "Registered model | version=%s | dataset=%s | path=%s",
+        version,
+        dataset_name,
+        artifact_path,
+    )
+    return entry
+
+
+# ------------------------------------------------------------------
+# Lazy loading
+# ------------------------------------------------------------------
+class ModelRegistry:
+    """
+    Read side of the registry for scoring processes.
+
+    Estimators are loaded on first use and live in process memory: sklearn
+    trees copy their node arrays when unpickled, so memory-mapping the
+    artifact saves next to nothing for tree ensembles. The LRU bounds the
+    memory instead: at most `max_loaded` estimators, and at most
+    `max_bytes` of artifacts (their size on disk, close to their size in
+    memory), stay loaded; the least recently used one is dropped first.
+    """
+
+    def __init__(
+        self,
+        registry_path: str,
+        max_loaded: int = 4,
+        max_bytes: Optional[int] = None,
+        mmap_mode: Optional[str] = None,
+        verify: bool = True,
+    ) -> None:
+        """
+        Args:
+            max_loaded: estimators kept loaded at once (LRU).
+            max_bytes: total artifact size kept loaded (LRU); None for no
+                byte limit. The last loaded estimator is always kept.
+            mmap_mode: joblib mmap_mode (only helps estimators whose arrays
+                are not copied on unpickling, i.e. not tree ensembles).
+            verify: check the artifact sha256 against the registry on load.
+        """
+        self.registry_path = registry_path
+        self.max_loaded = max_loaded
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+        self.verify = verify
+        self._index = read_index(registry_path)
+        self._loaded: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._loaded_bytes: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def reload(self) -> None:
+        """Re-read the index (e.g. after a new version was registered)."""
+        with self._lock:
+            self._index = read_index(self.registry_path)
+
+    def versions(self) -> Dict[str, list]:
+        """{version: [datasets]} of the registered models."""
+        return {
+            version: sorted(models)
+            for version, models in self._index["models"].items()
+        }
+
+    def entry(self, version: str, dataset: str) -> Optional[Dict[str, Any]]:
+        return self._index["models"].get(version, {}).get(dataset)
+
+    def get(self, version: str, dataset: str):
+        """
+        Registered estimator of (version, dataset), loaded lazily.
+
+        Raises:
+            KeyError: the pair is not registered.
+            ValueError: the artifact does not match its registered hash.
+        """
+        key = (version, dataset)
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key]
+
+            entry = self.entry(version, dataset)
+            if entry is None:
+                raise KeyError(f"No registered model for version={version} dataset={dataset}")
+
+            if self.verify and _file_sha256(entry["artifact"]) != entry["sha256"]:
+                raise ValueError(f"Model artifact {entry['artifact']} does not match its registered hash")
+
+            model = joblib.load(entry["artifact"], mmap_mode=self.mmap_mode)
+            self._loaded[key] = model
+            self._loaded_bytes[key] = entry.get("size_bytes") or os.path.getsize(entry["artifact"])
+            LOGGER.info("Loaded model | version=%s | dataset=%s", version, dataset)
+
+            while len(self._loaded) > 1 and self._over_budget():
+                evicted, _ = self._loaded.popitem(last=False)
+                self._loaded_bytes.pop(evicted)
+                LOGGER.info("Evicted model | version=%s | dataset=%s", *evicted)
+            return model
+
+    def _over_budget(self) -> bool:
+        if len(self._loaded) > self.max_loaded:
+            return True
+        return self.max_bytes is not None and sum(self._loaded_bytes.values()) > self.max_bytes
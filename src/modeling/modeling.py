@@ -1,25 +1,22 @@
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional
 
 import pandas as pd
 
 from src.model_experiments import experiments
+from src.modeling import model_registry
+from src.utils import parallelism, tracing
 from src.utils.storage import (
     ingest_data,
     export_data,
+    dataset_file,
     save_pickle,
     load_pickle,
 )
 
 
-# ------------------------------------------------------------------
-# Logging configuration
-# ------------------------------------------------------------------
 LOGGER = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-)
 
 
 DATASETS: List[str] = [
@@ -31,6 +28,27 @@ DATASETS: List[str] = [
 # ------------------------------------------------------------------
 # Training pipeline
 # ------------------------------------------------------------------
+def _load_dataset(
+    datasets: Optional[Dict[str, pd.DataFrame]],
+    data_path: str,
+    name: str,
+    target_col: str,
+):
+    """
+    Features and target of one dataset, from memory when available.
+    """
+    if datasets is not None:
+        data_frame = datasets[name]
+        return data_frame.drop(columns=[target_col]), data_frame[target_col]
+
+    return ingest_data(
+        dataset_file(data_path, name),
+        index_col="row_id",
+        target_col=target_col,
+    )
+
+
+@tracing.traced(level=logging.INFO)
 def model_training_pipeline(
     training_data_path: str,
     testing_data_path: str,
@@ -38,10 +56,32 @@ def model_training_pipeline(
     best_model_path: str,
     version: str,
     target_col: str,
+    train_datasets: Optional[Dict[str, pd.DataFrame]] = None,
+    test_datasets: Optional[Dict[str, pd.DataFrame]] = None,
+    search_strategy: str = "grid",
+    search_budget: Optional[int] = None,
+    use_fit_cache: bool = True,
+    registry_path: Optional[str] = None,
 ) -> None:
     """
     Train models across multiple datasets, store results,
     and persist the best-performing model.
+
+    When `train_datasets` / `test_datasets` are given (frames returned by
+    preprocessing_pipeline) they are used directly; otherwise each dataset
+    is read from `training_data_path` / `testing_data_path`.
+    `search_strategy` / `search_budget` are forwarded to
+    experiments.experiment_results. Datasets, searches and trees share one
+    parallelism budget (see parallelism.training_budget).
+
+    With `use_fit_cache`, search results are cached under
+    `{results_path}fit_cache/` across versions and datasets, so only
+    datasets whose matrix or search setup changed are refit. The cache
+    keeps the most recently used entries up to fit_cache.MAX_CACHE_BYTES;
+    fit_cache.prune(cache_dir, 0) clears it.
+
+    With `registry_path`, the best model is also registered in the model
+    registry (see model_registry.register_model).
     """
     LOGGER.info("Starting model training pipeline | version=%s", version)
 
@@ -49,55 +89,79 @@ def model_training_pipeline(
     best_model: Optional[Dict] = None
     best_roc_auc: float = float("-inf")
 
-    for name in DATASETS:
-        LOGGER.info("Processing dataset: %s", name)
-
-        X_train, y_train = ingest_data(
-            f"{training_data_path}{name}.csv",
-            index_col="row_id",
-            target_col=target_col,
-        )
-        X_test, y_test = ingest_data(
-            f"{testing_data_path}{name}.csv",
-            index_col="row_id",
-            target_col=target_col,
-        )
+    budget = parallelism.training_budget(
+        len(DATASETS), *experiments.training_workload()
+    )
 
-        rows_with_nans = X_test[X_test.isna().any(axis=1)]
-        if not rows_with_nans.empty:
-            LOGGER.warning(
-                "NaNs detected in test set | dataset=%s | rows=%s",
-                name,
-                rows_with_nans.index.tolist(),
-            )
+    # Datasets are independent: with spare cores each one trains in its own
+    # process, and its searches only use that process's share of the budget.
+    pool = (
+        ProcessPoolExecutor(max_workers=budget["datasets"])
+        if budget["datasets"] > 1 else None
+    )
+    try:
+        pending = {}
+        for name in DATASETS:
+            LOGGER.info("Processing dataset: %s", name)
 
-        experiment_result = experiments.experiment_results(
-            X_train,
-            y_train,
-            X_test,
-            y_test,
-            version,
-        )
-        experiment_result["dataset_name"] = name
-        results[name] = experiment_result
-
-        roc_auc = experiment_result.get("test_roc_auc")
-        if roc_auc is None:
-            LOGGER.warning(
-                "Missing test_roc_auc in results | dataset=%s",
-                name,
+            X_train, y_train = _load_dataset(
+                train_datasets, training_data_path, name, target_col
             )
-            continue
-
-        if roc_auc > best_roc_auc:
-            best_roc_auc = roc_auc
-            best_model = experiment_result
-            LOGGER.info(
-                "New best model found | dataset=%s | roc_auc=%.5f",
-                name,
-                roc_auc,
+            X_test, y_test = _load_dataset(
+                test_datasets, testing_data_path, name, target_col
             )
 
+            rows_with_nans = X_test[X_test.isna().any(axis=1)]
+            if not rows_with_nans.empty:
+                LOGGER.warning(
+                    "NaNs detected in test set | dataset=%s | rows=%s",
+                    name,
+                    rows_with_nans.index.tolist(),
+                )
+
+            args = (X_train, y_train, X_test, y_test, version)
+            kwargs = {
+                "search_strategy": search_strategy,
+                "search_budget": search_budget,
+                "budget": budget,
+                "cache_dir": f"{results_path}fit_cache/" if use_fit_cache else None,
+            }
+            if pool is None:
+                pending[name] = experiments.experiment_results(*args, **kwargs)
+            else:
+                pending[name] = pool.submit(
+                    experiments.experiment_results, *args, **kwargs
+                )
+
+        for name in DATASETS:
+            experiment_result = pending[name]
+            if pool is not None:
+                experiment_result = experiment_result.result()
+            experiment_result["dataset_name"] = name
+            results[name] = experiment_result
+
+            roc_auc = experiment_result.get("test_roc_auc")
+            if roc_auc is None:
+                LOGGER.warning(
+                    "Missing test_roc_auc in results | dataset=%s",
+                    name,
+                )
+                continue
+
+            if roc_auc > best_roc_auc:
+                best_roc_auc = roc_auc
+                best_model = experiment_result
+                LOGGER.info(
+                    "New best model found | dataset=%s | roc_auc=%.5f",
+                    name,
+                    roc_auc,
+                )
+    finally:
+        # Also reached on errors: queued datasets are cancelled and the
+        # workers stop instead of outliving the pipeline.
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
     # --------------------------------------------------------------
     # Persist results
     # --------------------------------------------------------------
@@ -122,32 +186,19 @@ def model_training_pipeline(
         best_model_export_path,
     )
 
+    if registry_path is not None:
+        model_registry.register_model(
+            best_model, best_model_path, version, registry_path
+        )
+
 
 # ------------------------------------------------------------------
 # Inference pipeline
 # ------------------------------------------------------------------
-def model_inference_pipeline(
-    inference_data_path: str,
-    results_path: str,
-    version: str,
-    selected_ds: str,
-    threshold: float,
-) -> None:
+def load_best_estimator(results_path: str, version: str, selected_ds: str):
     """
-    Run inference on new data using a previously trained model
-    and export prediction probabilities.
+    Load the fitted estimator persisted by model_training_pipeline.
     """
-    LOGGER.info(
-        "Starting inference | version=%s | dataset=%s",
-        version,
-        selected_ds,
-    )
-
-    X_infer, _ = ingest_data(
-        f"{inference_data_path}{selected_ds}.csv",
-        index_col="row_id",
-    )
-
     model_path = (
         f"{results_path}{version}/best_model_{selected_ds}.pkl"
     )
@@ -160,7 +211,14 @@ def model_inference_pipeline(
         )
 
     LOGGER.debug("Loaded model from %s", model_path)
+    return model
 
+
+@tracing.traced()
+def predict_frame(model, X_infer: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """
+    Score a model-ready frame and apply the decision threshold.
+    """
     if hasattr(model, "predict_proba"):
         y_pred_proba = model.predict_proba(X_infer)[:, 1]
     else:
@@ -172,8 +230,7 @@ def model_inference_pipeline(
 
     y_pred_bool = y_pred_proba >= threshold
 
-
-    df_results = pd.DataFrame(
+    return pd.DataFrame(
         {
             "prediction_proba": y_pred_proba,
             "prediction": y_pred_bool,
@@ -181,6 +238,38 @@ def model_inference_pipeline(
         index=X_infer.index,
     )
 
+
+@tracing.traced(level=logging.INFO)
+def model_inference_pipeline(
+    inference_data_path: str,
+    results_path: str,
+    version: str,
+    selected_ds: str,
+    threshold: float,
+    X_infer: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Run inference on new data using a previously trained model
+    and export prediction probabilities.
+
+    `X_infer` (the frame returned by preprocessing_inference_pipeline)
+    skips reading the exported inference dataset.
+    """
+    LOGGER.info(
+        "Starting inference | version=%s | dataset=%s",
+        version,
+        selected_ds,
+    )
+
+    if X_infer is None:
+        X_infer, _ = ingest_data(
+            dataset_file(inference_data_path, selected_ds),
+            index_col="row_id",
+        )
+
+    model = load_best_estimator(results_path, version, selected_ds)
+    df_results = predict_frame(model, X_infer, threshold)
+
     export_path = (
         f"{results_path}{version}/final_inferences.csv"
     )
@@ -190,3 +279,5 @@ def model_inference_pipeline(
         "Inference completed successfully | output=%s",
         export_path,
     )
+
+    return df_results
@@ -1,12 +1,22 @@
 from collections import defaultdict
 import logging
+import os
+from functools import lru_cache
 
+from config.staging import EDA_EXPORT
 from src.utils.storage import (
     ingest_data,
     export_data,
+    export_data_async,
+    dataset_file,
     save_pickle,
     load_pickle
 )
+from src.utils.datasets import SharedBaseDatasets
+from src.utils.eda_sink import EDASink
+from src.utils import tracing
+from src.preprocessing import transform_plan
+from src.artifacts.preprocessing import compact_configs
 from src.research import (
     feature_engineering,
     dataset_engineering,
@@ -14,15 +24,6 @@ from src.research import (
     training_dataset_building
 )
 
-# --- Logging Configuration ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("preprocessing_pipeline.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # --- Column Definitions ---
@@ -69,34 +70,70 @@ DS_KEYS = {
 
 
 def init_datasets(df, ds_keys):
-    logger.info(f"Initializing {len(ds_keys)} dataset copies.")
-    return {ds: df.copy(deep=True) for ds in ds_keys}
+    """
+    Fan the engineered frame out to the dataset variants without copying it.
+
+    Variants transformed directly from the engineered frame become lazy
+    copy-on-write views of it; variants derived from another variant
+    (one-hot / PCA) are added later by the dataset engineering step.
+    """
+    base_keys = [
+        ds for ds, cfg in ds_keys.items()
+        if "one_hot_from" not in cfg and "pca_from" not in cfg
+    ]
+    logger.info(
+        f"Initializing {len(base_keys)} shared-base dataset views "
+        f"({len(ds_keys) - len(base_keys)} derived variants built later)."
+    )
+    return SharedBaseDatasets(df, lazy_keys=base_keys)
 
 
 def preprocessing_pipeline(data_path, results_path, version='last_version',
-                           target_col=None, role='train'):
+                           target_col=None, role='train', export=True, async_export=False,
+                           previous_version=None, eda_export=EDA_EXPORT):
+    """
+    Engineer, rank and build every dataset variant for one role.
+
+    Args:
+        data_path (str): Path to the raw CSV for this role.
+        results_path (str): Directory where processed datasets are exported.
+        version (str): Version folder for training artifacts.
+        target_col (str): Target column name.
+        role (str): 'train' fits configs and rankings, 'test' reuses them.
+        export (bool): Write the final datasets to `results_path`.
+        async_export (bool): Write them from a background thread instead of
+            blocking; see storage.wait_for_exports.
+        previous_version (str): Version whose rankings are reused when only
+            rows were appended (see feature_importance.rank_all_features).
+        eda_export (bool): Snapshot the engineered frames of this role for
+            EDA in the background (see eda_sink.EDASink).
+
+    Returns:
+        dict of final datasets (features plus target), ready for modeling.
+    """
     logger.info("=" * 80)
     logger.info(
         f"Starting preprocessing pipeline | Role: {role} | "
         f"Version: {version} | Target column: {target_col}"
     )
 
-    processing_configs_file = f'training_parameter_results/{version}/processing_configs.pkl'
+    processing_configs_path = f'training_parameter_results/{version}/processing_configs'
     all_rankings_file = f'training_parameter_results/{version}/all_rankings.pkl'
+    transform_plans_file = f'training_parameter_results/{version}/transform_plans.pkl'
 
     # ------------------------------------------------------------------
     # Load or initialize processing configurations
     # ------------------------------------------------------------------
     if role != 'train':
         logger.info("Inference mode detected.")
-        logger.info(f"Loading processing configs from: {processing_configs_file}")
+        logger.info(f"Loading processing configs from: {processing_configs_path}")
         logger.info(f"Loading feature rankings from: {all_rankings_file}")
 
-        processing_configs = load_pickle(processing_configs_file)
+        processing_configs = load_processing_configs(version)
         all_rankings = load_pickle(all_rankings_file)
 
         logger.info(
-            f"Loaded processing configs with {len(processing_configs)} feature groups "
+            f"Loaded processing configs for {len(processing_configs['datasets'])} datasets "
             f"and rankings for {len(all_rankings)} datasets."
         )
     else:
@@ -107,7 +144,8 @@ def preprocessing_pipeline(data_path, results_path, version='last_version',
     # Data ingestion
     # ------------------------------------------------------------------
     logger.info(f"Ingesting raw data from: {data_path}")
-    X, y = ingest_data(data_path, index_col='row_id', target_col=target_col)
+    with tracing.span("preprocessing.ingest", level=logging.INFO, role=role) as span:
+        X, y = span.output(ingest_data(data_path, index_col='row_id', target_col=target_col))
 
     logger.info(
         f"Raw data ingested successfully | "
@@ -123,14 +161,15 @@ def preprocessing_pipeline(data_path, results_path, version='last_version',
     # Feature creation
     # ------------------------------------------------------------------
     logger.info("Starting feature creation pipeline.")
-    X = feature_engineering.feature_creation_pipeline(X)
+    with tracing.span("preprocessing.feature_creation", level=logging.INFO, role=role) as span:
+        X = span.output(feature_engineering.feature_creation_pipeline(span.input(X)))
     logger.info(f"Feature creation completed. New feature matrix shape: {X.shape}")
 
     # ------------------------------------------------------------------
     # Export dataset for data analysis and visualization
     # ------------------------------------------------------------------
-    export_eda_data = {'features': X, 'player_id': player_id, 'target': y}
-    save_pickle(export_eda_data, 'src/eda/eda_feature_engineered.pkl')
+    eda_sink = EDASink(role, enabled=eda_export)
+    eda_sink.features(X, player_id, y)
 
     # ------------------------------------------------------------------
     # Dataset initialization
@@ -138,21 +177,20 @@ def preprocessing_pipeline(data_path, results_path, version='last_version',
     logger.info(f"Initializing datasets with keys: {DS_KEYS}")
     ds = init_datasets(X, DS_KEYS)
 
-    logger.info(
-        "Datasets initialized: "
-        + ", ".join(f"{k}({v.shape})" for k, v in ds.items())
-    )
+    logger.info(f"Datasets initialized: {', '.join(ds)}")
 
     # ------------------------------------------------------------------
     # Dataset-level feature engineering
     # ------------------------------------------------------------------
     logger.info("Starting dataset-level feature engineering.")
-    ds, processing_configs = dataset_engineering.feature_engineering_pipeline(
-        ds,
-        DS_KEYS,
-        processing_configs=processing_configs,
-        role=role
-    )
+    with tracing.span("preprocessing.feature_engineering", level=logging.INFO, role=role) as span:
+        ds, processing_configs = dataset_engineering.feature_engineering_pipeline(
+            span.input(ds),
+            DS_KEYS,
+            processing_configs=processing_configs,
+            role=role
+        )
+        span.output(ds)
 
     logger.info(
         "Dataset-level feature engineering completed. "
@@ -164,13 +202,26 @@ def preprocessing_pipeline(data_path, results_path, version='last_version',
     # Feature ranking (training only)
     # ------------------------------------------------------------------
     if role == 'train':
+        previous_rankings = None
+        previous_rankings_file = f'training_parameter_results/{previous_version}/all_rankings.pkl'
+        if previous_version is not None and os.path.exists(previous_rankings_file):
+            logger.info(f"Incremental ranking against: {previous_rankings_file}")
+            previous_rankings = load_pickle(previous_rankings_file)
+
         logger.info("Ranking all features for training datasets.")
-        all_rankings = feature_importance.rank_all_features(ds, y, DS_KEYS)
+        with tracing.span("preprocessing.ranking", level=logging.INFO, role=role) as span:
+            all_rankings = feature_importance.rank_all_features(
+                span.input(ds), y, DS_KEYS, previous_rankings=previous_rankings
+            )
 
         logger.info("Feature ranking completed. Saving artifacts.")
-        save_pickle(processing_configs, processing_configs_file)
+        compact_configs.save_compact_configs(processing_configs, processing_configs_path)
         save_pickle(all_rankings, all_rankings_file)
 
+        logger.info("Compiling pruned inference transform plans.")
+        transform_plans = transform_plan.compile_transform_plans(DS_KEYS, processing_configs, all_rankings)
+        save_pickle(transform_plans, transform_plans_file)
+
         logger.info(
             f"Processing configurations and rankings saved to "
             f"'training_parameter_results/{version}'"
@@ -179,13 +230,15 @@ def preprocessing_pipeline(data_path, results_path, version='last_version',
     # ------------------------------------------------------------------
     # Export dataset for data analysis and visualization
     # ------------------------------------------------------------------
-    save_pickle(ds, 'src/eda/eda_ds_dictionary.pkl')
+    eda_sink.dataset_variants(ds)
+    eda_sink.close()
 
     # ------------------------------------------------------------------
     # Dataset building
     # ------------------------------------------------------------------
     logger.info("Building final training/inference datasets.")
-    ds = training_dataset_building.dataset_building(ds, all_rankings, y, role=role)
+    with tracing.span("preprocessing.dataset_building", level=logging.INFO, role=role) as span:
+        ds = span.output(training_dataset_building.dataset_building(span.input(ds), all_rankings, y, role=role))
 
     logger.info(
         "Final dataset building completed. "
@@ -195,15 +248,24 @@ def preprocessing_pipeline(data_path, results_path, version='last_version',
     # ------------------------------------------------------------------
     # Export results
     # ------------------------------------------------------------------
-    logger.info(f"Exporting processed datasets to: {results_path}{role}/")
-    for name in ds:
-        export_path = f"{results_path}{role}/{name}.csv"
-        export_data(ds[name], export_path)
-        logger.info(f"Dataset '{name}' exported successfully to {export_path}")
+    if export:
+        logger.info(f"Exporting processed datasets to: {results_path}{role}/")
+        with tracing.span("preprocessing.export", level=logging.INFO, role=role, asynchronous=async_export) as span:
+            span.input(ds)
+            for name in ds:
+                export_path = dataset_file(f"{results_path}{role}/", name)
+                if async_export:
+                    export_data_async(ds[name], export_path)
+                    logger.info(f"Dataset '{name}' queued for export to {export_path}")
+                else:
+                    export_data(ds[name], export_path)
+                    logger.info(f"Dataset '{name}' exported successfully to {export_path}")
 
     logger.info("Preprocessing pipeline completed successfully.")
     logger.info("=" * 80)
 
+    return ds
+
 
 def preprocessing_inference_pipeline(data_path, results_path, version='last_version',
                                      selected_ds='ds1'):
@@ -222,44 +284,122 @@ def preprocessing_inference_pipeline(data_path, results_path, version='last_vers
         f"Selected dataset: {selected_ds}"
     )
 
-    processing_configs_file = f'training_parameter_results/{version}/processing_configs.pkl'
-    all_rankings_file = f'training_parameter_results/{version}/all_rankings.pkl'
-
-    logger.info("Loading processing configurations and feature rankings from training.")
-    processing_configs = load_pickle(processing_configs_file)
-    all_rankings = load_pickle(all_rankings_file)
-    all_rankings = {selected_ds: all_rankings[selected_ds]}
+    plan = _load_inference_plan(version, selected_ds)
+    columns = plan['raw_inputs'] if plan is not None else None
 
     logger.info(f"Ingesting blind data from: {data_path}")
-    X, y = ingest_data(data_path, index_col='row_id')
+    X, _ = ingest_data(data_path, index_col='row_id', columns=columns)
 
-    X = X.drop(columns=['player_id'])
+    with tracing.span("preprocessing.inference_transform", level=logging.INFO, dataset=selected_ds) as span:
+        ds = {selected_ds: span.output(inference_transform(span.input(X), version, selected_ds))}
+    logger.info(f"Final dataset built for {selected_ds}. Shape: {ds[selected_ds].shape}")
+
+    export_path = dataset_file(f"{results_path}inference/", selected_ds)
+    export_data(ds[selected_ds], export_path)
+    logger.info(f"Inference dataset '{selected_ds}' exported successfully to {export_path}")
+    logger.info("Inference preprocessing pipeline completed successfully.")
+    logger.info("=" * 80)
+
+    return ds[selected_ds]
+
+
+def _load_inference_plan(version, selected_ds):
+    transform_plans_file = f'training_parameter_results/{version}/transform_plans.pkl'
+    if not os.path.exists(transform_plans_file):
+        return None
+    return transform_plan.load_transform_plans(transform_plans_file)[selected_ds]
+
+
+def _processing_configs_file(version):
+    """Compact configs directory, or the pickle of versions trained before it."""
+    path = f'training_parameter_results/{version}/processing_configs'
+    if os.path.isdir(path):
+        return os.path.join(path, compact_configs.MANIFEST)
+    return f'{path}.pkl'
+
+
+@lru_cache(maxsize=8)
+def _load_processing_configs(version, mtime):
+    config_file = _processing_configs_file(version)
+    if config_file.endswith('.pkl'):
+        logger.info(f"Converting legacy processing configs from {config_file}.")
+        return compact_configs.as_compact(load_pickle(config_file), DS_KEYS)
+    return compact_configs.load_compact_configs(os.path.dirname(config_file))
+
+
+def load_processing_configs(version):
+    """
+    Compact processing configs of a training version (see compact_configs),
+    reusing the in-process copy until the artifact changes.
+    """
+    return _load_processing_configs(version, os.path.getmtime(_processing_configs_file(version)))
+
+
+def _rankings_file(version):
+    return f'training_parameter_results/{version}/all_rankings.pkl'
+
+
+@lru_cache(maxsize=8)
+def _load_training_artifacts(version, configs_mtime, rankings_mtime):
+    # Keyed on both files: rankings can be rewritten (e.g. re-ranked) without the configs.
+    processing_configs = load_processing_configs(version)
+    all_rankings = load_pickle(_rankings_file(version))
+    return processing_configs, all_rankings
+
+
+def inference_transform(X, version, selected_ds):
+    """
+    Turn raw rows (blind_test_data.csv schema, indexed by row_id) into the
+    model-ready frame of `selected_ds`.
+
+    Uses the compiled transform plan of the version when available and the
+    full processing configs otherwise. Loaded artifacts are cached in-process.
+    """
+    plan = _load_inference_plan(version, selected_ds)
+    if plan is not None:
+        logger.debug(
+            f"Using compiled transform plan for {selected_ds}: "
+            f"{len(plan['raw_inputs'])} raw inputs, {len(plan['derived'])} derived features."
+        )
+        X = feature_engineering.feature_creation_pipeline(X[plan['raw_inputs']], plan['derived'])
+        return transform_plan.apply_transform_plan(X, plan)
+
+    logger.info("No compiled transform plan found; interpreting processing configs.")
+    return _interpreted_inference_datasets(X, version, selected_ds)[selected_ds]
+
+
+def _interpreted_inference_datasets(X, version, selected_ds):
+    """
+    Inference preprocessing from the full processing configs (artifacts
+    trained before transform plans were emitted).
+    """
+    logger.info("Loading processing configurations and feature rankings from training.")
+    processing_configs, all_rankings = _load_training_artifacts(
+        version, os.path.getmtime(_processing_configs_file(version)), os.path.getmtime(_rankings_file(version)))
+    all_rankings = {ds: all_rankings[ds] for ds in [selected_ds] if ds in all_rankings}
+
+    X = X.drop(columns=['player_id'], errors='ignore')
     logger.info("Dropped identifier column: 'player_id'")
 
     logger.info("Starting feature creation pipeline for inference data.")
     X = feature_engineering.feature_creation_pipeline(X)
     logger.info(f"Feature creation completed. Feature matrix shape: {X.shape}")
 
-    ds = {selected_ds: X.copy(deep=True)}
-    logger.info(f"Initialized inference dataset: {selected_ds}({ds[selected_ds].shape})")
+    # One-hot / PCA variants also need the variant they are derived from.
+    selected_keys = dataset_engineering.with_sources(selected_ds, DS_KEYS)
+    ds = init_datasets(X, selected_keys)
+    logger.info(f"Initialized inference datasets: {', '.join(selected_keys)} ({X.shape})")
 
     logger.info("Starting dataset-level feature engineering for inference.")
     ds, _ = dataset_engineering.feature_engineering_pipeline(
         ds,
-        {selected_ds: DS_KEYS[selected_ds]},
+        selected_keys,
         processing_configs=processing_configs,
         role='inference'
     )
     logger.info(f"Dataset-level feature engineering completed for {selected_ds}.")
 
     logger.info("Building final inference dataset using stored feature rankings.")
-    ds = training_dataset_building.dataset_building(ds, all_rankings, y, role='inference')
-    logger.info(f"Final dataset built for {selected_ds}. Shape: {ds[selected_ds].shape}")
-
-    export_path = f"{results_path}inference/{selected_ds}.csv"
-    export_data(ds[selected_ds], export_path)
-    logger.info(f"Inference dataset '{selected_ds}' exported successfully to {export_path}")
-    logger.info("Inference preprocessing pipeline completed successfully.")
-    logger.info("=" * 80)
+    ds = training_dataset_building.dataset_building(ds, all_rankings, None, role='inference')
 
-    return ds[selected_ds]
+    return ds
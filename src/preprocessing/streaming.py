@@ -0,0 +1,281 @@
+import logging
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from src.artifacts.feature_engineering_relationships import feature_registry
+from src.artifacts.preprocessing import scalers
+from src.artifacts.preprocessing import compact_configs, quantile_sketch
+from src.preprocessing import transform_plan
+from src.preprocessing.pre_processing import DS_KEYS, init_datasets
+from src.research import (
+    feature_engineering,
+    dataset_engineering,
+    feature_importance,
+)
+from config.staging import QUANTILE_SKETCH_ERROR
+from src.utils import tracing
+from src.utils.storage import (
+    ChunkWriter,
+    dataset_file,
+    iter_data,
+    load_pickle,
+    save_pickle,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per chunk read from the raw data.
+CHUNK_SIZE = 100_000
+# Rows kept (uniformly at random) to fit the one-hot / PCA variants and to
+# rank features; the base variant encoders are fitted on every row.
+SAMPLE_SIZE = 200_000
+
+
+def _artifact_paths(version):
+    base = f'training_parameter_results/{version}'
+    return {
+        'processing_configs': f'{base}/processing_configs',
+        'all_rankings': f'{base}/all_rankings.pkl',
+        'transform_plans': f'{base}/transform_plans.pkl',
+    }
+
+
+def _engineered_chunks(data_path, chunksize, target_col=None, columns=None, features=None):
+    """Raw chunks with the identifier dropped and the derived features added."""
+    for X, y in iter_data(data_path, index_col='row_id', chunksize=chunksize,
+                          target_col=target_col, columns=columns):
+        X = X.drop(columns=['player_id'], errors='ignore')
+        yield feature_engineering.feature_creation_pipeline(X, features), y
+
+
+# ------------------------------------------------------------------
+# Pass 1: incremental fitting of the base variants
+# ------------------------------------------------------------------
+class _StreamingStats:
+    """
+    Mergeable statistics of the base variants (frequency counts, scaler
+    moments, min/max and quantile sketches), updated one chunk at a time.
+    """
+
+    def __init__(self, ds_keys, sketch_error=QUANTILE_SKETCH_ERROR):
+        self.rows = 0
+        self.counts = {}
+        self.scalers = {}
+        self.extremes = {}
+        self.sketches = {}
+
+        for ds, cfg in ds_keys.items():
+            for col in cfg.get('frequency_encoding', []):
+                self.counts[col] = pd.Series(dtype=float)
+            for scale_type, cols in cfg.get('scaling', {}).items():
+                self.scalers.setdefault((scale_type, tuple(cols)), scalers.SCALERS[scale_type]())
+            for mode, cols in cfg.get('binning', {}).items():
+                for col, _ in cols:
+                    self.extremes[col] = [np.inf, -np.inf]
+                    if mode == 'quantile':
+                        self.sketches.setdefault(col, quantile_sketch.KLLSketch(quantile_sketch.k_for_error(sketch_error)))
+
+    def update(self, X):
+        self.rows += len(X)
+        for col, counts in self.counts.items():
+            self.counts[col] = counts.add(X[col].value_counts(), fill_value=0)
+        for (_, cols), scaler in self.scalers.items():
+            scaler.partial_fit(X[list(cols)].to_numpy(dtype=float))
+        for col, bounds in self.extremes.items():
+            values = X[col].to_numpy(dtype=float)
+            bounds[0] = min(bounds[0], np.nanmin(values))
+            bounds[1] = max(bounds[1], np.nanmax(values))
+        for col, sketch in self.sketches.items():
+            sketch.update(X[col].to_numpy(dtype=float))
+
+    def _codebook(self, col):
+        counts = self.counts[col]
+        try:
+            counts = counts.sort_index()
+        except TypeError:
+            pass
+        return {
+            "vocabulary": counts.index.to_numpy(),
+            "frequencies": counts.to_numpy(dtype=float) / self.rows,
+            "encoding_type": "frequency",
+        }
+
+    def _bin_edges(self, col, n_bins, mode):
+        low, high = self.extremes[col]
+        if mode == 'standard':
+            return np.linspace(low, high, n_bins + 1)
+        return quantile_sketch.quantile_edges(self.sketches[col], n_bins)
+
+    def processing_configs(self, ds_keys):
+        """Configs of the base variants, in the format the in-memory pipeline fits."""
+        configs = defaultdict(dict)
+        for ds, cfg in ds_keys.items():
+            if 'frequency_encoding' in cfg:
+                configs[ds]['frequency_encoding'] = {'frequency_encoding': [
+                    {f"{col}_freq": self._codebook(col)}
+                    for col in cfg['frequency_encoding']
+                ]}
+            for scale_type, cols in cfg.get('scaling', {}).items():
+                configs[ds][scale_type] = {
+                    "columns": list(cols),
+                    "scaler": self.scalers[(scale_type, tuple(cols))],
+                }
+            for mode, cols in cfg.get('binning', {}).items():
+                bin_configs = []
+                for col, n_bins in cols:
+                    edges = self._bin_edges(col, n_bins, mode)
+                    bin_configs.append({f"{col}_bin": {
+                        "bin_edges": edges.tolist(),
+                        "labels": range(1, len(edges)),
+                        "binning_type": mode,
+                    }})
+                configs[ds][f'bin_{mode}'] = {mode: bin_configs}
+        return configs
+
+
+def _update_sample(sample, X, y, keys, sample_size, offset):
+    """
+    Bottom-k sampling: every row gets a uniform random key and the rows
+    with the smallest keys seen so far form a uniform sample.
+    """
+    chunk = X.assign(_target=y.to_numpy(), _key=keys, _position=np.arange(offset, offset + len(X)))
+    if sample is not None:
+        chunk = pd.concat([sample, chunk])
+    return chunk.nsmallest(sample_size, '_key') if len(chunk) > sample_size else chunk
+
+
+@tracing.traced(level=logging.INFO)
+def fit_streaming(data_path, version, target_col, chunksize=CHUNK_SIZE, sample_size=SAMPLE_SIZE,
+                  previous_version=None, random_state=42):
+    """
+    Fit every training artifact without loading the whole dataset.
+
+    Base variant encoders (frequency maps, scaler moments, equal-width and
+    quantile bin edges) are fitted incrementally on every row. One-hot and
+    PCA variants are fitted, and features ranked, on a uniform sample of
+    `sample_size` rows. Saves processing_configs, all_rankings and the
+    compiled transform plans like preprocessing_pipeline.
+
+    Returns:
+        dict {dataset: transform plan}
+    """
+    rng = np.random.default_rng(random_state)
+    base_keys = {ds: cfg for ds, cfg in DS_KEYS.items() if dataset_engineering.variant_source(cfg) is None}
+    stats = _StreamingStats(base_keys)
+    sample = None
+
+    logger.info(f"Streaming fit pass over {data_path} (chunks of {chunksize} rows).")
+    for X, y in _engineered_chunks(data_path, chunksize, target_col=target_col):
+        sample = _update_sample(sample, X, y, rng.random(len(X)), sample_size, stats.rows)
+        stats.update(X)
+        logger.info(f"Fitted on {stats.rows} rows.")
+
+    processing_configs = stats.processing_configs(base_keys)
+
+    sample = sample.sort_values('_position')
+    y_sample = sample.pop('_target')
+    X_sample = sample.drop(columns=['_key', '_position'])
+    logger.info(f"Fitting derived variants and ranking on a sample of {len(X_sample)} rows.")
+
+    ds = init_datasets(X_sample, DS_KEYS)
+    ds, _ = dataset_engineering.feature_engineering_pipeline(
+        ds, base_keys, processing_configs=processing_configs, role='inference'
+    )
+    for name, cfg in DS_KEYS.items():
+        source = dataset_engineering.variant_source(cfg)
+        if source is not None:
+            ds[name], variant_config = dataset_engineering.engineer_variant(
+                name, cfg, ds[source], processing_configs, role='train'
+            )
+            processing_configs[name].update(variant_config)
+    processing_configs = compact_configs.compact_processing_configs(processing_configs, DS_KEYS)
+
+    paths = _artifact_paths(version)
+    previous_rankings = None
+    if previous_version is not None:
+        previous_file = _artifact_paths(previous_version)['all_rankings']
+        try:
+            previous_rankings = load_pickle(previous_file)
+        except FileNotFoundError:
+            logger.info(f"No previous rankings at {previous_file}; ranking from scratch.")
+    all_rankings = feature_importance.rank_all_features(
+        ds, y_sample, DS_KEYS, previous_rankings=previous_rankings
+    )
+
+    plans = transform_plan.compile_transform_plans(DS_KEYS, processing_configs, all_rankings)
+    compact_configs.save_compact_configs(processing_configs, paths['processing_configs'])
+    save_pickle(all_rankings, paths['all_rankings'])
+    save_pickle(plans, paths['transform_plans'])
+    return plans
+
+
+# ------------------------------------------------------------------
+# Pass 2: chunked transformation
+# ------------------------------------------------------------------
+@tracing.traced(level=logging.INFO)
+def transform_streaming(data_path, output_path, plans, target_col=None, chunksize=CHUNK_SIZE):
+    """
+    Apply compiled transform plans chunk by chunk and append every chunk to
+    one output dataset per plan. Only the raw columns the plans read are
+    loaded.
+    """
+    raw_inputs, derived = [], []
+    for plan in plans.values():
+        raw_inputs += [col for col in plan['raw_inputs'] if col not in raw_inputs]
+        derived += [col for col in plan['derived'] if col not in derived]
+    # Keep the registry order so features that depend on others come later.
+    derived = [col for col in feature_registry.FEATURE_REGISTRY if col in derived]
+
+    writers = {name: ChunkWriter(dataset_file(output_path, name)) for name in plans}
+    try:
+        rows = 0
+        for X, y in _engineered_chunks(data_path, chunksize, target_col=target_col,
+                                       columns=raw_inputs, features=derived):
+            for name, plan in plans.items():
+                out = transform_plan.apply_transform_plan(X, plan)
+                if y is not None:
+                    out[target_col] = y
+                writers[name].write(out)
+            rows += len(X)
+            logger.info(f"Transformed {rows} rows into {len(plans)} datasets.")
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def streaming_preprocessing_pipeline(data_path, results_path, version='last_version', target_col=None,
+                                     role='train', chunksize=CHUNK_SIZE, sample_size=SAMPLE_SIZE,
+                                     previous_version=None):
+    """
+    Chunked counterpart of preprocessing_pipeline for data larger than memory.
+
+    Training fits the artifacts in a streaming pass (fit_streaming); every
+    role then writes its final datasets to `{results_path}{role}/` chunk by
+    chunk. Nothing is returned: modeling reads the exported datasets.
+    """
+    logger.info("=" * 80)
+    logger.info(f"Starting streaming preprocessing | Role: {role} | Version: {version}")
+
+    if role == 'train':
+        plans = fit_streaming(data_path, version, target_col, chunksize=chunksize,
+                              sample_size=sample_size, previous_version=previous_version)
+    else:
+        plans = transform_plan.load_transform_plans(_artifact_paths(version)['transform_plans'])
+
+    transform_streaming(data_path, f"{results_path}{role}/", plans, target_col=target_col, chunksize=chunksize)
+    logger.info("Streaming preprocessing completed successfully.")
+    logger.info("=" * 80)
+
+
+def streaming_inference_pipeline(data_path, results_path, version='last_version', selected_ds='ds1',
+                                 chunksize=CHUNK_SIZE):
+    """
+    Chunked counterpart of preprocessing_inference_pipeline: applies the
+    stored transform plan of `selected_ds` and writes
+    `{results_path}inference/{selected_ds}` chunk by chunk.
+    """
+    plans = transform_plan.load_transform_plans(_artifact_paths(version)['transform_plans'])
+    transform_streaming(data_path, f"{results_path}inference/", {selected_ds: plans[selected_ds]},
+                        chunksize=chunksize)
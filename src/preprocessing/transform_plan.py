@@ -0,0 +1,164 @@
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.artifacts.feature_engineering_relationships import feature_registry
+from src.artifacts.dimentionality_reduction import pca
+from src.artifacts.preprocessing import compact_configs, encoders
+from src.utils import tracing
+from src.utils.storage import load_pickle
+
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION = 1
+
+
+# ------------------------------------------------------------------
+# Compilation (training)
+# ------------------------------------------------------------------
+def _column_step(name, base_steps):
+    return base_steps.get(name, {"op": "passthrough", "source": name})
+
+
+def compile_transform_plan(ds, ds_keys, processing_configs, ranking=None):
+    """
+    Compile the inference transform for one dataset variant.
+
+    Only the columns that survive into the final dataset (the ranked
+    `top_features`, or every component of a PCA variant) are resolved back
+    to the raw and engineered inputs they need, reusing the column records
+    of the compact processing configs (see compact_configs) as steps, so
+    applying the plan needs no config interpretation.
+    """
+    cfg = ds_keys[ds]
+    source = cfg.get("one_hot_from") or cfg.get("pca_from")
+    base_ds = source or ds
+    variant_configs = processing_configs["datasets"]
+    base_steps = variant_configs[base_ds]["columns"]
+
+    columns = {}
+    outputs = []
+
+    if "pca_from" in cfg:
+        pca_record = variant_configs[ds]["pca"]
+        sources = list(pca_record["sources"])
+        for name in sources:
+            columns[name] = _column_step(name, base_steps)
+        pca_step = {
+            "sources": sources,
+            "mean": np.array(pca_record["mean"], dtype=float),
+            "components": np.array(pca_record["components"], dtype=float),
+            "impute": np.array(pca_record.get("impute", pca_record["mean"]), dtype=float),
+        }
+        names = [f"PC{i + 1}" for i in range(len(pca_step["components"]))]
+        outputs = [(name, {"op": "pca", "component": i}) for i, name in enumerate(names)]
+    else:
+        pca_step = None
+        top_features = list(ranking["top_features"])
+        if "one_hot_from" in cfg:
+            dummies = {}
+            for col, info in variant_configs[ds]["one_hot"].items():
+                for cat in info["categories"]:
+                    dummies[f"{info['prefix']}_{cat}"] = (col, cat)
+            for name in top_features:
+                if name not in dummies:
+                    raise ValueError(
+                        f"Top feature '{name}' of {ds} is not a dummy of its fitted one-hot config; "
+                        f"the ranking and the processing configs do not match."
+                    )
+                col, cat = dummies[name]
+                columns[col] = _column_step(col, base_steps)
+                outputs.append((name, {"op": "one_hot", "source": col, "category": cat}))
+        else:
+            for name in top_features:
+                columns[name] = _column_step(name, base_steps)
+                outputs.append((name, {"op": "column", "source": name}))
+
+    inputs = []
+    for step in columns.values():
+        if step["source"] not in inputs:
+            inputs.append(step["source"])
+    derived = [col for col in inputs if col in feature_registry.FEATURE_REGISTRY]
+    raw_inputs = [col for col in inputs if col not in feature_registry.FEATURE_REGISTRY]
+    for col in feature_registry.required_inputs(derived):
+        if col not in raw_inputs:
+            raw_inputs.append(col)
+
+    return {
+        "plan_version": PLAN_VERSION,
+        "dataset": ds,
+        "raw_inputs": raw_inputs,
+        "derived": derived,
+        "columns": list(columns.items()),
+        "pca": pca_step,
+        "outputs": outputs,
+    }
+
+
+def compile_transform_plans(ds_keys, processing_configs, all_rankings):
+    """
+    Compile a transform plan for every variant in ds_keys. Fitted or legacy
+    processing configs are converted to compact configs first.
+    """
+    processing_configs = compact_configs.as_compact(processing_configs, ds_keys)
+    plans = {}
+    for ds in ds_keys:
+        plans[ds] = compile_transform_plan(ds, ds_keys, processing_configs, all_rankings.get(ds))
+        logger.info(
+            f"Compiled transform plan for {ds}: {len(plans[ds]['outputs'])} outputs from "
+            f"{len(plans[ds]['raw_inputs'])} raw inputs and {len(plans[ds]['derived'])} derived features."
+        )
+    return plans
+
+
+# ------------------------------------------------------------------
+# Execution (inference)
+# ------------------------------------------------------------------
+@tracing.traced()
+def apply_transform_plan(X, plan):
+    """
+    Transform an engineered frame into the final dataset of a plan.
+
+    Args:
+        X: frame holding at least the plan's raw inputs and derived features.
+        plan: output of compile_transform_plan.
+
+    Returns:
+        pd.DataFrame with the plan outputs, in training column order.
+    """
+    columns = {name: compact_configs.apply_record(X[step["source"]], step) for name, step in plan["columns"]}
+
+    reduced = None
+    if plan["pca"] is not None:
+        pca_step = plan["pca"]
+        values = np.column_stack([columns[name].to_numpy(dtype=float) for name in pca_step["sources"]])
+        # Plans compiled before imputation fill with the training mean.
+        values = pca.fill_missing(values, pca_step.get("impute", pca_step["mean"]))
+        reduced = (values - pca_step["mean"]) @ pca_step["components"].T
+
+    out = {}
+    for name, step in plan["outputs"]:
+        op = step["op"]
+        if op == "column":
+            out[name] = columns[step["source"]]
+        elif op == "one_hot":
+            out[name] = encoders.category_strings(columns[step["source"]]) == step["category"]
+        elif op == "pca":
+            out[name] = reduced[:, step["component"]]
+        else:
+            out[name] = step["value"]
+
+    return pd.DataFrame(out, index=X.index)
+
+
+@lru_cache(maxsize=8)
+def _load_plans(path, mtime):
+    return load_pickle(path)
+
+
+def load_transform_plans(path):
+    """Load compiled plans, reusing the in-process copy until the file changes."""
+    return _load_plans(path, os.path.getmtime(path))
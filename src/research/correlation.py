@@ -1,9 +1,16 @@
+from src.research import eda_stats, figure_rendering
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
 from src.utils.storage import path_validate
 
+FIGURE_DPI = 300
+
+
+def heatmap_path(figures_path: str, ds_name: str, figure_name: str) -> str:
+    return f"{figures_path}correlations/{ds_name}/{figure_name}_heatmap.png"
+
 
 def correlation_and_heatmap(
     df: pd.DataFrame,
@@ -12,6 +19,7 @@ def correlation_and_heatmap(
     ds_name: str,
     method: str = "pearson",
     annot: bool = False,
+    dpi: int = FIGURE_DPI,
 ) -> None:
     """
     Compute correlation matrix and save heatmap.
@@ -28,10 +36,26 @@ def correlation_and_heatmap(
         Correlation method: 'pearson', 'spearman', or 'kendall'.
     annot : bool
         Whether to annotate correlation values.
+    dpi : int
+        Resolution of the saved figure.
     """
-    corr = df.corr(method=method)
+    plot_heatmap(df.corr(method=method), figures_path, figure_name, ds_name,
+                 method=method, annot=annot, dpi=dpi)
+
 
-    plt.figure(figsize=(18, 16))
+def plot_heatmap(
+    corr: pd.DataFrame,
+    figures_path: str,
+    figure_name: str,
+    ds_name: str,
+    method: str = "pearson",
+    annot: bool = False,
+    dpi: int = FIGURE_DPI,
+) -> None:
+    """Save the heatmap of a precomputed correlation matrix (see correlation_and_heatmap)."""
+    # 18x16 inches for wide matrices, smaller canvases for a handful of columns.
+    width = min(18.0, max(6.0, 2 + 0.6 * len(corr)))
+    plt.figure(figsize=(width, width * 16 / 18))
     sns.heatmap(
         corr,
         cmap="coolwarm",
@@ -43,26 +67,40 @@ def correlation_and_heatmap(
     plt.title(f"Correlation Heatmap ({method.capitalize()})")
     plt.tight_layout()
 
-    file_path = f"{figures_path}correlations/{ds_name}/{figure_name}_heatmap.png"
+    file_path = heatmap_path(figures_path, ds_name, figure_name)
     path_validate(file_path)
-    plt.savefig(file_path, dpi=300)
+    plt.savefig(file_path, dpi=dpi)
     plt.close()
 
 
 def continuous_features_correlation_analysis(
     datasets: dict,
     figures_path: str,
+    max_workers: int = None,
+    force: bool = False,
+    stats: dict = None,
 ) -> None:
     """
     Generate correlation heatmaps for continuous variables
     across multiple datasets.
 
+    Pearson matrices are read from the precomputed statistics of each
+    dataset; heatmaps are rendered in parallel, and only for matrices that
+    changed since the last run (see figure_rendering.render_figures).
+
     Parameters
     ----------
     datasets : dict[str, pd.DataFrame]
         Dictionary of datasets.
     figures_path : str
         Base directory for figures.
+    max_workers : int
+        Render processes; defaults to one per heatmap capped by the cores.
+    force : bool
+        Render every heatmap regardless of the cache.
+    stats : dict[str, dict]
+        Frame summaries (see eda_stats) by dataset name; computed in one
+        pass per dataset when missing.
     """
     prefixes = (
         "minutes_played",
@@ -77,6 +115,7 @@ def continuous_features_correlation_analysis(
         "scoring_volume",
     )
 
+    tasks = []
     for ds_name, df in datasets.items():
         continuous_cols = [
             col
@@ -84,19 +123,29 @@ def continuous_features_correlation_analysis(
             if col.startswith(prefixes)
         ]
 
+        summary = (stats or {}).get(ds_name) or eda_stats.frame_stats(df)
+        pearson_cols = set(summary["correlation"]["columns"])
+
+        figures = []
         if continuous_cols:
-            correlation_and_heatmap(
-                df=df[continuous_cols],
-                figures_path=figures_path,
-                ds_name=ds_name,
-                figure_name=f"{ds_name}_continuous",
-            )
+            figures.append((f"{ds_name}_continuous", continuous_cols))
 
-        numeric_df = df.select_dtypes(include="number")
-        if not numeric_df.empty:
-            correlation_and_heatmap(
-                df=numeric_df,
+        numeric_cols = list(df.select_dtypes(include="number").columns)
+        if numeric_cols:
+            figures.append((f"{ds_name}_all_numeric", numeric_cols))
+
+        for figure_name, cols in figures:
+            if pearson_cols.issuperset(cols):
+                corr = eda_stats.correlation_matrix(summary, cols)
+            else:
+                corr = df[cols].corr()
+            tasks.append(figure_rendering.figure_task(
+                heatmap_path(figures_path, ds_name, figure_name),
+                plot_heatmap,
+                corr,
                 figures_path=figures_path,
                 ds_name=ds_name,
-                figure_name=f"{ds_name}_all_numeric",
-            )
+                figure_name=figure_name,
+            ))
+
+    figure_rendering.render_figures(tasks, figures_path, max_workers=max_workers, force=force)
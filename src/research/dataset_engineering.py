@@ -1,34 +1,30 @@
 from collections import defaultdict
-from collections import ChainMap
-from src.artifacts.preprocessing import encoders, scalers, bining
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import pandas as pd
+from src.artifacts.preprocessing import encoders, scalers, bining, compact_configs
 from src.artifacts.dimentionality_reduction import pca
+from src.utils import parallelism, tracing
+from config.staging import PCA_BATCH_SIZE, PCA_SOLVER, QUANTILE_ESTIMATOR, QUANTILE_SKETCH_ERROR
 
 
 #--------------------------------
+def _replace_columns(df, cols, new_block):
+    """Drop `cols` and append the encoded block in a single concatenation."""
+    return pd.concat([df.drop(columns=cols, errors="ignore"), new_block], axis=1)
+
+#--------------------------------
+@tracing.traced()
 def apply_frequency_encoding(dataset_name, datasets, cols, role='train', freq_config=defaultdict(dict)):
-    # Determine which datasets to update
+    df = datasets[dataset_name]
     if role == 'train':
-        freq_config_list = []
-        for col in cols:
-            freq_values, col_config = encoders.frequency_encoding(datasets[dataset_name][col])
-            freq_config_list.append({f"{col}_freq": col_config})
-            datasets[dataset_name][f"{col}_freq"] = freq_values
-            datasets[dataset_name].drop(columns=[col], inplace=True, errors="ignore")
+        encoded, freq_config_list = encoders.frequency_encoding_frame(df[cols])
         freq_config = {'frequency_encoding': freq_config_list}
     else:
-        config = freq_config[dataset_name]['frequency_encoding']['frequency_encoding']
-        dict_config = ChainMap(*config)
-
-        df = datasets[dataset_name]
-        apply_enc = encoders.apply_back_frequency_encoding
-
-        for col in cols:
-            freq_values, _ = apply_enc(df[col], dict_config[f"{col}_freq"])
-            df[f"{col}_freq"] = freq_values
-
-        df.drop(columns=cols, inplace=True, errors="ignore")
+        records = freq_config[dataset_name]['columns']
+        encoded = compact_configs.apply_records(df[cols], records, [f"{col}_freq" for col in cols])
         freq_config = None
 
+    datasets[dataset_name] = _replace_columns(df, cols, encoded)
     return datasets, freq_config
 
 #--------------------------------
@@ -37,72 +33,48 @@ def apply_raw_numeric(df_temp, cols):
     return new_cols
 
 #--------------------------------
-def apply_binning(dataset_name, datasets, cols, mode, role='train', bin_config=defaultdict(dict)):
+@tracing.traced()
+def apply_binning(dataset_name, datasets, cols, mode, role='train', bin_config=defaultdict(dict), n_jobs=None):
+    """`n_jobs` cores fit the bin edges (all available cores when None)."""
+    df = datasets[dataset_name]
+    suffix = f"_binning_{mode}"
     if role == 'train':
-        bin_config_list = []
-        for col, n_bins in cols:
-            if mode == "standard":
-                binning_values, col_config = bining.standard_binning(datasets[dataset_name][col], n_bins, labels=range(1, n_bins + 1))
-                bin_config_list.append({f"{col}_bin": col_config})
-                datasets[dataset_name][f"{col}_binning_standard"] = binning_values
-                datasets[dataset_name].drop(columns=[col], inplace=True, errors="ignore")
-
-            elif mode == "quantile":
-                binning_values, col_config = bining.quantile_binning(
-                    datasets[dataset_name][col], n_bins, labels=range(1, n_bins + 1))
-                bin_config_list.append({f"{col}_bin": col_config})
-                datasets[dataset_name][f"{col}_binning_quantile"] = binning_values
-                datasets[dataset_name].drop(columns=[col], inplace=True, errors="ignore")
+        n_bins = dict(cols)
+        cols = list(n_bins)
+        n_jobs = n_jobs or parallelism.available_cores()
+        binned, bin_config_list = bining.binning_frame(
+            df[cols], n_bins, mode, suffix=suffix,
+            quantile_estimator=QUANTILE_ESTIMATOR, sketch_error=QUANTILE_SKETCH_ERROR,
+            n_shards=n_jobs, n_jobs=n_jobs
+        )
         bin_config = {mode : bin_config_list}
     else:
-        config = bin_config[dataset_name]
-        binning_type_key = next(k for k in config if k != 'frequency_encoding')
-        bins_list = config[binning_type_key][mode]
-        dict_config = dict(ChainMap(*bins_list))
-        df = datasets[dataset_name]
-        apply_enc = bining.apply_back_binning
-        suffix = "_binning_standard" if mode == "standard" else "_binning_quantile"
-        for col, _ in cols:
-            col_config = dict_config.get(f"{col}_bin")
-            if col_config is not None:
-                df[f"{col}{suffix}"], _ = apply_enc(df[col], col_config)
-                df.drop(columns=[col], inplace=True, errors="ignore")
+        records = bin_config[dataset_name]['columns']
+        # Columns without a stored config are left untouched.
+        cols = [col for col, _ in cols if f"{col}{suffix}" in records]
+        binned = compact_configs.apply_records(df[cols], records, [f"{col}{suffix}" for col in cols])
         bin_config = None
 
+    datasets[dataset_name] = _replace_columns(df, cols, binned)
     return datasets, bin_config
 
 #--------------------------------
+@tracing.traced()
 def apply_scaling(dataset_name, datasets, cols, scale_type, role = 'train', scaling_config=defaultdict(dict)):
+    df = datasets[dataset_name]
+    outputs = [f"{col}_{scale_type}" for col in cols]
     if role == 'train':
-        scaling_config_list = []
-        for col in cols:
-            if scale_type == "standard": 
-                scaled_values, col_config = scalers.standardization(datasets[dataset_name][col])
-                scaling_config_list.append({f"{col}_scaler": col_config})
-                datasets[dataset_name][f"{col}_standard"] = scaled_values
-                datasets[dataset_name].drop(columns=[col], inplace=True, errors="ignore")
-            elif scale_type == "minmax":
-                scaled_values, col_config = scalers.minimaxation(datasets[dataset_name][col])
-                scaling_config_list.append({f"{col}_scaler": col_config})
-                datasets[dataset_name][f"{col}_minmax"] = scaled_values
-                datasets[dataset_name].drop(columns=[col], inplace=True, errors="ignore")
-            scaling_config = scaling_config_list
+        scaled_values, scaling_config = scalers.fit_scaling(df[cols], scale_type)
+        scaled = pd.DataFrame(scaled_values, index=df.index, columns=outputs)
     else:
-        config = scaling_config[dataset_name]
-        scaler_type_key = next(k for k in config if k != 'frequency_encoding')
-        dict_config = ChainMap(*config[scaler_type_key])
-        df = datasets[dataset_name]
-        apply_enc = scalers.apply_scaling_back
-
-        for col in cols:
-            scaler = dict_config.get(f"{col}_scaler")
-            df[f"{col}_{scaler_type_key}"] = apply_enc(df[col], scaler)
-
-        df.drop(columns=cols, inplace=True, errors="ignore")
+        scaled = compact_configs.apply_records(df[cols], scaling_config[dataset_name]['columns'], outputs)
         scaling_config = None
+
+    datasets[dataset_name] = _replace_columns(df, cols, scaled)
     return datasets, scaling_config
 
 #--------------------------------
+@tracing.traced()
 def apply_one_hot(target_ds, df, role = 'train', one_hot_config=defaultdict(dict)):
     if role == 'train':
         encoded_df, one_hot_config = encoders.one_hot_encoding(df)
@@ -112,84 +84,168 @@ def apply_one_hot(target_ds, df, role = 'train', one_hot_config=defaultdict(dict
     return encoded_df, one_hot_config
 
 #--------------------------------
+@tracing.traced()
 def apply_pca(target_ds, df, role='train', pca_config=None):
     if role == 'train':
-        pca_results = pca.pca_by_variance(df)
+        pca_results = pca.pca_by_variance(df, solver=PCA_SOLVER, batch_size=PCA_BATCH_SIZE)
 
     else:
-        config = pca_config[target_ds]#['pca']
-        if df.isna().any().any():  
-            print("Rows containing NaN values:")
-            df = df.dropna()
+        # Missing values are imputed from the stored medians: no row is dropped.
+        config = pca_config[target_ds]
         pca_results = pca.pca_transform(df, config)
 
     return pca_results['X_reduced'], pca_results['pca_config']
 
 #--------------------------------
-def feature_engineering_pipeline(datasets, ds_keys, processing_configs=None, role = 'train'):
-    '''
-    df_temp = datasets['ds1'].copy()
-    '''
-    if role == 'train':
+def variant_source(cfg):
+    """Variant a derived dataset is built from (None for base variants)."""
+    return cfg.get("one_hot_from") or cfg.get("pca_from")
+
+#--------------------------------
+def with_sources(selected, ds_keys):
+    """
+    Sub-config of ds_keys containing `selected` and every variant it is
+    (transitively) derived from, sources first.
+    """
+    chain = []
+    ds = selected
+    while ds is not None:
+        chain.append(ds)
+        ds = variant_source(ds_keys[ds])
+    return {ds: ds_keys[ds] for ds in reversed(chain)}
+
+#--------------------------------
+def engineer_variant(ds, cfg, frame, processing_configs=None, role='train', n_jobs=None):
+    """
+    Build a single dataset variant.
+
+    `frame` is the variant's own starting frame for base variants, or the
+    already engineered source frame for one-hot / PCA variants. `n_jobs`
+    caps the cores its steps use (all available cores when None).
+
+    Returns:
+        (engineered frame, fitted config for this variant; empty at inference)
+    """
+    with tracing.span(f"feature_engineering[{ds}]", role=role) as span:
+        engineered, variant_config = _engineer_variant(ds, cfg, span.input(frame), processing_configs, role, n_jobs)
+        return span.output(engineered), variant_config
+
+
+def _engineer_variant(ds, cfg, frame, processing_configs, role, n_jobs):
+    if processing_configs is None:
         processing_configs = defaultdict(dict)
-        freq_config = defaultdict(dict)
-
-    for ds, cfg in ds_keys.items():
-        '''
-        # Raw Numeric
-        if "raw_numeric" in cfg:
-            print(ds)
-            datasets[ds] = pd.concat([datasets[ds], apply_raw_numeric(df_temp, cfg["raw_numeric"])], axis=1)
-        '''
-
-        # Frequency Encoding
-        if "frequency_encoding" in cfg:
-            datasets, freq_config = apply_frequency_encoding(
+    datasets = {ds: frame}
+    variant_config = {}
+
+    # Frequency Encoding
+    if "frequency_encoding" in cfg:
+        datasets, freq_config = apply_frequency_encoding(
+            ds,
+            datasets,
+            cfg["frequency_encoding"],
+            role=role,
+            freq_config=processing_configs
+        )
+        variant_config['frequency_encoding'] = freq_config
+
+    # Scaling
+    if "scaling" in cfg:
+        for scale_type, cols in cfg["scaling"].items():
+            datasets, scaling_config = apply_scaling(
                 ds,
                 datasets,
-                cfg["frequency_encoding"],
-                role=role,
-                freq_config=processing_configs
-            )
-            processing_configs[ds]['frequency_encoding'] = freq_config
-
-        # Scaling
-        if "scaling" in cfg:
-            for scale_type, cols in cfg["scaling"].items():
-                datasets, scaling_config = apply_scaling(
-                    ds, 
-                    datasets, 
-                    cols, 
-                    scale_type, 
-                    role = role, 
-                    scaling_config=processing_configs)
-            processing_configs[ds][scale_type] = scaling_config
-
-        # Binning
-        if "binning" in cfg:
-            for mode, cols in cfg["binning"].items():
-                datasets, bin_config = apply_binning(
-                    ds, 
-                    datasets, 
-                    cols, 
-                    mode,
-                    role = role,
-                    bin_config = processing_configs)
-
-                processing_configs[ds][f'bin_{mode}'] = bin_config
+                cols,
+                scale_type,
+                role = role,
+                scaling_config=processing_configs)
+        variant_config[scale_type] = scaling_config
+
+    # Binning
+    if "binning" in cfg:
+        for mode, cols in cfg["binning"].items():
+            datasets, bin_config = apply_binning(
+                ds,
+                datasets,
+                cols,
+                mode,
+                role = role,
+                bin_config = processing_configs,
+                n_jobs = n_jobs)
+
+            variant_config[f'bin_{mode}'] = bin_config
 
     # One-Hot Encoding
-    one_hot_mapping = {ds: cfg["one_hot_from"] for ds, cfg in ds_keys.items() if "one_hot_from" in cfg}
-    if one_hot_mapping:
-        for target_ds, source_ds in one_hot_mapping.items():
-            datasets[target_ds], one_hot_config = apply_one_hot(target_ds, datasets[source_ds], role =role, one_hot_config = processing_configs)
-            processing_configs[target_ds]['one_hot'] = one_hot_config
+    if "one_hot_from" in cfg:
+        datasets[ds], one_hot_config = apply_one_hot(ds, frame, role=role, one_hot_config=processing_configs)
+        variant_config['one_hot'] = one_hot_config
 
     # PCA
-    pca_mapping = {ds: cfg["pca_from"] for ds, cfg in ds_keys.items() if "pca_from" in cfg}
-    if one_hot_mapping:
-        for target_ds, source_ds in pca_mapping.items():
-            datasets[target_ds], pca_config = apply_pca(target_ds, datasets[source_ds], role=role, pca_config=processing_configs)
-            processing_configs[target_ds]['pca'] = pca_config
+    if "pca_from" in cfg:
+        datasets[ds], pca_config = apply_pca(ds, frame, role=role, pca_config=processing_configs)
+        variant_config['pca'] = pca_config
+
+    return datasets[ds], (variant_config if role == 'train' else {})
+
+#--------------------------------
+def feature_engineering_pipeline(datasets, ds_keys, processing_configs=None, role = 'train',
+                                 max_workers=None, executor='thread'):
+    """
+    Engineer every variant in ds_keys, scheduling them as a dependency graph.
+
+    Base variants (ds1-ds4) are independent and start immediately; one-hot and
+    PCA variants start as soon as their `one_hot_from` / `pca_from` source has
+    finished. Fitted configs of every variant are merged into one
+    `processing_configs`.
+
+    Args:
+        datasets: mapping of variant name -> starting frame.
+        ds_keys: variant configuration (see DS_KEYS).
+        processing_configs: fitted configs, required at inference (compact
+            configs; fitted or legacy configs are converted).
+        role: 'train' fits configs, anything else applies them.
+        max_workers: pool size; defaults to one worker per ready variant
+            capped by the CPU count. The cores are split between the
+            workers, so a variant's own steps never oversubscribe them.
+        executor: 'thread' (default, frames are shared) or 'process'.
+
+    Each worker only receives its own variant's configs (none when
+    training), never the mapping the scheduler fills in as variants finish.
+    """
+    if role == 'train':
+        processing_configs = defaultdict(dict)
+    else:
+        processing_configs = compact_configs.as_compact(processing_configs, ds_keys)['datasets']
+
+    if max_workers is None:
+        max_workers = parallelism.worker_count(len(ds_keys))
+    n_jobs = parallelism.cores_per_worker(max_workers)
+    pool_cls = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+
+    pending = dict(ds_keys)
+    running = {}
+    with pool_cls(max_workers=max_workers) as pool:
+        while pending or running:
+            for ds, cfg in list(pending.items()):
+                source = variant_source(cfg)
+                if source in pending or source in running.values():
+                    continue
+                frame = datasets[source] if source is not None else datasets[ds]
+                variant_configs = None if role == 'train' else {ds: processing_configs[ds]}
+                future = pool.submit(engineer_variant, ds, cfg, frame, variant_configs, role, n_jobs)
+                running[future] = ds
+                del pending[ds]
+
+            if not running:
+                raise ValueError(f"Unresolvable dataset dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                ds = running.pop(future)
+                datasets[ds], variant_config = future.result()
+                if role == 'train':
+                    processing_configs[ds].update(variant_config)
+
+    if role == 'train':
+        processing_configs = compact_configs.compact_processing_configs(processing_configs, ds_keys)
 
     return datasets, processing_configs
@@ -1,24 +1,38 @@
 import pandas as pd
 
-def pandas_summary(df, report_path: str):
+from src.research import eda_stats
+
+def pandas_summary(df, report_path: str, stats=None):
+    """
+    Per-column summary table of `df`, read from its precomputed statistics
+    (`stats`, a frame summary of eda_stats; computed here when None).
+    """
+    if stats is None:
+        stats = eda_stats.frame_stats(df)
+    entries = stats["columns"]
+    rows = stats["rows"]
 
     summary = pd.DataFrame({
         "Type": df.dtypes,
-        "Non-Null Count": df.count(),
-        "Missing": df.isna().sum(),
-        "% Missing": df.isna().mean(),
-        "Unique Values": df.nunique(),
+        "Non-Null Count": pd.Series({col: entries[col]["count"] for col in df.columns}),
+        "Missing": pd.Series({col: entries[col]["missing"] for col in df.columns}),
+        "% Missing": pd.Series({col: entries[col]["missing"] / rows if rows else float("nan") for col in df.columns}),
+        "Unique Values": pd.Series({col: entries[col]["unique"] for col in df.columns}),
     })
 
     # Numeric summaries
-    numeric_desc = df.describe(include="number").T[
-        ["min", "max", "mean", "std"]
-    ]
+    numeric_desc = pd.DataFrame(
+        {col: {key: entries[col][key] for key in ["min", "max", "mean", "std"]}
+         for col in df.select_dtypes(include="number").columns},
+        index=["min", "max", "mean", "std"],
+    ).T
 
     # Categorical summaries
-    categorical_desc = df.describe(include="object").T[
-        ["top", "freq"]
-    ].rename(columns={"top": "Mode", "freq": "Mode Count"})
+    categorical_desc = pd.DataFrame(
+        {col: {"Mode": entries[col]["mode"], "Mode Count": entries[col]["mode_count"]}
+         for col in df.select_dtypes(include="object").columns},
+        index=["Mode", "Mode Count"],
+    ).T
 
     # Merge everything
     summary = summary.join(numeric_desc, how="left")
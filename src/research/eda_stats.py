@@ -0,0 +1,508 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import stats
+
+from src.artifacts.preprocessing import distinct_sketch, quantile_sketch
+from src.utils.storage import path_validate
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout changes; load_stats_store refuses other versions.
+SCHEMA_VERSION = 1
+
+# Columns with at most this many non-missing values keep them all: their
+# quantiles, MAD, outliers and normality tests are exact (Shapiro-Wilk
+# only runs on these). Larger columns are summarised from a quantile sketch.
+EXACT_ROWS = 5_000
+# Rank error of the quantile sketches (fraction of the rows).
+SKETCH_ERROR = 0.001
+# Numeric columns keep their value counts up to this many distinct values
+# (categorical columns always do); past it their distinct count is estimated.
+MAX_TRACKED_LEVELS = 1_000
+# Precision of the distinct-count sketches (2 ** p one-byte registers).
+DISTINCT_PRECISION = 14
+
+
+# ------------------------------------------------------------------
+# Column kinds
+# ------------------------------------------------------------------
+def _is_numeric(dtype):
+    """Numeric columns (bools and categories with numeric labels included) convert to float."""
+    if isinstance(dtype, pd.SparseDtype):
+        dtype = dtype.subtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.api.types.is_numeric_dtype(dtype.categories.dtype)
+    return pd.api.types.is_numeric_dtype(dtype)
+
+
+def _is_categorical(dtype):
+    if isinstance(dtype, pd.SparseDtype):
+        dtype = dtype.subtype
+    return not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+
+
+def _float_values(frame):
+    return np.column_stack([frame[col].to_numpy(dtype=float, na_value=np.nan) for col in frame.columns]) \
+        if len(frame.columns) else np.empty((len(frame), 0))
+
+
+# ------------------------------------------------------------------
+# Mergeable accumulators
+# ------------------------------------------------------------------
+def _chunk_moments(values):
+    """Count, mean and central moment sums (M2, M3, M4) of every column, NaNs skipped."""
+    present = ~np.isnan(values)
+    n = present.sum(axis=0).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(present, values, 0.0).sum(axis=0) / n
+    deviations = np.where(present, values - mean, 0.0)
+    return {
+        "n": n,
+        "mean": mean,
+        "m2": (deviations ** 2).sum(axis=0),
+        "m3": (deviations ** 3).sum(axis=0),
+        "m4": (deviations ** 4).sum(axis=0),
+        "min": np.where(present, values, np.inf).min(axis=0, initial=np.inf),
+        "max": np.where(present, values, -np.inf).max(axis=0, initial=-np.inf),
+    }
+
+
+def _merge_moments(a, b):
+    """Combine the moments of two disjoint parts (Pebay's pairwise update)."""
+    na, nb = a["n"], b["n"]
+    n = na + nb
+    safe_n = np.maximum(n, 1)
+    both = (na > 0) & (nb > 0)
+    delta = np.where(both, b["mean"] - a["mean"], 0.0)
+    mean = np.where(na == 0, b["mean"], np.where(nb == 0, a["mean"], a["mean"] + delta * nb / safe_n))
+    m2 = a["m2"] + b["m2"] + delta ** 2 * na * nb / safe_n
+    m3 = (
+        a["m3"] + b["m3"]
+        + delta ** 3 * na * nb * (na - nb) / safe_n ** 2
+        + 3 * delta * (na * b["m2"] - nb * a["m2"]) / safe_n
+    )
+    m4 = (
+        a["m4"] + b["m4"]
+        + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / safe_n ** 3
+        + 6 * delta ** 2 * (na ** 2 * b["m2"] + nb ** 2 * a["m2"]) / safe_n ** 2
+        + 4 * delta * (na * b["m3"] - nb * a["m3"]) / safe_n
+    )
+    return {
+        "n": n, "mean": mean, "m2": m2, "m3": m3, "m4": m4,
+        "min": np.minimum(a["min"], b["min"]),
+        "max": np.maximum(a["max"], b["max"]),
+    }
+
+
+class FrameStats:
+    """
+    Mergeable single-pass statistics of a frame.
+
+    One update per chunk accumulates, for every column, the counts and
+    value counts; for numeric columns a distinct-count sketch, the moments,
+    min/max, a quantile sketch (plus the values themselves while the column is
+    small, see EXACT_ROWS); and, for every pair of numeric columns, the
+    co-moments of their pairwise-complete rows, from which the Pearson
+    matrix is read. Stats of separate chunks or shards combine with merge.
+    """
+
+    def __init__(self, dtypes, shift, sketch_error=SKETCH_ERROR, seed=0):
+        """
+        Args:
+            dtypes: {column: dtype} of the frame.
+            shift: per numeric column offset subtracted before accumulating
+                the co-moments (e.g. a sample mean), for numeric stability.
+                Merged stats must share it.
+        """
+        self.dtypes = dict(dtypes)
+        self.numeric = [col for col, dtype in self.dtypes.items() if _is_numeric(dtype)]
+        self.categorical = {col for col, dtype in self.dtypes.items() if _is_categorical(dtype)}
+        self.shift = np.asarray(shift, dtype=float)
+        self.sketch_error = sketch_error
+        self.seed = seed
+
+        p = len(self.numeric)
+        self.rows = 0
+        self.missing = {col: 0 for col in self.dtypes}
+        self.counts = {col: pd.Series(dtype=float) for col in self.dtypes}
+        self.distinct = [distinct_sketch.HyperLogLog(DISTINCT_PRECISION) for _ in range(p)]
+        self.moments = _chunk_moments(np.empty((0, p)))
+        k = quantile_sketch.k_for_error(sketch_error)
+        self.sketches = [quantile_sketch.KLLSketch(k, seed=seed + j) for j in range(p)]
+        self.samples = [np.empty(0) for _ in range(p)]
+        self.pair_n = np.zeros((p, p))
+        self.pair_sum = np.zeros((p, p))
+        self.pair_sq = np.zeros((p, p))
+        self.cross = np.zeros((p, p))
+
+    @classmethod
+    def for_frame(cls, frame, **kwargs):
+        """Empty stats for frames shaped like `frame`, shifted by its numeric means."""
+        numeric = [col for col in frame.columns if _is_numeric(frame[col].dtype)]
+        shift = np.nan_to_num(np.nanmean(_float_values(frame[numeric]), axis=0)) if len(frame) else np.zeros(len(numeric))
+        return cls(frame.dtypes.to_dict(), shift, **kwargs)
+
+    def empty_like(self, seed=None):
+        return FrameStats(self.dtypes, self.shift, self.sketch_error, self.seed if seed is None else seed)
+
+    def update(self, chunk):
+        """Accumulate one chunk (same columns as the stats)."""
+        self.rows += len(chunk)
+        for col in self.dtypes:
+            series = chunk[col]
+            self.missing[col] += int(series.isna().sum())
+            counts = self.counts[col]
+            if counts is not None:
+                counts = counts.add(series.value_counts(), fill_value=0)
+                if col not in self.categorical and len(counts) > MAX_TRACKED_LEVELS:
+                    counts = None
+                self.counts[col] = counts
+
+        values = _float_values(chunk[self.numeric])
+        self.moments = _merge_moments(self.moments, _chunk_moments(values))
+        for j in range(len(self.numeric)):
+            column = values[:, j]
+            column = column[~np.isnan(column)]
+            self.distinct[j].update(column)
+            self.sketches[j].update(column)
+            if self.samples[j] is not None:
+                self.samples[j] = np.concatenate([self.samples[j], column])
+                if len(self.samples[j]) > EXACT_ROWS:
+                    self.samples[j] = None
+
+        shifted = values - self.shift
+        present = (~np.isnan(shifted)).astype(float)
+        filled = np.nan_to_num(shifted)
+        self.pair_n += present.T @ present
+        self.pair_sum += filled.T @ present
+        self.pair_sq += (filled ** 2).T @ present
+        self.cross += filled.T @ filled
+        return self
+
+    def merge(self, other):
+        """Fold the stats of another part of the same frame into these."""
+        if not np.array_equal(self.shift, other.shift):
+            raise ValueError("Only stats sharing the same shift can be merged")
+        self.rows += other.rows
+        for col in self.dtypes:
+            self.missing[col] += other.missing[col]
+            if self.counts[col] is None or other.counts[col] is None:
+                self.counts[col] = None
+            else:
+                counts = self.counts[col].add(other.counts[col], fill_value=0)
+                if col not in self.categorical and len(counts) > MAX_TRACKED_LEVELS:
+                    counts = None
+                self.counts[col] = counts
+        self.moments = _merge_moments(self.moments, other.moments)
+        for j in range(len(self.numeric)):
+            self.distinct[j].merge(other.distinct[j])
+            self.sketches[j].merge(other.sketches[j])
+            if self.samples[j] is None or other.samples[j] is None:
+                self.samples[j] = None
+            else:
+                self.samples[j] = np.concatenate([self.samples[j], other.samples[j]])
+                if len(self.samples[j]) > EXACT_ROWS:
+                    self.samples[j] = None
+        self.pair_n += other.pair_n
+        self.pair_sum += other.pair_sum
+        self.pair_sq += other.pair_sq
+        self.cross += other.cross
+        return self
+
+    # --------------------------------------------------------------
+    # Results
+    # --------------------------------------------------------------
+    def _numeric_stats(self, j):
+        n = int(self.moments["n"][j])
+        sample = self.samples[j]
+        if sample is not None:
+            return exact_stats(sample)
+        if n == 0:
+            return empty_stats()
+
+        mean = self.moments["mean"][j]
+        m2, m3, m4 = self.moments["m2"][j] / n, self.moments["m3"][j] / n, self.moments["m4"][j] / n
+        var = self.moments["m2"][j] / (n - 1) if n > 1 else np.nan
+        std = np.sqrt(var)
+        skew = m3 / m2 ** 1.5 if m2 > 0 else np.nan
+        kurtosis = m4 / m2 ** 2 - 3 if m2 > 0 else np.nan
+
+        sketch = self.sketches[j]
+        values, weights = sketch.weighted_items()
+        q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        outliers = int(round(sketch.rank(lower) + n - sketch.rank(upper, side="right")))
+
+        deviations = np.abs(values - median)
+        order = np.argsort(deviations, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        mad = deviations[order][np.searchsorted(cumulative, 0.5 * cumulative[-1])] / stats.norm.ppf(0.75)
+
+        if std > 0:
+            # Largest gap between the sketch CDF and the fitted normal CDF.
+            cdf_right = np.cumsum(weights) / n
+            cdf_left = cdf_right - weights / n
+            normal = stats.norm.cdf((values - mean) / std)
+            ks = max(np.max(cdf_right - normal), np.max(normal - cdf_left))
+            ks_p = stats.kstwo.sf(ks, n)
+            jb = n / 6 * (skew ** 2 + kurtosis ** 2 / 4)
+            jb_p = stats.chi2.sf(jb, 2)
+        else:
+            ks_p = jb_p = np.nan
+
+        return {
+            "mean": mean,
+            "median": median,
+            "std": std,
+            "var": var,
+            "min": self.moments["min"][j],
+            "max": self.moments["max"][j],
+            "q1": q1,
+            "q3": q3,
+            "iqr": iqr,
+            "mad": mad,
+            "skew": skew,
+            "kurtosis": kurtosis,
+            "ks_p": ks_p,
+            "jb_p": jb_p,
+            "shapiro_p": np.nan,
+            "outliers": outliers,
+            "outlier_pct": outliers / n * 100,
+        }
+
+    def correlation(self):
+        """Pearson matrix of the numeric columns over pairwise-complete rows (like DataFrame.corr)."""
+        n = self.pair_n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sx, sy = self.pair_sum, self.pair_sum.T
+            var_x = self.pair_sq - sx ** 2 / n
+            var_y = self.pair_sq.T - sy ** 2 / n
+            cov = self.cross - sx * sy / n
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        return np.clip(corr, -1, 1)
+
+    def summary(self):
+        """
+        {"rows", "columns": {column: entry}, "correlation": {"columns", "pearson"}}
+        (see column_entry for the entries).
+        """
+        numeric_index = {col: j for j, col in enumerate(self.numeric)}
+        columns = {}
+        for col, dtype in self.dtypes.items():
+            count = self.rows - self.missing[col]
+            counts = self.counts[col]
+            # Exact while the value counts are tracked, estimated past MAX_TRACKED_LEVELS.
+            unique = len(counts) if counts is not None else int(round(self.distinct[numeric_index[col]].estimate()))
+            entry = {
+                "dtype": str(dtype),
+                "count": count,
+                "missing": self.missing[col],
+                "unique": unique,
+                "numeric": col in numeric_index,
+                "counts": None,
+                "mode": None,
+                "mode_count": None,
+            }
+            if counts is not None and len(counts):
+                counts = counts.sort_values(ascending=False, kind="stable")
+                entry["counts"] = {"values": counts.index.tolist(), "counts": counts.astype(int).tolist()}
+                entry["mode"] = counts.index[0]
+                entry["mode_count"] = int(counts.iloc[0])
+            if col in numeric_index:
+                entry.update(self._numeric_stats(numeric_index[col]))
+            columns[col] = entry
+        return {
+            "rows": self.rows,
+            "columns": columns,
+            "correlation": {"columns": list(self.numeric), "pearson": self.correlation()},
+        }
+
+
+def empty_stats():
+    return {
+        "mean": np.nan,
+        "median": np.nan,
+        "std": np.nan,
+        "var": np.nan,
+        "min": np.nan,
+        "max": np.nan,
+        "q1": np.nan,
+        "q3": np.nan,
+        "iqr": np.nan,
+        "mad": np.nan,
+        "skew": np.nan,
+        "kurtosis": np.nan,
+        "ks_p": np.nan,
+        "jb_p": np.nan,
+        "shapiro_p": np.nan,
+        "outliers": 0,
+        "outlier_pct": 0.0,
+    }
+
+
+def exact_stats(values):
+    """Descriptive, robust and normality statistics from every value of a column."""
+    s = pd.Series(values, dtype=float).dropna()
+    n = len(s)
+    if n == 0:
+        return empty_stats()
+
+    q1, q3 = np.percentile(s, [25, 75])
+    iqr = q3 - q1
+    lower = q1 - 1.5 * iqr
+    upper = q3 + 1.5 * iqr
+
+    outliers = int(((s < lower) | (s > upper)).sum())
+
+    std = s.std()
+    # Normality tests
+    if std > 0:
+        _, ks_p = stats.kstest((s - s.mean()) / std, "norm")
+        _, jb_p = stats.jarque_bera(s)
+    else:
+        ks_p = np.nan
+        jb_p = np.nan
+
+    if 3 <= n <= EXACT_ROWS:
+        _, shapiro_p = stats.shapiro(s)
+    else:
+        shapiro_p = np.nan
+
+    return {
+        "mean": s.mean(),
+        "median": s.median(),
+        "std": std,
+        "var": s.var(),
+        "min": s.min(),
+        "max": s.max(),
+        "q1": q1,
+        "q3": q3,
+        "iqr": iqr,
+        "mad": stats.median_abs_deviation(s, scale="normal"),
+        "skew": stats.skew(s),
+        "kurtosis": stats.kurtosis(s),
+        "ks_p": ks_p,
+        "jb_p": jb_p,
+        "shapiro_p": shapiro_p,
+        "outliers": outliers,
+        "outlier_pct": (outliers / n) * 100,
+    }
+
+
+# ------------------------------------------------------------------
+# Frames
+# ------------------------------------------------------------------
+def _shard_stats(template, frame, chunksize, seed):
+    stats_ = template.empty_like(seed=seed)
+    for start in range(0, len(frame), chunksize):
+        stats_.update(frame.iloc[start:start + chunksize])
+    return stats_
+
+
+def frame_stats(frame, chunksize=100_000, n_shards=1, n_jobs=1):
+    """
+    Summary (see FrameStats.summary) of a frame in a single pass: rows are
+    split into `n_shards` shards, read in chunks of `chunksize` rows, and
+    the shard stats merged.
+    """
+    template = FrameStats.for_frame(frame.iloc[:chunksize])
+    bounds = np.linspace(0, len(frame), max(1, n_shards) + 1).astype(int)
+    shards = [frame.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    parts = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_shard_stats)(template, shard, chunksize, i * len(template.numeric))
+        for i, shard in enumerate(shards)
+    )
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    return merged.summary()
+
+
+def series_stats(series):
+    """Column entry of a single series (see FrameStats.summary)."""
+    frame = series.to_frame(name=series.name if series.name is not None else 0)
+    return next(iter(frame_stats(frame)["columns"].values()))
+
+
+def compute_stats_store(frames, chunksize=100_000, n_shards=1, n_jobs=1):
+    """Stats artifact of several frames: {"schema_version", "frames": {name: summary}}."""
+    summaries = {}
+    for name, frame in frames.items():
+        logger.info(f"Computing EDA statistics of {name} {frame.shape}")
+        summaries[name] = frame_stats(frame, chunksize=chunksize, n_shards=n_shards, n_jobs=n_jobs)
+    return {"schema_version": SCHEMA_VERSION, "frames": summaries}
+
+
+# ------------------------------------------------------------------
+# Readers
+# ------------------------------------------------------------------
+def value_counts(entry):
+    """Value counts of a column entry, most frequent first (None when not tracked)."""
+    if entry["counts"] is None:
+        return None
+    return pd.Series(entry["counts"]["counts"], index=entry["counts"]["values"])
+
+
+def correlation_matrix(summary, columns=None):
+    """Pearson matrix of a frame summary, restricted to `columns` (all numeric ones by default)."""
+    names = summary["correlation"]["columns"]
+    corr = pd.DataFrame(np.asarray(summary["correlation"]["pearson"], dtype=float), index=names, columns=names)
+    return corr if columns is None else corr.loc[list(columns), list(columns)]
+
+
+# ------------------------------------------------------------------
+# Storage
+# ------------------------------------------------------------------
+def _to_json(obj):
+    if isinstance(obj, dict):
+        return {str(key): _to_json(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_json(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return _to_json(obj.tolist())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def save_stats_store(store, path):
+    """Write the stats artifact as one JSON file (NaN kept as NaN)."""
+    path_validate(path)
+    with open(path, "w") as f:
+        json.dump(_to_json(store), f)
+
+
+def load_stats_store(path):
+    with open(path) as f:
+        store = json.load(f)
+    if store.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported EDA stats schema {store.get('schema_version')} (expected {SCHEMA_VERSION}) in {path}"
+        )
+    return store
+
+
+def load_or_compute_stats_store(path, frames, sources=(), **kwargs):
+    """
+    Stats artifact at `path`, recomputed (and saved) from `frames` only when
+    it is missing or older than any of the `sources` files it summarises.
+    `frames` may be a callable returning the frames, so they are only
+    loaded when needed.
+    """
+    if os.path.exists(path) and all(
+        os.path.getmtime(path) >= os.path.getmtime(source) for source in sources if os.path.exists(source)
+    ):
+        try:
+            return load_stats_store(path)
+        except ValueError as error:
+            logger.info(f"{error}; recomputing.")
+    store = compute_stats_store(frames() if callable(frames) else frames, **kwargs)
+    save_stats_store(store, path)
+    return store
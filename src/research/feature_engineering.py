@@ -1,13 +1,15 @@
-from src.artifacts.feature_engineering_relationships import (age_minutes_played, 
-                                                             efficiency_minutes_played_relationship, 
-                                                             efficiency_points_relationship,
-                                                             points_minutes_played_relationship)
+from src.artifacts.feature_engineering_relationships import feature_registry
+from src.utils import tracing
 
-def feature_creation_pipeline(df):
 
-    df = age_minutes_played.engineering_pipeline(df)
-    df = efficiency_points_relationship.engineering_pipeline(df)
-    df = efficiency_minutes_played_relationship.engineering_pipeline(df)
-    df = points_minutes_played_relationship.engineering_pipeline(df)
+@tracing.traced()
+def feature_creation_pipeline(df, features=None):
+    """
+    Add the engineered box-score features declared in the feature registry.
 
-    return df
+    Args:
+        df: raw feature frame.
+        features: optional subset of derived features to compute; their
+            dependencies are resolved automatically.
+    """
+    return feature_registry.create_features(df, features)
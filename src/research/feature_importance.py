@@ -1,75 +1,186 @@
 import pandas as pd
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from src.artifacts.feature_importance.importance_ranking import get_tree_importance, get_permutation_importance
 from src.artifacts.feature_importance.importance_models import train_random_forest
+from src.utils import parallelism, tracing
+
+# Rows used to evaluate permutation importance; larger datasets are subsampled.
+PERMUTATION_MAX_SAMPLES = 50_000
 
-# --------------------------
-# Configure logging
-# --------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
 logger = logging.getLogger(__name__)
 
 # --------------------------
 # Feature ranking with top N selection and logging
 # --------------------------
-def rank_all_features(datasets, y, ds_keys, random_state=42, top_n=6):
-    all_rankings = {} 
-    pca_mapping = [ds for ds, cfg in ds_keys.items() if "pca_from" not in cfg]
-    
-    total_datasets = len(pca_mapping)
-    logger.info(f"Starting feature ranking for {total_datasets} datasets.")
+def _aggregate_importances(tree_importance, permutation_importance, columns):
+    importance_features = {
+        "tree": tree_importance,
+        "permutation": permutation_importance,
+    }
+    importance_df = pd.DataFrame(importance_features, index=columns)
+    importance_df["avg_rank"] = importance_df.rank(ascending=False).mean(axis=1)
+    return importance_df.sort_values("avg_rank")
+
 
-    for idx, dataset_name in enumerate(pca_mapping, start=1):
-        start_time = time.time()
-        X = datasets[dataset_name]
+def _rank_dataset(idx, total_datasets, dataset_name, X, y, random_state, top_n, n_jobs,
+                  max_samples, tol):
+    start_time = time.time()
 
-        logger.info(f"[{idx}/{total_datasets}] Processing dataset '{dataset_name}' with {X.shape[0]} samples and {X.shape[1]} features.")
+    logger.info(f"[{idx}/{total_datasets}] Processing dataset '{dataset_name}' with {X.shape[0]} samples and {X.shape[1]} features.")
 
-        # Train model
-        logger.info("  -> Training Random Forest model...")
-        model = train_random_forest(X, y, max_d=3, random_state=random_state)
-        logger.info("     Model trained.")
+    # Train model
+    logger.info("  -> Training Random Forest model...")
+    with tracing.span("ranking.train_model", dataset=dataset_name) as span:
+        model = train_random_forest(span.input(X), y, max_d=3, random_state=random_state, n_jobs=n_jobs)
+    logger.info("     Model trained.")
 
-        # Get feature importance
-        logger.info("  -> Calculating tree-based importance...")
+    # Get feature importance
+    logger.info("  -> Calculating tree-based importance...")
+    with tracing.span("ranking.tree_importance", dataset=dataset_name):
         tree_importance = get_tree_importance(model, X)
-        logger.info("     Tree importance computed.")
+    logger.info("     Tree importance computed.")
 
-        logger.info("  -> Calculating permutation importance...")
-        permutation_importance = get_permutation_importance(model, X, y, random_state=random_state)
-        logger.info("     Permutation importance computed.")
+    logger.info("  -> Calculating permutation importance...")
+    with tracing.span("ranking.permutation_importance", dataset=dataset_name) as span:
+        permutation_importance = get_permutation_importance(
+            model, span.input(X), y, random_state=random_state, n_jobs=n_jobs, max_samples=max_samples, tol=tol
+        )
+    logger.info("     Permutation importance computed.")
+
+    # Aggregate importances
+    logger.info("  -> Aggregating importance rankings...")
+    importance_df = _aggregate_importances(tree_importance, permutation_importance, X.columns)
+
+    # Select top N features
+    top_features = importance_df.head(top_n).index.tolist()
+    logger.info(f"  -> Top {top_n} features for '{dataset_name}': {top_features}")
+
+    elapsed = time.time() - start_time
+    logger.info(f"Completed dataset '{dataset_name}' in {elapsed:.2f} seconds.\n{'-'*40}")
+
+    return {
+        "random_state": random_state,
+        "features": list(X.columns),
+        "tree_importance": tree_importance,
+        "permutation_importance": permutation_importance,
+        "aggregated_ranking": importance_df,
+        "top_features": top_features,
+        "row_ids": X.index.to_numpy(),
+    }
+
+
+# --------------------------
+# Incremental ranking
+# --------------------------
+def _changed_rows(previous, X):
+    """
+    Rows of X not covered by a previous ranking, or None when the previous
+    ranking cannot be reused (no stored rows or a different feature set).
+    """
+    if previous is None or "row_ids" not in previous or previous["features"] != list(X.columns):
+        return None
+    previous_rows = pd.Index(previous["row_ids"])
+    new_rows = X.index.difference(previous_rows)
+    dropped = len(previous_rows.difference(X.index))
+    return new_rows, dropped
 
-        # Aggregate importances
-        logger.info("  -> Aggregating importance rankings...")
-        importance_features = {
-            "tree": tree_importance,
-            "permutation": permutation_importance,
-        }
-        importance_df = pd.DataFrame(importance_features, index=X.columns)
-        importance_df["avg_rank"] = importance_df.rank(ascending=False).mean(axis=1)
-        importance_df = importance_df.sort_values("avg_rank")
-
-        # Select top N features
-        top_features = importance_df.head(top_n).index.tolist()
-        logger.info(f"  -> Top {top_n} features: {top_features}")
-
-        # Store results
-        all_rankings[dataset_name] = {
-            "random_state": random_state,
-            "features": list(X.columns),
-            "tree_importance": tree_importance,
-            "permutation_importance": permutation_importance,
-            "aggregated_ranking": importance_df,
-            "top_features": top_features, 
-        }
 
-        elapsed = time.time() - start_time
-        logger.info(f"Completed dataset '{dataset_name}' in {elapsed:.2f} seconds.\n{'-'*40}")
+def _reuse_ranking(dataset_name, X, y, previous, new_rows, random_state, top_n, n_jobs,
+                   max_new_fraction):
+    """
+    Reuse a previous ranking when the appended rows cannot change its top N.
+
+    A cheap forest is fitted on the new rows only; its importances are
+    blended with the previous ones in proportion to the row counts and
+    re-ranked like a full run. The previous ranking is kept when the
+    blended top-N set matches it, so the cost grows with the new rows.
+    `new_rows` are counted since the last full ranking, not the last reuse.
+
+    Returns:
+        the reused ranking entry, or None when a full ranking is needed.
+    """
+    new_fraction = len(new_rows) / max(1, len(X))
+    if new_fraction > max_new_fraction:
+        logger.info(f"'{dataset_name}': {new_fraction:.1%} of the rows changed, full ranking needed.")
+        return None
+
+    if len(new_rows):
+        X_new, y_new = X.loc[new_rows], y.loc[new_rows]
+        if y_new.nunique() < 2:
+            logger.info(f"'{dataset_name}': appended rows hold a single class, full ranking needed.")
+            return None
+
+        model = train_random_forest(X_new, y_new, max_d=3, n_estimators=50, random_state=random_state, n_jobs=n_jobs)
+        previous_df = previous["aggregated_ranking"]
+        blended = _aggregate_importances(
+            (1 - new_fraction) * previous_df["tree"] + new_fraction * get_tree_importance(model, X_new),
+            (1 - new_fraction) * previous_df["permutation"] + new_fraction * get_permutation_importance(
+                model, X_new, y_new, n_repeats=3, random_state=random_state, n_jobs=n_jobs),
+            X.columns,
+        )
+        blended_top = blended.head(top_n).index.tolist()
+        if set(blended_top) != set(previous["top_features"]):
+            logger.info(f"'{dataset_name}': top {top_n} may change ({blended_top}), full ranking needed.")
+            return None
+
+    logger.info(f"'{dataset_name}': ranking stable with {len(new_rows)} new rows, reusing previous ranking.")
+    # row_ids stay the rows the importances were computed on, so the new
+    # fraction accumulates over appends until a full ranking is triggered.
+    return previous
+
+
+def _rank_or_reuse(idx, total_datasets, dataset_name, X, y, previous, random_state, top_n, n_jobs,
+                   max_samples, tol, max_new_fraction):
+    changed = _changed_rows(previous, X)
+    if changed is not None:
+        new_rows, dropped = changed
+        if dropped:
+            logger.info(f"'{dataset_name}': {dropped} previously ranked rows are gone, full ranking needed.")
+        else:
+            reused = _reuse_ranking(dataset_name, X, y, previous, new_rows, random_state, top_n, n_jobs,
+                                    max_new_fraction)
+            if reused is not None:
+                return reused
+    return _rank_dataset(idx, total_datasets, dataset_name, X, y, random_state, top_n, n_jobs,
+                         max_samples, tol)
+
+
+def rank_all_features(datasets, y, ds_keys, random_state=42, top_n=6,
+                      max_samples=PERMUTATION_MAX_SAMPLES, tol=None,
+                      previous_rankings=None, max_new_fraction=0.25):
+    """
+    Rank the features of every non-PCA variant.
+
+    Datasets are ranked concurrently; the cores left to each one are used
+    for its forest and its permutation importance. `max_samples` caps the
+    rows used to evaluate permutations and `tol` enables their early stop
+    (see get_permutation_importance).
+
+    With `previous_rankings` (an earlier all_rankings), a dataset whose
+    rows are a superset of the previously ranked ones keeps its previous
+    ranking unless a cheap check on the appended rows (at most
+    `max_new_fraction` of the data) suggests its top N changed.
+    """
+    previous_rankings = previous_rankings or {}
+    pca_mapping = [ds for ds, cfg in ds_keys.items() if "pca_from" not in cfg]
+
+    total_datasets = len(pca_mapping)
+    logger.info(f"Starting feature ranking for {total_datasets} datasets.")
+
+    workers = parallelism.worker_count(total_datasets)
+    n_jobs = parallelism.cores_per_worker(workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            dataset_name: pool.submit(
+                _rank_or_reuse, idx, total_datasets, dataset_name, datasets[dataset_name], y,
+                previous_rankings.get(dataset_name), random_state, top_n, n_jobs, max_samples, tol,
+                max_new_fraction
+            )
+            for idx, dataset_name in enumerate(pca_mapping, start=1)
+        }
+        all_rankings = {dataset_name: future.result() for dataset_name, future in futures.items()}
 
     logger.info("Feature ranking completed for all datasets.")
     return all_rankings
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import pandas as pd
+
+from src.utils import parallelism
+from src.utils.storage import path_validate
+
+logger = logging.getLogger(__name__)
+
+# Render cache of a figure root: {file path: input hash}.
+CACHE_FILE = ".render_cache.json"
+
+
+def input_hash(data, render, kwargs):
+    """
+    Hash of a figure's inputs: the data (values, index, column names and
+    dtypes), the render function and its keyword arguments.
+    """
+    hasher = hashlib.sha1()
+    hasher.update(f"{render.__module__}.{render.__qualname__}".encode())
+    hasher.update(json.dumps(kwargs, sort_keys=True, default=str).encode())
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    hasher.update(json.dumps([[str(c), str(t)] for c, t in data.dtypes.items()]).encode())
+    hasher.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+def figure_task(file_path, render, data, **kwargs):
+    """
+    One figure: `render(data, **kwargs)` must draw and save `file_path`.
+    `render` must be a module-level function (it runs in a worker process).
+    """
+    return {"file_path": file_path, "render": render, "data": data, "kwargs": kwargs}
+
+
+def _read_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path) as f:
+        return json.load(f)
+
+
+def _write_cache(cache_path, cache):
+    path_validate(cache_path)
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def _init_worker():
+    # Figures are only written to files: the headless backend is enough and
+    # is safe in worker processes. Set here, not at import, so the backend
+    # of the importing process (e.g. a notebook) is left alone.
+    matplotlib.use("Agg")
+
+
+def _render(task):
+    task["render"](task["data"], **task["kwargs"])
+    return task["file_path"]
+
+
+def render_figures(tasks, output_path, max_workers=None, force=False):
+    """
+    Render figure tasks in a process pool, skipping every figure whose file
+    exists and whose input hash is the one recorded at its last render.
+
+    Args:
+        tasks: figure_task dicts.
+        output_path: figure root; holds the render cache (CACHE_FILE).
+        max_workers: pool size; defaults to one worker per figure to render
+            capped by the available cores.
+        force: render every figure regardless of the cache.
+
+    Returns:
+        list of the rendered file paths.
+    """
+    cache_path = os.path.join(output_path, CACHE_FILE)
+    cache = _read_cache(cache_path)
+
+    pending = []
+    for task in tasks:
+        digest = input_hash(task["data"], task["render"], task["kwargs"])
+        if not force and cache.get(task["file_path"]) == digest and os.path.exists(task["file_path"]):
+            continue
+        pending.append((task, digest))
+
+    logger.info(
+        f"Rendering {len(pending)} figures ({len(tasks) - len(pending)} unchanged) under {output_path}"
+    )
+
+    rendered = []
+    if not pending:
+        return rendered
+
+    if max_workers is None:
+        max_workers = parallelism.worker_count(len(pending))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(_render, task): digest for task, digest in pending}
+            for future in as_completed(futures):
+                file_path = future.result()
+                cache[file_path] = futures[future]
+                rendered.append(file_path)
+    finally:
+        # Figures rendered before a failure are not redone on the next run.
+        _write_cache(cache_path, cache)
+
+    return rendered
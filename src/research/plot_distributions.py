@@ -1,101 +1,52 @@
 import numpy as np
+from src.research import eda_stats, figure_rendering
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
 
 from src.utils.storage import path_validate
 
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)  # change to DEBUG for more detail
 
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter(
-        "[%(levelname)s] %(name)s - %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+FIGURE_DPI = 300
+# Pair plots above this many rows switch to hexbin panels ('auto' mode) or
+# are drawn on a sample of this many rows ('sample' mode).
+PAIRPLOT_MAX_ROWS = 5_000
 
 
 
 def compute_stats(series):
     """Compute descriptive, robust, and normality statistics."""
-    s = series.dropna()
-    n = len(s)
-
-    if n == 0:
+    if series.dropna().empty:
         logger.warning(f"No data available for series '{series.name}'")
-        return {
-            "mean": np.nan,
-            "median": np.nan,
-            "std": np.nan,
-            "var": np.nan,
-            "min": np.nan,
-            "max": np.nan,
-            "iqr": np.nan,
-            "mad": np.nan,
-            "skew": np.nan,
-            "kurtosis": np.nan,
-            "ks_p": np.nan,
-            "jb_p": np.nan,
-            "shapiro_p": np.nan,
-            "outliers": 0,
-            "outlier_pct": 0.0,
-        }
-
-    logger.debug(f"Computing stats for '{series.name}' (n={n})")
-
-    q1, q3 = np.percentile(s, [25, 75])
-    iqr = q3 - q1
-    lower = q1 - 1.5 * iqr
-    upper = q3 + 1.5 * iqr
-
-    outliers = ((s < lower) | (s > upper)).sum()
-
-    std = s.std()
-    var = s.var()
-    mad = stats.median_abs_deviation(s, scale="normal")
-
-    # Normality tests
-    if std > 0:
-        _, ks_p = stats.kstest((s - s.mean()) / std, "norm")
-        _, jb_p = stats.jarque_bera(s)
-    else:
-        ks_p = np.nan
-        jb_p = np.nan
+        return eda_stats.empty_stats()
 
-    if 3 <= n <= 5000:
-        _, shapiro_p = stats.shapiro(s)
-    else:
-        shapiro_p = np.nan
-
-    return {
-        "mean": s.mean(),
-        "median": s.median(),
-        "std": std,
-        "var": var,
-        "min": s.min(),
-        "max": s.max(),
-        "iqr": iqr,
-        "mad": mad,
-        "skew": stats.skew(s),
-        "kurtosis": stats.kurtosis(s),
-        "ks_p": ks_p,
-        "jb_p": jb_p,
-        "shapiro_p": shapiro_p,
-        "outliers": outliers,
-        "outlier_pct": (outliers / n) * 100,
-    }
-
-
-def plot_continuous(series, base_path, bins=30):
-    """Plot histogram, KDE, boxplot, and extended statistics."""
+    logger.debug(f"Computing stats for '{series.name}'")
+    return eda_stats.exact_stats(series.to_numpy(dtype=float, na_value=np.nan))
+
+
+def continuous_plot_path(base_path, name):
+    return f"{base_path}numerical/{name}_distribution.png"
+
+
+def categorical_plot_path(base_path, name):
+    return f"{base_path}categorical/{name}_distribution.png"
+
+
+def pairplot_path(output_path):
+    return f"{output_path}pair_plots/all_pair_plots.png"
+
+
+def plot_continuous(series, base_path, bins=30, dpi=FIGURE_DPI, stats=None):
+    """
+    Plot histogram, KDE, boxplot, and extended statistics.
+    `stats` are the column's precomputed statistics (computed when None).
+    """
     logger.info(f"Generating continuous plot for '{series.name}'")
 
     s = series.dropna()
-    stats_dict = compute_stats(series)
+    stats_dict = compute_stats(series) if stats is None else stats
 
     fig, axes = plt.subplots(
         nrows=2,
@@ -133,55 +84,83 @@ def plot_continuous(series, base_path, bins=30):
 
     plt.tight_layout()
 
-    file_path = f"{base_path}numerical/{series.name}_distribution.png"
+    file_path = continuous_plot_path(base_path, series.name)
     path_validate(file_path)
-    plt.savefig(file_path, dpi=300)
+    plt.savefig(file_path, dpi=dpi)
     plt.close(fig)
 
     logger.info(f"Saved plot : {file_path}")
 
 
-def plot_categorical(series, base_path):
-    """Plot full categorical distribution (no cardinality cutoff)."""
-    logger.info(f"Generating categorical plot for '{series.name}'")
-
-    s = series.dropna()
-    order = s.value_counts().index
+def plot_counts(counts, name, base_path, dpi=FIGURE_DPI):
+    """Plot a categorical distribution from its value counts, most frequent first."""
+    logger.info(f"Generating categorical plot for '{name}'")
 
     plt.figure(figsize=(8, 4))
-    sns.countplot(x=s, order=order)
+    sns.barplot(x=[str(value) for value in counts.index], y=counts.to_numpy(), color=sns.color_palette()[0])
 
-    plt.title(f"Distribution of {series.name}")
-    plt.xlabel(series.name)
+    plt.title(f"Distribution of {name}")
+    plt.xlabel(name)
     plt.ylabel("Count")
     plt.xticks(rotation=45, ha="right")
 
     plt.tight_layout()
 
-    file_path = f"{base_path}categorical/{series.name}_distribution.png"
+    file_path = categorical_plot_path(base_path, name)
     path_validate(file_path)
-    plt.savefig(file_path, dpi=300, bbox_inches="tight")
+    plt.savefig(file_path, dpi=dpi, bbox_inches="tight")
     plt.close()
     logger.info(f"Saved plot: {file_path}")
 
 
-def all_pairplots(df, output_path):
-    """Generate pair plots for all numeric variables."""
-    logger.info("Generating pair plots (this may take a while)")
-
-    sns.pairplot(df, diag_kind="kde", corner=True)
+def plot_categorical(series, base_path, dpi=FIGURE_DPI):
+    """Plot full categorical distribution (no cardinality cutoff)."""
+    plot_counts(series.dropna().value_counts(), series.name, base_path, dpi=dpi)
+
+
+def all_pairplots(df, output_path, mode="auto", max_rows=PAIRPLOT_MAX_ROWS, dpi=FIGURE_DPI,
+                  random_state=42):
+    """
+    Generate pair plots for all numeric variables.
+
+    Args:
+        mode: 'scatter' draws every row, 'sample' a random sample of
+            `max_rows` rows, 'hexbin' hexbin panels with histogram diagonals
+            over every row. 'auto' is 'scatter' up to `max_rows` rows and
+            'hexbin' above.
+    """
+    if mode == "auto":
+        mode = "scatter" if len(df) <= max_rows else "hexbin"
+    logger.info(f"Generating pair plots ({mode}, {len(df)} rows)")
+
+    if mode == "sample" and len(df) > max_rows:
+        df = df.sample(n=max_rows, random_state=random_state)
+
+    if mode == "hexbin":
+        grid = sns.PairGrid(df.select_dtypes(include="number"), corner=True)
+        grid.map_diag(sns.histplot, bins=30)
+        grid.map_lower(plt.hexbin, gridsize=30, mincnt=1, cmap="viridis")
+    else:
+        sns.pairplot(df, diag_kind="kde", corner=True)
 
-    file_path = f"{output_path}pair_plots/all_pair_plots.png"
+    file_path = pairplot_path(output_path)
     path_validate(file_path)
 
     plt.tight_layout()
-    plt.savefig(file_path, dpi=300)
+    plt.savefig(file_path, dpi=dpi)
     plt.close()
     logger.info(f"Saved pair plots : {file_path}")
 
 
-def generate_plots(df, output_path):
-    """Run full EDA plot generation."""
+def generate_plots(df, output_path, max_workers=None, force=False, pairplot_mode="auto", stats=None):
+    """
+    Run full EDA plot generation.
+
+    Figures are rendered in parallel and only when their input columns
+    changed since the last run (see figure_rendering.render_figures).
+    Statistics and value counts are read from `stats`, the frame summary
+    of eda_stats (computed in one pass when None).
+    """
     logger.info("Starting EDA plot generation")
 
     categorical_nominal_columns = [
@@ -234,14 +213,33 @@ def generate_plots(df, output_path):
         + engineered_numerical_columns
     )
 
+    if stats is None:
+        stats = eda_stats.frame_stats(df)
+    entries = stats["columns"]
+
+    tasks = []
     for col in categorical_columns:
-        logger.debug(f"Processing categorical column: {col}")
-        plot_categorical(df[col], output_path)
+        counts = eda_stats.value_counts(entries[col])
+        if counts is None:
+            task = figure_rendering.figure_task(
+                categorical_plot_path(output_path, col), plot_categorical, df[col], base_path=output_path
+            )
+        else:
+            task = figure_rendering.figure_task(
+                categorical_plot_path(output_path, col), plot_counts, counts, name=col, base_path=output_path
+            )
+        tasks.append(task)
 
     for col in numerical_columns:
-        logger.debug(f"Processing numerical column: {col}")
-        plot_continuous(df[col], output_path)
-
-    all_pairplots(df, output_path)
+        column_stats = {key: value for key, value in entries[col].items() if key != "counts"}
+        tasks.append(figure_rendering.figure_task(
+            continuous_plot_path(output_path, col), plot_continuous, df[col],
+            base_path=output_path, stats=column_stats
+        ))
+    tasks.append(figure_rendering.figure_task(
+        pairplot_path(output_path), all_pairplots, df, output_path=output_path, mode=pairplot_mode
+    ))
+
+    figure_rendering.render_figures(tasks, output_path, max_workers=max_workers, force=force)
 
     logger.info("EDA plot generation completed")
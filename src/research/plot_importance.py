@@ -5,13 +5,6 @@ import os
 
 sns.set_theme(style="whitegrid")  # nicer plots
 
-# --------------------------
-# Logging setup
-# --------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # --------------------------
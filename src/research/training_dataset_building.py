@@ -1,4 +1,9 @@
 from collections import defaultdict
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 def dataset_building(datasets, all_rankings, y, role='train'):
     '''
@@ -11,17 +16,26 @@ def dataset_building(datasets, all_rankings, y, role='train'):
 
     for dataset_name, ranking_info in all_rankings.items():
         top_features = list(ranking_info['top_features'])
-        data_frame = datasets[dataset_name].copy()
-        all_bool = all(data_frame[col].dtype == bool for col in data_frame.columns)
+        data_frame = datasets[dataset_name].copy(deep=False)
+        all_bool = all(pd.api.types.is_bool_dtype(data_frame[col]) for col in data_frame.columns)
         missing_cols = set(top_features) - set(data_frame.columns)
-
-        print(dataset_name)
-        print(f'missing columns: \n{missing_cols}') if missing_cols else print('no missing columns')
         fill_value = False if all_bool else 0
+
+        if missing_cols:
+            logger.info(f"{dataset_name}: ranked features missing from the dataset, filled with {fill_value}: {missing_cols}")
+        else:
+            logger.debug(f"{dataset_name}: no missing columns")
         for col in missing_cols:
             data_frame[col] = fill_value
 
         data_frame = data_frame[top_features]
+        # Sparse one-hot variants (ds5/ds6): only the kept columns are densified.
+        # The experiments always get dense frames: a handful of top features
+        # gains nothing from CSR, and their imputer/model pipelines are dense.
+        data_frame = data_frame.astype({
+            col: dtype.subtype for col, dtype in data_frame.dtypes.items()
+            if isinstance(dtype, pd.SparseDtype)
+        })
 
         # Add y only for train/test
         if role in ('train', 'test'):
@@ -29,9 +43,10 @@ def dataset_building(datasets, all_rankings, y, role='train'):
 
         ds[dataset_name] = data_frame
 
+    # PCA variants are not ranked: every component is kept.
     for dataset_name in ['ds7', 'ds8', 'ds9', 'ds10']:
-        if dataset_name in all_rankings:
-            data_frame = datasets[dataset_name].copy()
+        if dataset_name in datasets:
+            data_frame = datasets[dataset_name].copy(deep=False)
 
             if role in ('train', 'test'):
                 data_frame['target'] = y
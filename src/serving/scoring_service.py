@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+import src.preprocessing.pre_processing as pre_processing
+import src.modeling.modeling as modeling
+from src.modeling.model_registry import ModelRegistry
+from src.utils import tracing
+
+
+# ------------------------------------------------------------------
+# Logging configuration
+# ------------------------------------------------------------------
+LOGGER = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------
+# Scoring service
+# ------------------------------------------------------------------
+class UnknownModelError(LookupError):
+    """The requested (version, dataset) pair has no trained model."""
+
+
+class ScoringService:
+    """
+    In-process scorer that keeps the fitted transforms and estimators warm
+    between requests.
+
+    Requests use the default (version, dataset) pair unless they name
+    another one. With a model registry, every registered version can be
+    served side by side: estimators are loaded on first use and only the
+    most recently used ones stay loaded (see ModelRegistry). Unregistered pairs fall
+    back to the best_model pickle of `results_path`, and at most
+    `max_unregistered` of them stay loaded (LRU). Pairs that are neither
+    registered nor trained on disk raise UnknownModelError.
+    """
+
+    def __init__(
+        self,
+        results_path: str,
+        version: str,
+        selected_ds: str,
+        threshold: float = 0.5,
+        registry: Optional[ModelRegistry] = None,
+        max_unregistered: int = 4,
+    ) -> None:
+        self.results_path = results_path
+        self.version = version
+        self.selected_ds = selected_ds
+        self.threshold = threshold
+        self.registry = registry
+        self.max_unregistered = max_unregistered
+        self._unregistered: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Fail at startup, not on the first request, when the default is missing.
+        self.estimator(version, selected_ds)
+
+        LOGGER.info(
+            "Scoring service ready | version=%s | dataset=%s | threshold=%.2f",
+            version,
+            selected_ds,
+            threshold,
+        )
+
+    def _is_trained(self, version: str, selected_ds: str) -> bool:
+        """
+        Whether an unregistered pair has its training artifacts on disk.
+        Only plain directory names are accepted, so request strings never
+        reach paths outside the results directories.
+        """
+        if selected_ds not in pre_processing.DS_KEYS:
+            return False
+        if not version or os.path.basename(version) != version or version in (".", ".."):
+            return False
+        return (
+            os.path.isdir(f"training_parameter_results/{version}")
+            and os.path.exists(f"{self.results_path}{version}/best_model_{selected_ds}.pkl")
+        )
+
+    def estimator(self, version: str, selected_ds: str):
+        """Estimator of (version, dataset), from the registry when registered."""
+        if self.registry is not None and self.registry.entry(version, selected_ds):
+            return self.registry.get(version, selected_ds)
+
+        if not isinstance(version, str) or not isinstance(selected_ds, str) \
+                or not self._is_trained(version, selected_ds):
+            raise UnknownModelError(f"No trained model for version={version!r}, dataset={selected_ds!r}")
+
+        key = (version, selected_ds)
+        with self._lock:
+            if key in self._unregistered:
+                self._unregistered.move_to_end(key)
+                return self._unregistered[key]
+
+        model = modeling.load_best_estimator(self.results_path, version, selected_ds)
+        with self._lock:
+            self._unregistered[key] = model
+            while len(self._unregistered) > self.max_unregistered:
+                self._unregistered.popitem(last=False)
+        return model
+
+    def warm_up(self, X_raw: pd.DataFrame) -> None:
+        """Load the transform artifacts by scoring a sample batch."""
+        self.score(X_raw.head(1))
+
+    @tracing.traced()
+    def score(
+        self,
+        X_raw: pd.DataFrame,
+        version: Optional[str] = None,
+        selected_ds: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Score raw rows in the blind_test_data.csv schema (indexed by row_id).
+        """
+        version = version or self.version
+        selected_ds = selected_ds or self.selected_ds
+        # Resolved first: unknown pairs never reach the artifact paths.
+        model = self.estimator(version, selected_ds)
+        X_infer = pre_processing.inference_transform(
+            X_raw, version, selected_ds
+        )
+        return modeling.predict_frame(model, X_infer, self.threshold)
+
+    def score_records(
+        self,
+        records: List[Dict[str, Any]],
+        version: Optional[str] = None,
+        selected_ds: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Score JSON-style records and return a JSON-serializable result."""
+        X_raw = pd.DataFrame.from_records(records)
+        if "row_id" in X_raw.columns:
+            X_raw = X_raw.set_index("row_id")
+
+        version = version or self.version
+        selected_ds = selected_ds or self.selected_ds
+        results = self.score(X_raw, version, selected_ds)
+        return {
+            "version": version,
+            "dataset": selected_ds,
+            "threshold": self.threshold,
+            "row_id": results.index.tolist(),
+            "prediction_proba": results["prediction_proba"].astype(float).tolist(),
+            "prediction": results["prediction"].astype(bool).tolist(),
+        }
+
+
+# ------------------------------------------------------------------
+# HTTP endpoint
+# ------------------------------------------------------------------
+def _make_handler(service: ScoringService):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        """
+        POST /score  body: {"rows": [{...}, ...], "version": ..., "dataset": ...}
+                     (version / dataset optional) or a list of rows
+        GET  /health
+        """
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self._send_json(200, {
+                    "status": "ok",
+                    "version": service.version,
+                    "dataset": service.selected_ds,
+                    "registered": (
+                        service.registry.versions()
+                        if service.registry is not None else {}
+                    ),
+                })
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/score":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"[]")
+                if isinstance(payload, dict):
+                    result = service.score_records(
+                        payload["rows"],
+                        payload.get("version"),
+                        payload.get("dataset"),
+                    )
+                else:
+                    result = service.score_records(payload)
+            except UnknownModelError as exc:
+                LOGGER.warning("Unknown model requested: %s", exc)
+                self._send_json(404, {"error": str(exc)})
+                return
+            except (ValueError, KeyError, TypeError) as exc:
+                LOGGER.warning("Rejected scoring request: %s", exc)
+                self._send_json(400, {"error": str(exc)})
+                return
+            except Exception:
+                LOGGER.exception("Scoring request failed")
+                self._send_json(500, {"error": "internal error"})
+                return
+
+            result["latency_ms"] = (time.perf_counter() - start) * 1000
+            self._send_json(200, result)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+    return ScoringHandler
+
+
+def serve(
+    results_path: str,
+    version: str,
+    selected_ds: str,
+    threshold: float = 0.5,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    warm_up_data: str = None,
+    registry_path: Optional[str] = None,
+    max_loaded_models: int = 4,
+    max_loaded_bytes: Optional[int] = None,
+) -> None:
+    """
+    Run a resident scoring server until interrupted.
+
+    With `registry_path`, every version in the model registry can be
+    scored (see ScoringService); `max_loaded_models` and
+    `max_loaded_bytes` bound the registry's LRU.
+    """
+    registry = (
+        ModelRegistry(registry_path, max_loaded=max_loaded_models, max_bytes=max_loaded_bytes)
+        if registry_path is not None else None
+    )
+    service = ScoringService(results_path, version, selected_ds, threshold, registry)
+    if warm_up_data is not None:
+        X_raw = pd.read_csv(warm_up_data, index_col="row_id", nrows=1)
+        service.warm_up(X_raw)
+
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    LOGGER.info("Scoring server listening on http://%s:%d", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        LOGGER.info("Scoring server stopped.")
+    finally:
+        server.server_close()
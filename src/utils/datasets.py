@@ -0,0 +1,71 @@
+from collections.abc import MutableMapping
+
+import pandas as pd
+
+PANDAS_MAJOR = int(pd.__version__.split(".")[0])
+
+
+def copy_on_write_enabled():
+    """
+    Whether shallow copies are safe to mutate: pandas >= 3 always copies on
+    write; older versions only when the entry point enabled
+    `mode.copy_on_write`.
+    """
+    return PANDAS_MAJOR >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+class SharedBaseDatasets(MutableMapping):
+    """
+    Dict-like container of dataset variants that share one base frame.
+
+    Keys registered as lazy are materialized on first access as shallow
+    copy-on-write views of the base frame, so they reference the base
+    columns until a transform adds or replaces a column. Without
+    copy-on-write (pandas < 3 with the option off) they are deep copies. Assigning a frame
+    to a key stores it as-is (e.g. one-hot or PCA variants built from
+    another variant).
+    """
+
+    def __init__(self, base, lazy_keys=()):
+        self._base = base
+        self._lazy = list(lazy_keys)
+        self._frames = {}
+
+    def __getitem__(self, key):
+        if key not in self._frames:
+            if key not in self._lazy:
+                raise KeyError(key)
+            self._frames[key] = self._base.copy(deep=not copy_on_write_enabled())
+        return self._frames[key]
+
+    def __setitem__(self, key, frame):
+        self._frames[key] = frame
+
+    def __delitem__(self, key):
+        if key not in self._frames and key not in self._lazy:
+            raise KeyError(key)
+        self._frames.pop(key, None)
+        if key in self._lazy:
+            self._lazy.remove(key)
+
+    def __iter__(self):
+        seen = set()
+        for key in list(self._lazy) + list(self._frames):
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+    def __len__(self):
+        return len(set(self._lazy) | set(self._frames))
+
+    @property
+    def base(self):
+        return self._base
+
+    def materialized(self):
+        """Keys that currently hold their own frame."""
+        return list(self._frames)
+
+    def to_dict(self):
+        """Plain dict snapshot (materializes every variant)."""
+        return {key: self[key] for key in self}
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from config.staging import EDA_SNAPSHOT_FORMAT, EDA_SNAPSHOT_PATH, EDA_SNAPSHOT_ROWS
+from src.utils.storage import dataset_file, export_data_async, ingest_data, path_validate, run_async
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+
+def snapshot_dir(role, base_path=EDA_SNAPSHOT_PATH):
+    return f"{base_path}{role}/"
+
+
+def _write_manifest(path, manifest):
+    path_validate(path)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+class EDASink:
+    """
+    Background export of the frames analysts read (the engineered features
+    and every dataset variant), one snapshot per role under
+    `{base_path}{role}/`.
+
+    Every role keeps the same uniform sample of at most `sample_rows` rows
+    (None keeps every row) across its frames. Frames are queued on the
+    asynchronous export writer (see storage.export_data_async) in a
+    columnar format; the manifest is written last, so a snapshot with a
+    manifest is complete. A disabled sink does nothing.
+    """
+
+    def __init__(self, role, enabled=True, sample_rows=EDA_SNAPSHOT_ROWS,
+                 storage_format=EDA_SNAPSHOT_FORMAT, base_path=EDA_SNAPSHOT_PATH, random_state=42):
+        self.role = role
+        self.enabled = enabled
+        self.sample_rows = sample_rows
+        self.storage_format = storage_format
+        self.path = snapshot_dir(role, base_path)
+        self.random_state = random_state
+        self.index = None
+        self.rows = None
+        self.datasets = []
+
+    def _sample(self, frame):
+        if self.index is None:
+            return frame
+        return frame.loc[self.index]
+
+    def _export(self, frame, name):
+        if self.storage_format == "parquet":
+            # Parquet has no sparse type.
+            frame = frame.astype({
+                col: dtype.subtype for col, dtype in frame.dtypes.items() if isinstance(dtype, pd.SparseDtype)
+            })
+        export_data_async(frame, dataset_file(self.path, name, self.storage_format))
+
+    def features(self, X, player_id, y):
+        """Queue the engineered features (with identifier and target) and fix the sample."""
+        if not self.enabled:
+            return
+        # The previous snapshot of this role is incomplete until the new manifest is written.
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        self.rows = len(X)
+        if self.sample_rows is not None and len(X) > self.sample_rows:
+            rng = np.random.default_rng(self.random_state)
+            positions = np.sort(rng.choice(len(X), size=self.sample_rows, replace=False))
+            self.index = X.index[positions]
+
+        frame = self._sample(X).assign(player_id=self._sample(player_id))
+        if y is not None:
+            frame["target"] = self._sample(y)
+        self._export(frame, "features")
+        logger.info(f"EDA snapshot ({self.role}): features {frame.shape} queued for {self.path}")
+
+    def dataset_variants(self, datasets):
+        """Queue every dataset variant (same sampled rows as the features)."""
+        if not self.enabled:
+            return
+        for name, frame in datasets.items():
+            self._export(self._sample(frame), f"datasets/{name}")
+            self.datasets.append(name)
+        logger.info(f"EDA snapshot ({self.role}): {len(datasets)} dataset variants queued")
+
+    def close(self):
+        """Queue the manifest behind the frames; the snapshot is complete once it exists."""
+        if not self.enabled:
+            return
+        manifest = {
+            "role": self.role,
+            "format": self.storage_format,
+            "rows": self.rows,
+            "sampled_rows": len(self.index) if self.index is not None else self.rows,
+            "datasets": self.datasets,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        run_async(_write_manifest, os.path.join(self.path, MANIFEST), manifest)
+
+
+def load_eda_snapshot(role, base_path=EDA_SNAPSHOT_PATH):
+    """
+    (features frame, {variant: frame}, manifest path) of a complete
+    snapshot, or None when the role has none.
+    """
+    path = snapshot_dir(role, base_path)
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    storage_format = manifest["format"]
+    features, _ = ingest_data(dataset_file(path, "features", storage_format), index_col="row_id")
+    datasets = {
+        name: ingest_data(dataset_file(path, f"datasets/{name}", storage_format), index_col="row_id")[0]
+        for name in manifest["datasets"]
+    }
+    return features, datasets, manifest_path
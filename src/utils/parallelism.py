@@ -0,0 +1,59 @@
+import logging
+import os
+
+from config.staging import N_CORES
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores():
+    """
+    Cores this process may use: N_CORES when set, otherwise the CPU
+    affinity of the process (falls back to os.cpu_count()).
+    """
+    if N_CORES:
+        return int(N_CORES)
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def worker_count(n_tasks, cores=None):
+    """Pool size for `n_tasks` independent tasks: one per task, capped by the cores."""
+    cores = cores or available_cores()
+    return max(1, min(n_tasks, cores))
+
+
+def cores_per_worker(n_workers, cores=None):
+    """Cores each of `n_workers` concurrent workers may use without oversubscribing."""
+    cores = cores or available_cores()
+    return max(1, cores // max(1, n_workers))
+
+
+def training_budget(n_datasets, n_fits, n_trees=1, cores=None):
+    """
+    Split the cores between the nested levels of model training.
+
+    Cores are handed out from the outermost (coarsest, best-scaling) level
+    inwards, and every level only gets what the one above leaves over, so
+    the product of the levels never exceeds the core count:
+        datasets -> search (candidate x fold fits) -> model (trees)
+
+    Args:
+        n_datasets: datasets trained independently.
+        n_fits: fits one search can run at once (candidates x CV folds).
+        n_trees: largest ensemble size (1 for single-tree models).
+        cores: cores to split; defaults to available_cores().
+
+    Returns:
+        dict with the worker count of each level.
+    """
+    cores = cores or available_cores()
+    datasets = worker_count(n_datasets, cores)
+    per_dataset = cores // datasets
+    search = worker_count(n_fits, per_dataset)
+    model = worker_count(n_trees, per_dataset // search)
+
+    budget = {"cores": cores, "datasets": datasets, "search": search, "model": model}
+    logger.info("Training parallelism budget: %s", budget)
+    return budget
@@ -1,7 +1,24 @@
+import json
+import logging
 import os
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 
+from config.staging import STORAGE_FORMAT
+from src.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+FILE_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'npy': '.npy.d'}
+
+# Single background writer shared by asynchronous exports.
+_EXPORT_POOL = None
+_EXPORT_FUTURES = []
+_EXPORT_LOCK = threading.Lock()
+
 def path_validate(filepath):
     """
     Si `path` es una carpeta, la crea si no existe.
@@ -13,8 +30,9 @@ def path_validate(filepath):
 
 def load_pickle(filepath):
     with open(filepath, 'rb') as f:
-        return pickle.load(f)
-    print(f"Objeto cargado en {filepath}")
+        obj = pickle.load(f)
+    logger.debug(f"Objeto cargado en {filepath}")
+    return obj
 
 def save_pickle(obj, filepath):
     """
@@ -32,15 +50,143 @@ def save_pickle(obj, filepath):
     with open(filepath, "wb") as f:
         pickle.dump(obj, f)
 
-    print(f"Objeto guardado en {filepath}")
+    logger.info(f"Objeto guardado en {filepath}")
+
+def dataset_file(base_path, name, storage_format=None):
+    """
+    Path of dataset `name` under `base_path` for the configured format.
+    """
+    return f"{base_path}{name}{FILE_EXTENSIONS[storage_format or STORAGE_FORMAT]}"
+
+def _storage_format(path):
+    for storage_format, extension in FILE_EXTENSIONS.items():
+        if path.endswith(extension):
+            return storage_format
+    return 'csv'
+
+def _export_npy(df, output_path):
+    """
+    One .npy file per column plus a JSON manifest with the dtype metadata.
+    Categorical columns are stored as codes with their categories; string
+    columns with missing values also get a validity mask, so they load
+    back as NaN instead of the literal 'nan'.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    manifest = {'index': {'name': df.index.name, 'file': 'index.npy'}, 'columns': []}
+    np.save(os.path.join(output_path, 'index.npy'), df.index.to_numpy())
+
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {'name': col, 'file': f'{i}.npy', 'dtype': str(series.dtype)}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['categories'] = series.cat.categories.tolist()
+            entry['ordered'] = bool(series.cat.ordered)
+            values = series.cat.codes.to_numpy()
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            entry['dtype'] = 'str'
+            missing = series.isna().to_numpy()
+            if missing.any():
+                entry['missing'] = f'{i}.missing.npy'
+                np.save(os.path.join(output_path, entry['missing']), missing)
+            values = series.astype(str).to_numpy(dtype=str)
+        else:
+            values = series.to_numpy()
+        np.save(os.path.join(output_path, entry['file']), values)
+        manifest['columns'].append(entry)
+
+    with open(os.path.join(output_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, default=str)
 
+def _ingest_npy(df_path, columns=None):
+    with open(os.path.join(df_path, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    wanted = None if columns is None else set(columns)
+    data = {}
+    for entry in manifest['columns']:
+        if wanted is not None and entry['name'] not in wanted:
+            continue
+        values = np.load(os.path.join(df_path, entry['file']), mmap_mode='r')
+        if 'categories' in entry:
+            values = pd.Categorical.from_codes(
+                values, categories=entry['categories'], ordered=entry['ordered'])
+        elif 'missing' in entry:
+            values = values.astype(object)
+            values[np.load(os.path.join(df_path, entry['missing']))] = np.nan
+        data[entry['name']] = values
+
+    index = pd.Index(np.load(os.path.join(df_path, manifest['index']['file'])), name=manifest['index']['name'])
+    return pd.DataFrame(data, index=index, copy=False)
+
+@tracing.traced()
 def export_data(df, output_path):
+    """
+    Write a dataset; the format follows the file extension (see dataset_file).
+    Parquet and npy keep dtypes (categorical bins, bools) across the round trip.
+    """
     path_validate(output_path)
-    df.to_csv(output_path, index=True)
-    print(f'file saved: {output_path}')
+    storage_format = _storage_format(output_path)
+    if storage_format == 'parquet':
+        df.to_parquet(output_path, index=True)
+    elif storage_format == 'npy':
+        _export_npy(df, output_path)
+    else:
+        df.to_csv(output_path, index=True)
+    logger.info(f'file saved: {output_path}')
+
+def run_async(fn, *args, **kwargs):
+    """
+    Run `fn` on the background export writer, after every export queued
+    before it. Returns a Future; call wait_for_exports() before the process
+    exits.
+    """
+    global _EXPORT_POOL
+    with _EXPORT_LOCK:
+        if _EXPORT_POOL is None:
+            _EXPORT_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+        future = _EXPORT_POOL.submit(fn, *args, **kwargs)
+        _EXPORT_FUTURES.append(future)
+    return future
+
+def export_data_async(df, output_path):
+    """
+    Export a dataset from a background thread so the caller can move on.
+    Returns a Future; call wait_for_exports() before the process exits.
+    """
+    return run_async(export_data, df, output_path)
 
-def ingest_data(df_path, index_col, target_col=None):
-    df = pd.read_csv(df_path, index_col=index_col)
+def wait_for_exports():
+    """Block until every pending asynchronous export has been written."""
+    with _EXPORT_LOCK:
+        pending = list(_EXPORT_FUTURES)
+        _EXPORT_FUTURES.clear()
+    for future in pending:
+        future.result()
+
+@tracing.traced()
+def ingest_data(df_path, index_col, target_col=None, columns=None):
+    """
+    Read a dataset and split off the target column.
+
+    The format follows the file extension. Parquet and npy datasets restore
+    their stored index and dtypes, and only the requested columns are read
+    (npy columns are memory-mapped).
+
+    Args:
+        columns: optional subset of feature columns to read (the index and
+            target columns are always read).
+    """
+    if columns is not None:
+        columns = list(columns) + ([target_col] if target_col is not None else [])
+
+    storage_format = _storage_format(df_path)
+    if storage_format == 'parquet':
+        df = pd.read_parquet(df_path, columns=columns)
+    elif storage_format == 'npy':
+        df = _ingest_npy(df_path, columns=columns)
+    else:
+        usecols = None if columns is None else [index_col] + columns
+        df = pd.read_csv(df_path, index_col=index_col, usecols=usecols)
 
     if target_col is not None:
         X = df.drop(columns=[target_col])
@@ -50,3 +196,80 @@ def ingest_data(df_path, index_col, target_col=None):
         y = None
 
     return X, y
+
+def iter_data(df_path, index_col, chunksize, target_col=None, columns=None):
+    """
+    Read a dataset in chunks of at most `chunksize` rows.
+
+    Yields (X, y) pairs like ingest_data. CSV and parquet files are read
+    incrementally; npy datasets are sliced from their memory maps.
+    """
+    if columns is not None:
+        columns = list(columns) + ([target_col] if target_col is not None else [])
+
+    storage_format = _storage_format(df_path)
+    if storage_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(df_path)
+        read_columns = None if columns is None else [index_col] + columns
+        chunks = (
+            pa.Table.from_batches([batch]).to_pandas()
+            for batch in parquet_file.iter_batches(batch_size=chunksize, columns=read_columns)
+        )
+    elif storage_format == 'npy':
+        df = _ingest_npy(df_path, columns=columns)
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    else:
+        usecols = None if columns is None else [index_col] + columns
+        chunks = pd.read_csv(df_path, index_col=index_col, usecols=usecols, chunksize=chunksize)
+
+    for df in chunks:
+        if index_col in df.columns:
+            df = df.set_index(index_col)
+        if target_col is not None:
+            yield df.drop(columns=[target_col]), df[target_col]
+        else:
+            yield df, None
+
+class ChunkWriter:
+    """
+    Write a dataset chunk by chunk (csv or parquet, following the file
+    extension). Every chunk must have the same columns and dtypes.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.storage_format = _storage_format(output_path)
+        if self.storage_format == 'npy':
+            raise ValueError("npy datasets cannot be written in chunks; use csv or parquet.")
+        path_validate(output_path)
+        self._parquet_writer = None
+        self._rows = 0
+
+    def write(self, df):
+        if self.storage_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.output_path, mode='w' if self._rows == 0 else 'a',
+                      header=self._rows == 0, index=True)
+        self._rows += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        logger.info(f'file saved: {self.output_path} ({self._rows} rows)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
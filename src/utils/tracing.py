@@ -0,0 +1,456 @@
+"""
+Logging configuration, stage tracing and profiling of the pipeline.
+
+Stages and transforms are wrapped in spans (`span` context manager or
+`traced` decorator). A span measures its duration, the shape and bytes of
+its input and output and the peak RSS of the process while it was open.
+Spans are logged (stage spans at INFO, transforms at DEBUG) and, with
+tracing enabled, written to TRACE_PATH: JSON lines (one span per line) or
+a Chrome trace ('.json', open in chrome://tracing or Perfetto). Worker
+processes append to the same file.
+
+Tracing and profiling are enabled without code changes through the
+environment:
+
+    PIPELINE_TRACE=trace.json PIPELINE_PROFILE=sample python run.py
+"""
+import atexit
+import cProfile
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from config.staging import (
+    LOG_FILE,
+    LOG_LEVEL,
+    PROFILE_INTERVAL,
+    PROFILE_MODE,
+    PROFILE_PATH,
+    TRACE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+TRACE_ENV = "PIPELINE_TRACE"
+PROFILE_ENV = "PIPELINE_PROFILE"
+# Pid of the process that created the trace file; its workers append to it.
+_OWNER_ENV = "PIPELINE_TRACE_OWNER"
+RSS_INTERVAL = 0.01
+
+
+# ------------------------------------------------------------------
+# Logging
+# ------------------------------------------------------------------
+def _validate_dir(path):
+    # storage.path_validate, without importing storage (it is traced itself).
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def configure_logging(level=LOG_LEVEL, log_file=LOG_FILE):
+    """
+    Root logging of an entry point: console plus `log_file` (None for the
+    console only). Does nothing when the root logger is already configured.
+    """
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        _validate_dir(log_file)
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
+
+
+# ------------------------------------------------------------------
+# Sizes and memory
+# ------------------------------------------------------------------
+def current_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is missing)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return max_rss()
+
+
+def max_rss():
+    """Highest RSS of this process so far, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+def describe(obj):
+    """
+    Shape and in-memory bytes of a frame, series or array. Mappings of them
+    (dataset variants) get their item count and summed bytes (views of a
+    shared frame count it once each); tuples are described by their first
+    describable item. None for anything else.
+    """
+    if isinstance(obj, tuple):
+        return next((d for d in map(describe, obj) if d is not None), None)
+    if isinstance(obj, Mapping):
+        described = [d for d in map(describe, obj.values()) if d is not None]
+        if not described:
+            return None
+        return {"items": len(obj), "bytes": sum(d["bytes"] for d in described)}
+    shape = getattr(obj, "shape", None)
+    if shape is None:
+        return None
+    if hasattr(obj, "memory_usage"):
+        usage = obj.memory_usage(index=True)
+        nbytes = int(usage.sum() if hasattr(usage, "sum") else usage)
+    else:
+        nbytes = int(getattr(obj, "nbytes", 0))
+    return {"shape": list(shape), "bytes": nbytes}
+
+
+def _format_size(described):
+    if described is None:
+        return "-"
+    size = f"{described['bytes'] / 2 ** 20:.1f}MB"
+    if "shape" in described:
+        return f"{tuple(described['shape'])} {size}"
+    return f"{described['items']} items {size}"
+
+
+# ------------------------------------------------------------------
+# Spans
+# ------------------------------------------------------------------
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    """An open span; `input` / `output` record the size of the data it handled."""
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.attrs = dict(attrs)
+        self.input_size = None
+        self.output_size = None
+        self.peak_rss = current_rss()
+        self.start_rss = self.peak_rss
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def input(self, obj):
+        self.input_size = describe(obj)
+        return obj
+
+    def output(self, obj):
+        self.output_size = describe(obj)
+        return obj
+
+
+class _NullSpan:
+    """Span used when neither the trace nor the log would show it."""
+
+    def set(self, **attrs):
+        pass
+
+    def input(self, obj):
+        return obj
+
+    def output(self, obj):
+        return obj
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Tracer:
+    """Writes finished spans to the trace file and tracks the RSS peak of open spans."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.chrome = path.endswith(".json")
+        self.lock = threading.Lock()
+        self.open_spans = set()
+        _validate_dir(path)
+        if not append:
+            open(path, "w").close()
+        # Append mode (O_APPEND) lets worker processes write to the same file.
+        self.file = open(path, "a", buffering=1)
+        if self.chrome and not append:
+            self.file.write("[\n")
+        self._stop_event = threading.Event()
+        self._sampler = None
+
+    def start_sampler(self):
+        self._sampler = threading.Thread(target=self._sample_rss, name="trace-rss", daemon=True)
+        self._sampler.start()
+
+    def _sample_rss(self):
+        while not self._stop_event.wait(RSS_INTERVAL):
+            rss = current_rss()
+            with self.lock:
+                for span in self.open_spans:
+                    span.peak_rss = max(span.peak_rss, rss)
+
+    def open(self, span):
+        with self.lock:
+            self.open_spans.add(span)
+
+    def close(self, span, record):
+        with self.lock:
+            self.open_spans.discard(span)
+            if self.chrome:
+                event = {
+                    "name": record["name"],
+                    "cat": "pipeline",
+                    "ph": "X",
+                    "ts": record["start_us"],
+                    "dur": record["duration_us"],
+                    "pid": record["pid"],
+                    "tid": record["tid"],
+                    "args": {k: v for k, v in record.items()
+                             if k not in ("name", "start_us", "duration_us", "pid", "tid")},
+                }
+                self.file.write(json.dumps(event) + ",\n")
+            else:
+                self.file.write(json.dumps(record) + "\n")
+
+    def shutdown(self, owner=True):
+        self._stop_event.set()
+        with self.lock:
+            # Workers only append; the owner closes the Chrome event array.
+            if self.chrome and owner:
+                # Closes the event array (the Chrome trace format also accepts it open).
+                meta = {"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "pipeline"}}
+                self.file.write(json.dumps(meta) + "\n]\n")
+            self.file.close()
+
+
+_tracer = None
+
+
+def enable_tracing(path, append=False):
+    """Write spans to `path` ('.json' Chrome trace, anything else JSON lines)."""
+    global _tracer
+    disable_tracing()
+    _tracer = _Tracer(path, append=append)
+    _tracer.start_sampler()
+    if not append:
+        os.environ[TRACE_ENV] = path
+        os.environ[_OWNER_ENV] = str(os.getpid())
+    logger.info(f"Tracing spans to {path}")
+
+
+def disable_tracing():
+    global _tracer
+    if _tracer is not None:
+        tracer, _tracer = _tracer, None
+        tracer.shutdown(owner=os.environ.get(_OWNER_ENV) == str(os.getpid()))
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+@contextmanager
+def span(name, level=logging.DEBUG, **attrs):
+    """
+    Measure a stage or transform.
+
+    The span is logged at `level` and written to the trace when tracing is
+    enabled; extra keyword arguments are recorded with it.
+
+        with tracing.span("ranking", level=logging.INFO, datasets=10) as s:
+            s.input(X)
+            rankings = s.output(rank(X))
+    """
+    tracer = _tracer
+    if tracer is None and not logger.isEnabledFor(level):
+        yield _NULL_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attrs)
+    token = _current_span.set(current)
+    if tracer is not None:
+        tracer.open(current)
+    start_wall = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        end_rss = current_rss()
+        peak_rss = max(current.peak_rss, end_rss)
+        logger.log(
+            level,
+            f"[span] {name}: {duration:.3f}s | in {_format_size(current.input_size)} "
+            f"-> out {_format_size(current.output_size)} | peak RSS {peak_rss / 2 ** 20:.0f}MB"
+            + (f" | failed: {error}" if error else ""),
+        )
+        if tracer is not None:
+            record = {
+                "name": name,
+                "parent": current.parent.name if current.parent is not None else None,
+                "depth": current.depth,
+                "start_us": int(start_wall * 1e6),
+                "duration_us": int(duration * 1e6),
+                "duration_s": round(duration, 6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "thread": threading.current_thread().name,
+                "input": current.input_size,
+                "output": current.output_size,
+                "rss_start_mb": round(current.start_rss / 2 ** 20, 1),
+                "rss_end_mb": round(end_rss / 2 ** 20, 1),
+                "peak_rss_mb": round(peak_rss / 2 ** 20, 1),
+                "error": error,
+                **current.attrs,
+            }
+            tracer.close(current, record)
+
+
+def traced(name=None, level=logging.DEBUG):
+    """
+    Decorator form of `span`: the first frame-like argument is recorded as
+    the input and the return value as the output.
+    """
+    def decorator(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None and not logger.isEnabledFor(level):
+                return fn(*args, **kwargs)
+            with span(span_name, level=level) as s:
+                s.input(next((a for a in (*args, *kwargs.values()) if describe(a) is not None), None))
+                return s.output(fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+# ------------------------------------------------------------------
+# Profiling
+# ------------------------------------------------------------------
+# Innermost frames of threads waiting for work (idle pool workers, the RSS
+# sampler); like py-spy without --idle, their samples are dropped.
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("connection.py", "_recv"),
+    ("connection.py", "wait"),
+}
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples the Python stacks of every busy thread each `interval` seconds
+    and counts them as collapsed stacks ('thread;outer;...;inner count').
+    """
+
+    def __init__(self, interval, idle=False):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.idle = idle
+        self.counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if not self.idle and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class _Profiler:
+    def __init__(self, mode, path, interval):
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"Unknown profile mode: {mode!r} (expected 'cprofile' or 'sample')")
+        self.mode = mode
+        extension = "pstats" if mode == "cprofile" else "folded"
+        self.output = f"{path}pipeline_{os.getpid()}.{extension}"
+        if mode == "cprofile":
+            # cProfile only sees the thread that enabled it.
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = _StackSampler(interval)
+            self._profiler.start()
+
+    def stop(self):
+        _validate_dir(self.output)
+        if self.mode == "cprofile":
+            self._profiler.disable()
+            self._profiler.dump_stats(self.output)
+        else:
+            self._profiler.stop()
+            with open(self.output, "w") as f:
+                for stack, count in self._profiler.counts.items():
+                    f.write(f"{stack} {count}\n")
+        logger.info(f"Profile ({self.mode}) written to {self.output}")
+
+
+_profiler = None
+
+
+# ------------------------------------------------------------------
+# Session
+# ------------------------------------------------------------------
+def start(trace_path=TRACE_PATH, profile_mode=PROFILE_MODE, profile_path=PROFILE_PATH,
+          profile_interval=PROFILE_INTERVAL):
+    """
+    Start tracing and profiling of a run (the environment variables take
+    precedence over the arguments); both stop at exit or with `stop`.
+    """
+    global _profiler
+    trace_path = os.environ.get(TRACE_ENV, trace_path)
+    profile_mode = os.environ.get(PROFILE_ENV, profile_mode)
+    if trace_path and (_tracer is None or os.environ.get(_OWNER_ENV) != str(os.getpid())):
+        enable_tracing(trace_path)
+    if profile_mode and _profiler is None:
+        _profiler = _Profiler(profile_mode, profile_path, profile_interval)
+    atexit.register(stop)
+
+
+def stop():
+    global _profiler
+    if _profiler is not None:
+        profiler, _profiler = _profiler, None
+        profiler.stop()
+    disable_tracing()
+
+
+# Worker processes of a traced run (and runs traced from the environment
+# without calling `start`) append to the trace file.
+if os.environ.get(TRACE_ENV):
+    enable_tracing(os.environ[TRACE_ENV], append=os.environ.get(_OWNER_ENV) not in (None, str(os.getpid())))
+    atexit.register(disable_tracing)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src.artifacts.preprocessing import compact_configs, encoders
+
+
+def _frequency_configs(column):
+    _, codebook = encoders.frequency_codebook(column)
+    record = {
+        "op": "frequency",
+        "source": column.name,
+        "values": codebook["vocabulary"],
+        "freqs": codebook["frequencies"],
+    }
+    return {
+        "schema_version": compact_configs.SCHEMA_VERSION,
+        "datasets": {"ds1": {"columns": {f"{column.name}_freq": record}, "one_hot": None, "pca": None}},
+    }
+
+
+def _round_trip_encode(column, tmp_path):
+    configs = _frequency_configs(column)
+    path = str(tmp_path / "processing_configs") + "/"
+    compact_configs.save_compact_configs(configs, path)
+    loaded = compact_configs.load_compact_configs(path)
+    records = loaded["datasets"]["ds1"]["columns"]
+    frame = column.to_frame()
+    in_memory = compact_configs.apply_records(frame, configs["datasets"]["ds1"]["columns"], list(records))
+    reloaded = compact_configs.apply_records(frame, records, list(records))
+    return in_memory, reloaded, records
+
+
+def test_mixed_vocabulary_round_trip(tmp_path):
+    column = pd.Series([1, "x", 1, "x", "y"], dtype=object, name="cat")
+    in_memory, reloaded, records = _round_trip_encode(column, tmp_path)
+
+    np.testing.assert_array_equal(in_memory["cat_freq"], [0.4, 0.4, 0.4, 0.4, 0.2])
+    np.testing.assert_array_equal(reloaded["cat_freq"], in_memory["cat_freq"])
+    assert [type(value) for value in records["cat_freq"]["values"]] == [int, str, str]
+
+
+def test_string_vocabulary_stays_in_the_array_file(tmp_path):
+    column = pd.Series(["b", "a", "b", None], name="cat")
+    in_memory, reloaded, records = _round_trip_encode(column, tmp_path)
+
+    assert records["cat_freq"]["values"].dtype.kind == "U"
+    np.testing.assert_array_equal(reloaded["cat_freq"], in_memory["cat_freq"])